@@ -0,0 +1,152 @@
+"""
+Микробенчмарки горячего пути аутентификации.
+
+Каждая операция — отдельный замер (median/p99 в микросекундах):
+- hash / verify для каждой схемы PasswordHasher и legacy-хеша;
+- parse_hash (разбор строки на каждом логине);
+- JWT encode / decode access-токена;
+- hash_token + поиск refresh-токена по хешу (SQLite в памяти).
+
+Запуск (из backend/):
+    python -m benchmarks.bench_auth_hotpath
+    python -m benchmarks.bench_auth_hotpath --json current.json
+    python -m benchmarks.bench_auth_hotpath --baseline current.json --tolerance 0.25
+
+С --baseline бенчмарк сравнивает медианы с сохранёнными и завершается
+с кодом 1, если какая-то операция стала медленнее больше чем на tolerance.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from jose import jwt
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from benchmarks.bench_login import percentile
+from core.config import settings
+from core.database import Base
+from models.models import User
+from repositories.token_repository import TokenRepository
+from services.auth_service import hash_token
+from services.jwt_service import create_access_token
+from services.password_hash_format import parse_hash
+from services.password_service import ARGON2_AVAILABLE, PasswordHasher
+
+PASSWORD = "correct horse battery staple"
+
+
+def measure(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    func()  # прогрев
+    samples: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return {
+        "median_us": statistics.median(samples) * 1e6,
+        "p99_us": percentile(samples, 99) * 1e6,
+    }
+
+
+def password_cases(schemes: List[str]) -> Dict[str, Callable[[], object]]:
+    cases: Dict[str, Callable[[], object]] = {}
+    for scheme in schemes:
+        if scheme == "argon2id" and not ARGON2_AVAILABLE:
+            continue
+        hasher = PasswordHasher(scheme=scheme)
+        stored = hasher.hash(PASSWORD)
+        cases[f"hash[{scheme}]"] = lambda h=hasher: h.hash(PASSWORD)
+        cases[f"verify[{scheme}]"] = lambda h=hasher, s=stored: h.verify(PASSWORD, s)
+
+    salt = os.urandom(16).hex()
+    legacy = f"{salt}${hashlib.pbkdf2_hmac('sha256', PASSWORD.encode(), salt.encode(), 100_000).hex()}"
+    hasher = PasswordHasher()
+    cases["verify[legacy]"] = lambda: hasher.verify(PASSWORD, legacy)
+    cases["parse_hash"] = lambda s=hasher.hash(PASSWORD): parse_hash(s)
+    return cases
+
+
+def token_cases(tokens: int) -> Dict[str, Callable[[], object]]:
+    access = create_access_token({"sub": "1", "role": "user", "ver": 0})
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    user = User(username="bench", email="bench@test.com", password_hash="x", role="user")
+    db.add(user)
+    db.commit()
+    repo = TokenRepository(db)
+    for i in range(tokens):
+        repo.create(user.id, hash_token(f"refresh-{i}"), "bench")
+    target = f"refresh-{tokens // 2}"
+
+    return {
+        "jwt_encode": lambda: create_access_token({"sub": "1", "role": "user", "ver": 0}),
+        "jwt_decode": lambda: jwt.decode(access, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM]),
+        "hash_token": lambda: hash_token(target),
+        "refresh_lookup": lambda: repo.get_by_hash(hash_token(target)),
+    }
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result["median_us"] > before["median_us"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: {before['median_us']:.1f}us -> {result['median_us']:.1f}us"
+            )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Auth hot path microbenchmarks")
+    parser.add_argument(
+        "--schemes",
+        nargs="+",
+        default=["argon2id", "scrypt", "pbkdf2-sha256"],
+    )
+    parser.add_argument("--repeat", type=int, default=20, help="повторов для хешей паролей")
+    parser.add_argument("--fast-repeat", type=int, default=2000, help="повторов для дешёвых операций")
+    parser.add_argument("--tokens", type=int, default=5000, help="refresh-токенов в таблице")
+    parser.add_argument("--json", help="сохранить результаты в файл")
+    parser.add_argument("--baseline", help="JSON с прошлого запуска для сравнения")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results: Dict[str, dict] = {}
+    for name, func in password_cases(args.schemes).items():
+        repeat = args.fast_repeat if name == "parse_hash" else args.repeat
+        results[name] = measure(func, repeat)
+    for name, func in token_cases(args.tokens).items():
+        results[name] = measure(func, args.fast_repeat)
+
+    print(f"{'operation':<24}{'median us':>12}{'p99 us':>12}")
+    for name, result in results.items():
+        print(f"{name:<24}{result['median_us']:>12.1f}{result['p99_us']:>12.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,91 @@
+"""
+Бенчмарк проверки пароля на логине: логины/сек на ядро и p50/p99 под нагрузкой.
+
+Моделирует волну логинов: `concurrency` корутин одновременно вызывают
+PasswordHasher.verify_async (тот же путь, что AuthService.login_async),
+пул хеширования ограничен PASSWORD_HASH_WORKERS. Latency считается от
+постановки в очередь до результата — то, что видит клиент.
+
+Запуск (из backend/):
+    python -m benchmarks.bench_login
+    python -m benchmarks.bench_login --schemes scrypt --concurrency 8 64 --logins 200
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from typing import List
+
+from services.password_service import (
+    ARGON2_AVAILABLE,
+    PasswordHasher,
+    get_hashing_executor,
+    shutdown_hashing_executor,
+)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_storm(hasher: PasswordHasher, stored: str, logins: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one_login():
+        async with semaphore:
+            started = time.perf_counter()
+            assert await hasher.verify_async("correct horse battery staple", stored)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    workers = get_hashing_executor()._max_workers
+    return {
+        "logins_per_sec": logins / elapsed,
+        "logins_per_sec_per_core": logins / elapsed / min(workers, os.cpu_count() or 1),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Password verification throughput/latency")
+    parser.add_argument(
+        "--schemes",
+        nargs="+",
+        default=["argon2id", "scrypt", "pbkdf2-sha256"],
+    )
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 16, 64])
+    parser.add_argument("--logins", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"CPU cores: {os.cpu_count()}, hashing workers: {get_hashing_executor()._max_workers}")
+    print(f"{'scheme':<15}{'conc':>6}{'logins/s':>11}{'/core':>9}{'p50 ms':>10}{'p99 ms':>10}")
+
+    for scheme in args.schemes:
+        if scheme == "argon2id" and not ARGON2_AVAILABLE:
+            print(f"{scheme:<15} skipped: argon2-cffi not installed")
+            continue
+        hasher = PasswordHasher(scheme=scheme)
+        stored = hasher.hash("correct horse battery staple")
+        for concurrency in args.concurrency:
+            result = asyncio.run(run_storm(hasher, stored, args.logins, concurrency))
+            print(
+                f"{scheme:<15}{concurrency:>6}{result['logins_per_sec']:>11.1f}"
+                f"{result['logins_per_sec_per_core']:>9.1f}"
+                f"{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}"
+            )
+
+    shutdown_hashing_executor()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
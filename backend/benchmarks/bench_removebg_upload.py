@@ -0,0 +1,194 @@
+"""
+Качество и задержка удаления фона: полноразмерная загрузка против
+уменьшенной копии с наложением маски (services/bg_matte.py).
+
+Локальная заглушка Remove.bg:
+- читает загрузку с ограничением канала (--uplink-mbps);
+- «обрабатывает» пропорционально числу пикселей (--ms-per-mp);
+- сегментирует синтетическое фото по цвету и отвечает маской
+  (channels=alpha) или RGBA-картинкой (channels=rgba).
+
+Для каждого REMOVEBG_UPLOAD_MAX_SIDE из --max-sides через настоящий
+processing_service._apply_remove_bg замеряются байты загрузки,
+задержка (median/p99) и качество маски в полном разрешении
+относительно эталона: IoU и средняя ошибка альфы.
+
+Запуск (из backend/):
+    python -m benchmarks.bench_removebg_upload
+    python -m benchmarks.bench_removebg_upload --size 6000x4000 --max-sides 0 2500 1600 1000
+"""
+
+import argparse
+import io
+import statistics
+import threading
+import time
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+from benchmarks.bench_login import percentile
+from core.config import settings
+from services import processing_service
+from services.rate_limiter import GcraRateLimiter
+from services.removebg_service import RemoveBgService, close_removebg_http_client
+
+
+def make_photo(width: int, height: int) -> Tuple[bytes, np.ndarray]:
+    """Шумный фон и красный диск; эталонная маска диска."""
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 100, size=(height, width, 3), dtype=np.uint8)
+    yy, xx = np.ogrid[:height, :width]
+    radius = min(width, height) * 0.35
+    truth = (xx - width / 2) ** 2 + (yy - height / 2) ** 2 <= radius**2
+    pixels[truth] = (220, 40, 40)
+    buf = io.BytesIO()
+    Image.fromarray(pixels).save(buf, format="JPEG", quality=92)
+    return buf.getvalue(), truth
+
+
+def segment(image: Image.Image) -> Image.Image:
+    """«Модель» заглушки: передний план — красные пиксели."""
+    rgb = np.asarray(image.convert("RGB"))
+    mask = (rgb[..., 0] > 150) & (rgb[..., 1] < 100)
+    return Image.fromarray((mask * 255).astype(np.uint8), mode="L")
+
+
+def parse_multipart(content_type: str, body: bytes) -> Dict[str, bytes]:
+    message = BytesParser().parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body
+    )
+    return {
+        part.get_param("name", header="content-disposition"): part.get_payload(decode=True)
+        for part in message.get_payload()
+    }
+
+
+class StubRemoveBg(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    uplink_bytes_per_second = 20e6 / 8
+    seconds_per_megapixel = 0.15
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        body = self.rfile.read(length)
+        time.sleep(length / self.uplink_bytes_per_second)
+
+        fields = parse_multipart(self.headers["Content-Type"], body)
+        image = Image.open(io.BytesIO(fields["image_file"]))
+        time.sleep(image.width * image.height / 1e6 * self.seconds_per_megapixel)
+        matte = segment(image)
+
+        if fields.get("channels") == b"alpha":
+            result = matte
+        else:
+            result = image.convert("RGBA")
+            result.putalpha(matte)
+        buf = io.BytesIO()
+        result.save(buf, format="PNG")
+        payload = buf.getvalue()
+
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("X-Credits-Remaining", "1000")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class CountingService(RemoveBgService):
+    """RemoveBgService, запоминающий размер последней загрузки."""
+
+    uploaded = 0
+
+    def remove_background(self, image_data: bytes):
+        self.uploaded = len(image_data)
+        return super().remove_background(image_data)
+
+
+def quality(output: bytes, truth: np.ndarray) -> Tuple[float, float]:
+    alpha = np.asarray(Image.open(io.BytesIO(output)).getchannel("A"), dtype=np.float32) / 255.0
+    predicted = alpha >= 0.5
+    iou = (predicted & truth).sum() / max(1, (predicted | truth).sum())
+    mae = float(np.abs(alpha - truth).mean())
+    return float(iou), mae
+
+
+def run_case(service: CountingService, photo: bytes, truth: np.ndarray, max_side: int, repeat: int) -> dict:
+    settings.REMOVEBG_UPLOAD_MAX_SIDE = max_side
+    samples: List[float] = []
+    output = b""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output, ok = processing_service._apply_remove_bg(photo)
+        samples.append(time.perf_counter() - started)
+        if not ok:
+            raise RuntimeError("background removal failed against the stub")
+    iou, mae = quality(output, truth)
+    return {
+        "upload_bytes": service.uploaded,
+        "median_ms": statistics.median(samples) * 1e3,
+        "p99_ms": percentile(samples, 99) * 1e3,
+        "iou": iou,
+        "alpha_mae": mae,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Downscaled vs full-size background removal")
+    parser.add_argument("--size", default="4000x3000", help="размер синтетического фото WxH")
+    parser.add_argument("--max-sides", nargs="+", type=int, default=[0, 2500, 1600, 1000])
+    parser.add_argument("--channels", default="alpha", choices=["alpha", "rgba"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--uplink-mbps", type=float, default=20.0)
+    parser.add_argument("--ms-per-mp", type=float, default=150.0)
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    photo, truth = make_photo(width, height)
+
+    handler = type(
+        "Handler",
+        (StubRemoveBg,),
+        {
+            "uplink_bytes_per_second": args.uplink_mbps * 1e6 / 8,
+            "seconds_per_megapixel": args.ms_per_mp / 1e3,
+        },
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    service = CountingService(
+        rate_limiter=GcraRateLimiter(key="bench", rate=1_000_000),
+        api_url=f"http://127.0.0.1:{server.server_port}/v1.0/removebg",
+    )
+    service.api_key = "bench"
+    service.enabled = True
+    processing_service.get_removebg_service = lambda: service
+    settings.REMOVEBG_CACHE_ENABLED = False
+    settings.REMOVEBG_CHANNELS = args.channels
+
+    print(f"photo {width}x{height}, {len(photo)} bytes, channels={args.channels}")
+    print(f"{'max side':>10}{'upload B':>12}{'median ms':>12}{'p99 ms':>10}{'IoU':>8}{'alpha MAE':>11}")
+    try:
+        for max_side in args.max_sides:
+            r = run_case(service, photo, truth, max_side, args.repeat)
+            label = "full" if max_side <= 0 else str(max_side)
+            print(
+                f"{label:>10}{r['upload_bytes']:>12}{r['median_ms']:>12.1f}"
+                f"{r['p99_ms']:>10.1f}{r['iou']:>8.4f}{r['alpha_mae']:>11.4f}"
+            )
+    finally:
+        server.shutdown()
+        server.server_close()
+        close_removebg_http_client()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,104 @@
+"""
+Асинхронный слой БД (SQLAlchemy 2.0 AsyncSession) рядом с синхронным.
+
+Синхронная Session в async-маршруте блокирует event loop, а в sync-
+маршруте занимает слот threadpool на всё время запроса. AsyncSession
+отдаёт управление циклу на каждом обращении к БД.
+
+Драйверы: postgresql → asyncpg, sqlite → aiosqlite. URL берётся тот же,
+что и для синхронного движка (DATABASE_URL), драйвер подменяется.
+Движок создаётся лениво: без установленного async-драйвера импорт
+модуля не падает, а синхронная часть приложения работает как раньше.
+"""
+
+import threading
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from core.config import settings
+from core.database import SQLALCHEMY_DATABASE_URL, is_memory_sqlite, set_sqlite_foreign_keys
+
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+_async_engine: Optional[AsyncEngine] = None
+_async_sessionmaker: Optional[async_sessionmaker] = None
+_engine_lock = threading.Lock()
+
+
+def to_async_url(url: str) -> str:
+    """postgresql(+psycopg2)://… → postgresql+asyncpg://…, sqlite → sqlite+aiosqlite."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    driver = ASYNC_DRIVERS.get(backend)
+    if driver is None:
+        raise ValueError(f"No async driver configured for '{backend}'")
+    return parsed.set(drivername=f"{backend}+{driver}").render_as_string(hide_password=False)
+
+
+def build_async_engine(url: str = SQLALCHEMY_DATABASE_URL) -> AsyncEngine:
+    async_url = to_async_url(url)
+    if make_url(async_url).get_backend_name() == "sqlite":
+        if is_memory_sqlite(url):
+            engine = create_async_engine(async_url)
+        else:
+            # Прагмы WAL/busy_timeout ставит синхронный движок на том же файле;
+            # журнал WAL — свойство файла, а не соединения
+            engine = create_async_engine(
+                async_url,
+                connect_args={"timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000},
+                pool_pre_ping=settings.DB_POOL_PRE_PING,
+            )
+        # А внешние ключи — свойство соединения: включаем и здесь
+        event.listen(engine.sync_engine, "connect", set_sqlite_foreign_keys)
+        return engine
+    return create_async_engine(
+        async_url,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine, _async_sessionmaker
+    if _async_engine is None:
+        with _engine_lock:
+            if _async_engine is None:
+                _async_engine = build_async_engine()
+                _async_sessionmaker = async_sessionmaker(
+                    _async_engine, expire_on_commit=False, autoflush=False
+                )
+    return _async_engine
+
+
+def get_async_sessionmaker() -> async_sessionmaker:
+    get_async_engine()
+    return _async_sessionmaker
+
+
+async def dispose_async_engine() -> None:
+    """Закрыть пул при остановке приложения."""
+    global _async_engine, _async_sessionmaker
+    with _engine_lock:
+        engine, _async_engine, _async_sessionmaker = _async_engine, None, None
+    if engine is not None:
+        await engine.dispose()
+
+
+# Dependency
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with get_async_sessionmaker()() as db:
+        yield db
@@ -12,6 +12,14 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str = "sqlite:///./app.db"
+    DB_AUTO_MIGRATE: bool = True
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
 
     # CORS
     ALLOWED_ORIGINS: List[str] = [
@@ -26,21 +34,104 @@ class Settings(BaseSettings):
     MINIO_SECRET_KEY: str = ""
     MINIO_BUCKET: str = "privacyguard"
     MINIO_SECURE: bool = False
+    MINIO_POOL_NUM_POOLS: int = 4
+    MINIO_POOL_MAXSIZE: int = 32
+    MINIO_POOL_BLOCK: bool = False
+    MINIO_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    MINIO_READ_TIMEOUT_SECONDS: float = 60.0
+    MINIO_MAX_RETRIES: int = 3
+    STORAGE_IO_WORKERS: int = 8
+    PRESIGNED_URL_WINDOW_SECONDS: int = 600
+    PRESIGNED_URL_CACHE_SIZE: int = 10000
 
     # JWT
     JWT_SECRET: str = ""
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Очистка refresh_tokens: истёкшие, отозванные старше окна
+    # обнаружения повторного использования, и отозванные поколения
+    REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS: int = 3600  # 0 — не запускать в приложении
+    REFRESH_TOKEN_SWEEP_BATCH_SIZE: int = 1000
+    REFRESH_TOKEN_REUSE_WINDOW_HOURS: int = 24
+
+    # Хеширование паролей (параметры пишутся в строку хеша)
+    PASSWORD_HASH_SCHEME: str = "argon2id"  # argon2id | scrypt | pbkdf2-sha256
+    PASSWORD_HASH_WORKERS: int = 0  # 0 — по числу CPU
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    ARGON2_TIME_COST: int = 2
+    ARGON2_MEMORY_KIB: int = 19456
+    ARGON2_PARALLELISM: int = 1
+    SCRYPT_LOG2_N: int = 15
+    SCRYPT_R: int = 8
+    SCRYPT_P: int = 1
+    PBKDF2_ITERATIONS: int = 600_000
+
+    # Кэш пользователя в get_current_user (0 — выключен)
+    AUTH_USER_CACHE_TTL_SECONDS: float = 30.0
+    AUTH_USER_CACHE_SIZE: int = 10000
+    AUTH_USER_CACHE_REDIS_URL: str = ""
+    # role/ver в access-токене: авторизация без чтения users
+    AUTH_STATELESS_CLAIMS: bool = True
+    AUTH_TOKEN_VERSION_TTL_SECONDS: float = 30.0
 
     # File upload limits
     MAX_FILE_SIZE_MB: int = 50
 
+    # Renditions (миниатюры и превью для списков)
+    RENDITION_FORMAT: str = "WEBP"
+    RENDITION_QUALITY: int = 80
+    THUMBNAIL_MAX_SIDE: int = 320
+    PREVIEW_MAX_SIDE: int = 1280
+    VIDEO_POSTER_SECOND: float = 1.0
+
     # Remove.bg
     REMOVEBG_API_KEY: str = ""
-    REMOVEBG_TIMEOUT_SECONDS: float = 30.0
+    REMOVEBG_API_URL: str = "https://api.remove.bg/v1.0/removebg"
+    REMOVEBG_TIMEOUT_SECONDS: float = 30.0  # чтение ответа
+    REMOVEBG_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    REMOVEBG_WRITE_TIMEOUT_SECONDS: float = 30.0
+    REMOVEBG_POOL_TIMEOUT_SECONDS: float = 10.0  # ожидание свободного соединения
+    REMOVEBG_HTTP2: bool = True  # если установлен h2
+    REMOVEBG_MAX_CONNECTIONS: int = 10
+    REMOVEBG_MAX_KEEPALIVE_CONNECTIONS: int = 5
+    REMOVEBG_KEEPALIVE_EXPIRY_SECONDS: float = 60.0
     REMOVEBG_MAX_RETRIES: int = 2
+    REMOVEBG_BACKOFF_BASE_SECONDS: float = 1.0
+    REMOVEBG_BACKOFF_MAX_SECONDS: float = 30.0
+    REMOVEBG_MAX_CONCURRENCY: int = 4  # одновременных запросов к API на процесс (async-клиент)
+    # Отправлять уменьшенную копию, маску накладывать на оригинал (services/bg_matte.py)
+    REMOVEBG_UPLOAD_MAX_SIDE: int = 1600  # 0 — отправлять как есть
+    REMOVEBG_CHANNELS: str = "alpha"  # alpha (только маска) | rgba
     REMOVEBG_RATE_LIMIT_PER_MINUTE: int = 10
+    REMOVEBG_RATE_LIMIT_BURST: int = 1
+    REMOVEBG_RATE_LIMIT_MAX_WAIT_SECONDS: float = 300.0  # дольше — задача не ждёт, а падает
+    REMOVEBG_RATE_LIMIT_BACKEND: str = "memory"  # memory | sqlite | redis (общий для воркеров)
+    REMOVEBG_RATE_LIMIT_SQLITE_PATH: str = ""
+    REMOVEBG_RATE_LIMIT_REDIS_URL: str = ""
+    # Кэш результатов по SHA-256 входа (services/removebg_cache.py)
+    REMOVEBG_CACHE_ENABLED: bool = True
+    REMOVEBG_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024
+    REMOVEBG_CACHE_TTL_DAYS: int = 30
+    REMOVEBG_CREDITS_PER_CALL: float = 1.0  # для отчёта о сэкономленных кредитах
+    # Очередь обработки (services/job_queue.py, таблица processing_jobs)
+    PROCESSING_JOB_POLL_SECONDS: float = 30.0  # цикл восстановления; 0 — не запускать в приложении
+    PROCESSING_JOB_LEASE_SECONDS: float = 600.0  # продлевается на каждом этапе
+    PROCESSING_JOB_MAX_ATTEMPTS: int = 3
+    PROCESSING_JOB_BACKOFF_BASE_SECONDS: float = 30.0
+    PROCESSING_JOB_BACKOFF_MAX_SECONDS: float = 1800.0
+    PROCESSING_JOB_BATCH_SIZE: int = 10  # задач за один прогон цикла
+    # Push-статусы обработки (services/processing_events.py, GET /api/media/events)
+    PROCESSING_EVENTS_BACKEND: str = "memory"  # memory | redis (события между воркерами)
+    PROCESSING_EVENTS_REDIS_URL: str = ""
+    PROCESSING_EVENTS_QUEUE_SIZE: int = 100  # на поток; старые события отбрасываются
+    PROCESSING_EVENTS_HEARTBEAT_SECONDS: float = 15.0
+    # Локальное удаление фона (services/local_bg_removal.py, нужен onnxruntime)
+    BG_REMOVAL_BACKEND: str = "api"  # api | local
+    BG_REMOVAL_LOCAL_FALLBACK: bool = True  # при квоте/429 Remove.bg — локальная модель
+    BG_REMOVAL_LOCAL_MODEL_PATH: str = "/app/models/u2net.onnx"
+    BG_REMOVAL_LOCAL_INPUT_SIZE: int = 320
+    BG_REMOVAL_LOCAL_THREADS: int = 0  # 0 — решает ONNX Runtime
 
     model_config = ConfigDict(
         env_file=".env",
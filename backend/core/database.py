@@ -1,14 +1,79 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 from core.config import settings
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
-connect_args = (
-    {"check_same_thread": False} if SQLALCHEMY_DATABASE_URL.startswith("sqlite") else {}
-)
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args=connect_args)
+
+def is_memory_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+
+def set_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """
+    SQLite проверяет внешние ключи (и выполняет ON DELETE CASCADE)
+    только с этой прагмой, и ставится она на каждое соединение —
+    иначе удаление MediaItem оставляет его processing_jobs.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    WAL: читатели не блокируют писателя (фоновая обработка пишет,
+    пока API читает списки); synchronous=NORMAL в WAL безопасен
+    и убирает fsync на каждый коммит; busy_timeout — ждать
+    блокировку вместо мгновенного «database is locked».
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.close()
+    set_sqlite_foreign_keys(dbapi_connection, connection_record)
+
+
+def build_engine(url: str = SQLALCHEMY_DATABASE_URL) -> Engine:
+    """Движок с настройками пула из settings и прагмами для файловой SQLite."""
+    if make_url(url).get_backend_name() != "sqlite":
+        return create_engine(
+            url,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
+
+    connect_args = {
+        "check_same_thread": False,
+        "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+    }
+    if is_memory_sqlite(url):
+        # Память живёт в одном соединении — пул и WAL не применимы
+        engine = create_engine(url, connect_args=connect_args)
+        event.listen(engine, "connect", set_sqlite_foreign_keys)
+        return engine
+
+    engine = create_engine(
+        url,
+        connect_args=connect_args,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    return engine
+
+
+engine = build_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -0,0 +1,142 @@
+"""
+Подготовка схемы БД: Alembic upgrade head один раз на деплой.
+
+Раньше каждый воркер на импорте main.py выполнял create_all —
+N воркеров × инспекция всех таблиц, гонки DDL, и схема, которая
+никогда не догоняет изменения колонок. Теперь:
+- миграции применяются под межпроцессной блокировкой
+  (pg_advisory_lock для PostgreSQL, flock на файле для SQLite),
+  первый воркер мигрирует, остальные ждут и видят уже head;
+- база, созданная старым create_all (таблицы есть, alembic_version
+  нет), сначала помечается базовой ревизией 0001 — следующие
+  миграции написаны так, чтобы пропускать уже существующее.
+
+Запуск отдельно от приложения (Dockerfile перед uvicorn):
+    python -m core.db_bootstrap
+"""
+
+import os
+import logging
+import tempfile
+from contextlib import contextmanager
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine, make_url
+
+from core.database import build_engine, engine as default_engine
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows — только один процесс разработки
+    FCNTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_REVISION = "0001"
+# Произвольный постоянный ключ advisory-блокировки миграций
+ADVISORY_LOCK_KEY = 7_300_214_001
+
+
+def alembic_config(url: str) -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    config.set_main_option("sqlalchemy.url", url.replace("%", "%%"))
+    config.attributes["configure_logger"] = False
+    return config
+
+
+def _lock_path(url: str) -> str:
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:"):
+        return f"{os.path.abspath(parsed.database)}.migrate.lock"
+    return os.path.join(tempfile.gettempdir(), "privacyguard-migrate.lock")
+
+
+@contextmanager
+def _file_lock(path: str):
+    if not FCNTL_AVAILABLE:
+        yield
+        return
+    with open(path, "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+@contextmanager
+def migration_lock(connection, url: str):
+    """Одна миграция на кластер воркеров."""
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"SELECT pg_advisory_lock({ADVISORY_LOCK_KEY})")
+        try:
+            yield
+        finally:
+            connection.exec_driver_sql(f"SELECT pg_advisory_unlock({ADVISORY_LOCK_KEY})")
+        return
+    with _file_lock(_lock_path(url)):
+        yield
+
+
+@contextmanager
+def sqlite_foreign_keys_off(connection):
+    """
+    batch_alter_table в SQLite пересоздаёт таблицу (копия → DROP → RENAME);
+    с foreign_keys=ON этот DROP каскадом удалил бы дочерние строки
+    (processing_jobs у media_items). Прагма действует вне транзакции,
+    поэтому ставится до первого запроса; после — включается обратно,
+    соединение вернётся в пул.
+    """
+    if connection.dialect.name != "sqlite":
+        yield
+        return
+    connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+    try:
+        yield
+    finally:
+        # Внутри незавершённой транзакции прагма не сработала бы
+        connection.rollback()
+        connection.exec_driver_sql("PRAGMA foreign_keys=ON")
+
+
+def run_migrations(engine: Optional[Engine] = None) -> None:
+    """Довести схему до head (идемпотентно, безопасно при параллельном старте)."""
+    engine = engine or default_engine
+    url = engine.url.render_as_string(hide_password=False)
+    config = alembic_config(url)
+
+    with engine.connect() as connection, sqlite_foreign_keys_off(connection):
+        with migration_lock(connection, url):
+            tables = set(inspect(connection).get_table_names())
+            config.attributes["connection"] = connection
+
+            if tables and "alembic_version" not in tables:
+                logger.info(
+                    f"[DB] Legacy schema without alembic_version, stamping {BASELINE_REVISION}"
+                )
+                command.stamp(config, BASELINE_REVISION)
+
+            command.upgrade(config, "head")
+            connection.commit()
+
+    logger.info("[DB] Schema is at head")
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO)
+    engine = build_engine()
+    try:
+        run_migrations(engine)
+    finally:
+        engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,107 @@
+"""
+Полнотекстовый индекс поиска по медиа (description + original_filename).
+
+SQLite: внешняя FTS5-таблица media_search с токенизатором trigram
+(поиск подстроки, как ILIKE '%term%', но через инвертированный индекс)
+и триггеры на media_items — индекс синхронизируется самой БД на любом
+INSERT/UPDATE/DELETE, включая массовые DELETE без ORM.
+
+PostgreSQL: расширение pg_trgm и GIN-индексы gin_trgm_ops по обоим
+полям — ILIKE '%term%' идёт по индексу, similarity() даёт ранжирование.
+Синхронизация — обычное сопровождение индекса.
+
+DDL вызывается из create_all (события таблицы в models.py) и из
+миграции 0004.
+"""
+
+import sqlite3
+
+# Триграммный токенизатор появился в SQLite 3.34; сборка может быть и без FTS5
+try:
+    _probe = sqlite3.connect(":memory:")
+    _probe.execute("CREATE VIRTUAL TABLE probe USING fts5(x, tokenize='trigram')")
+    _probe.close()
+    FTS5_TRIGRAM_AVAILABLE = True
+except sqlite3.Error:
+    FTS5_TRIGRAM_AVAILABLE = False
+
+FTS_TABLE = "media_search"
+
+# Служебные таблицы FTS5 и trgm-индексы не описаны в моделях
+TRGM_INDEXES = {
+    "ix_media_items_filename_trgm": "original_filename",
+    "ix_media_items_description_trgm": "description",
+}
+
+_SQLITE_CREATE = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        original_filename, description,
+        content='media_items', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON media_items BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, original_filename, description)
+        VALUES (new.id, new.original_filename, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON media_items BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, original_filename, description)
+        VALUES ('delete', old.id, old.original_filename, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF original_filename, description ON media_items BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, original_filename, description)
+        VALUES ('delete', old.id, old.original_filename, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, original_filename, description)
+        VALUES (new.id, new.original_filename, new.description);
+    END
+    """,
+]
+
+_SQLITE_DROP = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def is_search_object(name: str) -> bool:
+    """Объект индекса поиска (для include_object в Alembic)."""
+    return name.startswith(FTS_TABLE) or name in TRGM_INDEXES
+
+
+def install_search_index(connection, rebuild: bool = False) -> None:
+    """Создать индекс поиска; rebuild=True — проиндексировать существующие строки."""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        if not FTS5_TRIGRAM_AVAILABLE:
+            return
+        for statement in _SQLITE_CREATE:
+            connection.exec_driver_sql(statement)
+        if rebuild:
+            connection.exec_driver_sql(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+            )
+    elif dialect == "postgresql":
+        connection.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for name, column in TRGM_INDEXES.items():
+            connection.exec_driver_sql(
+                f"CREATE INDEX IF NOT EXISTS {name} "
+                f"ON media_items USING gin ({column} gin_trgm_ops)"
+            )
+
+
+def drop_search_index(connection) -> None:
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        for statement in _SQLITE_DROP:
+            connection.exec_driver_sql(statement)
+    elif dialect == "postgresql":
+        for name in TRGM_INDEXES:
+            connection.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
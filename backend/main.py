@@ -1,3 +1,7 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -9,9 +13,62 @@ from fastapi.middleware.gzip import GZipMiddleware
 
 from routers import auth, users, media
 from core.config import settings
-from core.database import Base, engine
+from core.database import engine
+from core.async_database import dispose_async_engine
+from core.db_bootstrap import run_migrations
+from services.storage_service import (
+    ensure_bucket,
+    close_minio_client,
+    get_pool_stats,
+    get_url_cache,
+)
+from services.async_storage_service import shutdown_storage_executor
+from services.password_service import shutdown_hashing_executor
+from services.token_sweeper import start_token_sweeper
+from services.job_queue import start_job_recovery
+from services.processing_service import get_job_runner
+from services.removebg_service import close_removebg_http_client
+from services.async_removebg_service import (
+    bind_removebg_loop,
+    close_removebg_async_client,
+    unbind_removebg_loop,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Схема: Alembic head под межпроцессной блокировкой (не create_all на импорте)
+    if settings.DB_AUTO_MIGRATE:
+        run_migrations()
+
+    # Бакет проверяется один раз на процесс, а не на каждый запрос
+    try:
+        ensure_bucket()
+    except Exception as e:
+        logger.warning(f"[STARTUP] MinIO bucket check failed: {e}")
+
+    # Запросы к Remove.bg из потоков обработки — в этом loop, через AsyncClient
+    bind_removebg_loop(asyncio.get_running_loop())
+
+    sweeper = start_token_sweeper()
+    # Задачи, потерянные при рестарте, и отложенные повторы
+    job_recovery = start_job_recovery(get_job_runner)
+    yield
+    if sweeper is not None:
+        sweeper.cancel()
+    if job_recovery is not None:
+        job_recovery.cancel()
+    unbind_removebg_loop()
+    shutdown_storage_executor()
+    shutdown_hashing_executor()
+    close_minio_client()
+    close_removebg_http_client()
+    engine.dispose()
+    await close_removebg_async_client()
+    await dispose_async_engine()
 
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -19,6 +76,7 @@ app = FastAPI(
     version="0.2.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -99,6 +157,16 @@ def health():
     return {"status": "ok", "service": "backend"}
 
 
+# Внутренняя статистика пула MinIO и кэша ссылок — только администратору
+@app.get("/health/storage", include_in_schema=False)
+def health_storage(_admin=Depends(auth.require_role("admin"))):
+    return {
+        "status": "ok",
+        "minio_pool": get_pool_stats(),
+        "presigned_url_cache": get_url_cache().stats(),
+    }
+
+
 @app.get("/sitemap.xml", include_in_schema=False)
 def sitemap_xml():
     base_url = settings.PUBLIC_URL.rstrip("/")
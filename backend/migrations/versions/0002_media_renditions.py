@@ -0,0 +1,33 @@
+"""media renditions (thumbnail / preview objects)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+COLUMNS = ("thumbnail_object_name", "preview_object_name")
+
+
+def upgrade() -> None:
+    # Базы, созданные через create_all после появления renditions,
+    # уже содержат эти колонки
+    existing = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("media_items")}
+    with op.batch_alter_table("media_items") as batch:
+        for name in COLUMNS:
+            if name not in existing:
+                batch.add_column(sa.Column(name, sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("media_items") as batch:
+        for name in COLUMNS:
+            batch.drop_column(name)
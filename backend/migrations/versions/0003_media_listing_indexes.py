@@ -0,0 +1,38 @@
+"""composite indexes for media listing filters and sorts
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# Должно совпадать с MediaItem.__table_args__
+INDEXES = {
+    "ix_media_items_user_created": ["user_id", "created_at", "id"],
+    "ix_media_items_user_processed": ["user_id", "processed", "created_at", "id"],
+    "ix_media_items_user_file_type": ["user_id", "file_type", "created_at", "id"],
+    "ix_media_items_user_filename": ["user_id", "original_filename", "id"],
+    "ix_media_items_user_file_size": ["user_id", "file_size", "id"],
+    "ix_media_items_created": ["created_at", "id"],
+}
+
+
+def upgrade() -> None:
+    # create_all-базы, помеченные базовой ревизией, могут уже иметь индексы
+    existing = {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes("media_items")}
+    for name, columns in INDEXES.items():
+        if name not in existing:
+            op.create_index(name, "media_items", columns)
+
+
+def downgrade() -> None:
+    for name in INDEXES:
+        op.drop_index(name, table_name="media_items")
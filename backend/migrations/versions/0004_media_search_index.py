@@ -0,0 +1,25 @@
+"""full-text / trigram search index for media
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+from core.search_index import drop_search_index, install_search_index
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # rebuild: проиндексировать уже существующие записи
+    install_search_index(op.get_bind(), rebuild=True)
+
+
+def downgrade() -> None:
+    drop_search_index(op.get_bind())
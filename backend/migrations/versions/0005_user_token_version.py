@@ -0,0 +1,30 @@
+"""per-user token version for stateless access-token revocation
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    existing = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("users")}
+    if "token_version" in existing:
+        return
+    with op.batch_alter_table("users") as batch:
+        batch.add_column(
+            sa.Column("token_version", sa.Integer(), nullable=False, server_default="0")
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("users") as batch:
+        batch.drop_column("token_version")
@@ -0,0 +1,61 @@
+"""refresh token indexes, revoked_at and per-user generation
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+# Должно совпадать с RefreshToken.__table_args__
+INDEXES = {
+    "ix_refresh_tokens_user_id": ["user_id"],
+    "ix_refresh_tokens_expires_at": ["expires_at"],
+    "ix_refresh_tokens_revoked_at": ["revoked_at"],
+}
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    columns = {c["name"] for c in inspector.get_columns("refresh_tokens")}
+
+    if "generation" not in columns:
+        with op.batch_alter_table("refresh_tokens") as batch:
+            batch.add_column(sa.Column("revoked_at", sa.DateTime(), nullable=True))
+            batch.add_column(
+                sa.Column("generation", sa.Integer(), nullable=False, server_default="0")
+            )
+        # Живые токены принадлежат текущему поколению пользователя
+        op.execute(
+            "UPDATE refresh_tokens SET generation = "
+            "(SELECT token_version FROM users WHERE users.id = refresh_tokens.user_id)"
+        )
+
+    # Отозванные до миграции: без revoked_at очистка «revoked» их не увидит.
+    # Время отзыва неизвестно — берём время выдачи (не позже настоящего отзыва)
+    op.execute(
+        sa.text(
+            "UPDATE refresh_tokens SET revoked_at = COALESCE(created_at, CURRENT_TIMESTAMP) "
+            "WHERE revoked = :revoked AND revoked_at IS NULL"
+        ).bindparams(revoked=True)
+    )
+
+    existing = {ix["name"] for ix in inspector.get_indexes("refresh_tokens")}
+    for name, index_columns in INDEXES.items():
+        if name not in existing:
+            op.create_index(name, "refresh_tokens", index_columns)
+
+
+def downgrade() -> None:
+    for name in INDEXES:
+        op.drop_index(name, table_name="refresh_tokens")
+    with op.batch_alter_table("refresh_tokens") as batch:
+        batch.drop_column("generation")
+        batch.drop_column("revoked_at")
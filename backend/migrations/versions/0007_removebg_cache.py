@@ -0,0 +1,38 @@
+"""content-addressed cache of Remove.bg results
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if "removebg_cache" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "removebg_cache",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("cache_key", sa.String(length=64), nullable=False),
+        sa.Column("object_name", sa.String(), nullable=False),
+        sa.Column("size_bytes", sa.Integer(), nullable=False),
+        sa.Column("hits", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("last_used_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_removebg_cache_cache_key", "removebg_cache", ["cache_key"], unique=True)
+    op.create_index("ix_removebg_cache_last_used_at", "removebg_cache", ["last_used_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_removebg_cache_last_used_at", table_name="removebg_cache")
+    op.drop_index("ix_removebg_cache_cache_key", table_name="removebg_cache")
+    op.drop_table("removebg_cache")
@@ -0,0 +1,36 @@
+"""processing stage and error on media items
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    existing = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("media_items")}
+    if "processing_status" in existing:
+        return
+    with op.batch_alter_table("media_items") as batch:
+        batch.add_column(
+            sa.Column("processing_status", sa.String(length=32), nullable=False, server_default="queued")
+        )
+        batch.add_column(sa.Column("processing_error", sa.String(), nullable=True))
+    op.execute(
+        sa.text("UPDATE media_items SET processing_status = 'done' WHERE processed = :processed")
+        .bindparams(processed=True)
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("media_items") as batch:
+        batch.drop_column("processing_error")
+        batch.drop_column("processing_status")
@@ -0,0 +1,59 @@
+"""durable processing job queue with leases
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if "processing_jobs" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "processing_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "media_id",
+            sa.Integer(),
+            sa.ForeignKey("media_items.id", ondelete="CASCADE"),
+            nullable=False,
+            unique=True,
+        ),
+        sa.Column("remove_bg", sa.Boolean(), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False, server_default="pending"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("run_after", sa.DateTime(), nullable=False),
+        sa.Column("lease_owner", sa.String(length=64), nullable=True),
+        sa.Column("lease_expires_at", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_processing_jobs_status_run_after", "processing_jobs", ["status", "run_after"])
+    op.create_index("ix_processing_jobs_status_lease", "processing_jobs", ["status", "lease_expires_at"])
+
+    # Файлы, чьи BackgroundTasks потерялись до этой миграции, — в очередь
+    # (выбор remove_bg не сохранялся — обрабатываем без удаления фона)
+    op.execute(
+        sa.text(
+            "INSERT INTO processing_jobs (media_id, remove_bg, status, attempts, run_after, created_at, updated_at) "
+            "SELECT id, :remove_bg, 'pending', 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP "
+            "FROM media_items WHERE (processed IS NULL OR processed = :processed) "
+            "AND processing_status <> 'failed'"
+        ).bindparams(remove_bg=False, processed=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_processing_jobs_status_lease", table_name="processing_jobs")
+    op.drop_index("ix_processing_jobs_status_run_after", table_name="processing_jobs")
+    op.drop_table("processing_jobs")
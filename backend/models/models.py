@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Index, event
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
 from core.database import Base
+from core.search_index import install_search_index, drop_search_index
 
 
 class User(Base):
@@ -13,6 +14,8 @@ class User(Base):
     email = Column(String, unique=True, index=True)
     password_hash = Column(String)
     role = Column(String, default="user")
+    # Растёт при смене роли / отзыве сессий: access-токены со старым ver недействительны
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     media_items = relationship("MediaItem", back_populates="user")
     refresh_tokens = relationship(
@@ -24,6 +27,13 @@ class User(Base):
 
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
+    # user_id — JOIN с users при проверке поколения, expires_at/revoked_at —
+    # пакетная очистка (services/token_sweeper). Синхронизировано с миграцией 0006.
+    __table_args__ = (
+        Index("ix_refresh_tokens_user_id", "user_id"),
+        Index("ix_refresh_tokens_expires_at", "expires_at"),
+        Index("ix_refresh_tokens_revoked_at", "revoked_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -32,12 +42,26 @@ class RefreshToken(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     expires_at = Column(DateTime, nullable=False)
     revoked = Column(Boolean, default=False)
+    revoked_at = Column(DateTime, nullable=True)
+    # users.token_version на момент выдачи: отзыв всех сессий = +1 к версии
+    generation = Column(Integer, nullable=False, default=0, server_default="0")
 
     user = relationship("User", back_populates="refresh_tokens")
 
 
 class MediaItem(Base):
     __tablename__ = "media_items"
+    # Индексы под фильтры и сортировки MediaRepository.get_filtered:
+    # (user_id, <сортировка>, id) покрывает keyset-пагинацию без сортировки
+    # в памяти. Синхронизировано с миграцией 0003.
+    __table_args__ = (
+        Index("ix_media_items_user_created", "user_id", "created_at", "id"),
+        Index("ix_media_items_user_processed", "user_id", "processed", "created_at", "id"),
+        Index("ix_media_items_user_file_type", "user_id", "file_type", "created_at", "id"),
+        Index("ix_media_items_user_filename", "user_id", "original_filename", "id"),
+        Index("ix_media_items_user_file_size", "user_id", "file_size", "id"),
+        Index("ix_media_items_created", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -61,4 +85,76 @@ class MediaItem(Base):
     # ══════════════════════════════════════════════════════════════
     bg_removed = Column(Boolean, default=False)
 
+    # Производные версии для списков (миниатюра / превью / постер видео)
+    thumbnail_object_name = Column(String, nullable=True)
+    preview_object_name = Column(String, nullable=True)
+
+    # Этап обработки (services/processing_service.PROCESSING_STAGES):
+    # queued → downloading → detecting → blurring → removing_background →
+    # uploading → done | failed. Синхронизировано с миграцией 0008.
+    processing_status = Column(String(32), nullable=False, default="queued", server_default="queued")
+    processing_error = Column(String, nullable=True)
+
     user = relationship("User", back_populates="media_items")
+
+
+class RemoveBgCacheEntry(Base):
+    """
+    Результат Remove.bg по SHA-256 входных байт и параметров запроса.
+    Сам PNG лежит в MinIO под removebg-cache/, здесь — метаданные для
+    поиска и вытеснения (LRU по last_used_at, TTL, лимит по размеру).
+    """
+
+    __tablename__ = "removebg_cache"
+    __table_args__ = (Index("ix_removebg_cache_last_used_at", "last_used_at"),)
+
+    id = Column(Integer, primary_key=True)
+    cache_key = Column(String(64), unique=True, nullable=False, index=True)
+    object_name = Column(String, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    hits = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_used_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class ProcessingJob(Base):
+    """
+    Задача обработки MediaItem — переживает рестарт воркера.
+    Исполнитель берёт её под аренду (lease_expires_at); просроченная
+    аренда = исполнитель умер, задачу забирает другой. Одна задача на
+    файл. Синхронизировано с миграцией 0009.
+    """
+
+    __tablename__ = "processing_jobs"
+    __table_args__ = (
+        Index("ix_processing_jobs_status_run_after", "status", "run_after"),
+        Index("ix_processing_jobs_status_lease", "status", "lease_expires_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    media_id = Column(
+        Integer, ForeignKey("media_items.id", ondelete="CASCADE"), nullable=False, unique=True
+    )
+    remove_bg = Column(Boolean, nullable=False, default=False)
+    # pending → running → done | pending (retry с backoff) | failed
+    status = Column(String(16), nullable=False, default="pending", server_default="pending")
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+    lease_owner = Column(String(64), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# Индекс поиска (FTS5 / pg_trgm) живёт и умирает вместе с таблицей
+event.listen(
+    MediaItem.__table__,
+    "after_create",
+    lambda target, connection, **kw: install_search_index(connection),
+)
+event.listen(
+    MediaItem.__table__,
+    "before_drop",
+    lambda target, connection, **kw: drop_search_index(connection),
+)
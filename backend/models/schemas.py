@@ -65,16 +65,58 @@ class MediaResponse(BaseModel):
     updated_at: Optional[datetime] = None
     # 5.1: Новое поле — статус удаления фона
     bg_removed: Optional[bool] = False
+    thumbnail_url: Optional[str] = None
+    preview_url: Optional[str] = None
+    processing_status: Optional[str] = None
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class MediaStatusResponse(BaseModel):
+    """Ход обработки файла — дешёвый ответ для опроса (без presigned URL)."""
+
+    id: int
+    status: str
+    processed: bool
+    bg_removed: bool = False
+    error: Optional[str] = None
+
+
+class BulkDeleteRequest(BaseModel):
+    """Массовое удаление: по списку id или по фильтру (как у списка)."""
+
+    ids: Optional[List[int]] = None
+    search: Optional[str] = None
+    processed: Optional[bool] = None
+    file_type: Optional[str] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    # False — объекты в хранилище удаляются в фоне после ответа
+    wait_for_storage: bool = False
+
+
+class FailedObject(BaseModel):
+    object_name: str
+    error: str
+
+
+class BulkDeleteResponse(BaseModel):
+    deleted: int
+    deleted_ids: List[int]
+    skipped_ids: List[int] = []
+    objects_scheduled: int = 0
+    failed_objects: List[FailedObject] = []
+
+
 class PaginatedMediaResponse(BaseModel):
     items: List[MediaResponse]
-    total: int
+    # None, если клиент отключил подсчёт (include_total=false)
+    total: Optional[int] = None
     page: int
     page_size: int
-    pages: int
+    pages: Optional[int] = None
+    # Курсор следующей страницы (keyset); None — это последняя страница
+    next_cursor: Optional[str] = None
 
 
 # ══════════════════════════════════════════════════════════════════
@@ -83,9 +125,24 @@ class PaginatedMediaResponse(BaseModel):
 
 
 class RemoveBgStatusResponse(BaseModel):
-    """Статус сервиса Remove.bg."""
+    """Статус удаления фона (выбранный BG_REMOVAL_BACKEND)."""
 
     available: bool
+    backend: str = "remove.bg"  # remove.bg | local — кто фактически удаляет фон
     credits_remaining: Optional[int] = None
     rate_limit_per_minute: int
     message: str
+
+
+class RemoveBgCacheStatsResponse(BaseModel):
+    """Статистика кэша результатов Remove.bg (hits/misses — с запуска процесса)."""
+
+    enabled: bool
+    entries: int
+    size_bytes: int
+    max_bytes: int
+    hits: int
+    misses: int
+    hit_rate: float
+    credits_saved: float
+    lifetime_hits: int
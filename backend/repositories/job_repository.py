@@ -0,0 +1,188 @@
+from typing import Dict, List, Optional
+from datetime import datetime
+
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models.models import ProcessingJob
+
+JOB_STATUSES = ("pending", "running", "done", "failed")
+
+
+def _abandoned(now: datetime):
+    """Исполнитель не продлил аренду — умер или перезапущен посреди попытки."""
+    return and_(ProcessingJob.status == "running", ProcessingJob.lease_expires_at < now)
+
+
+def _claimable(now: datetime, max_attempts: int):
+    """
+    Готова к запуску или брошена с запасом попыток. Брошенная после
+    последней попытки не захватывается: файл, роняющий воркер, иначе
+    ронял бы по воркеру на каждое истечение аренды.
+    """
+    return or_(
+        and_(ProcessingJob.status == "pending", ProcessingJob.run_after <= now),
+        and_(_abandoned(now), ProcessingJob.attempts < max_attempts),
+    )
+
+
+class JobRepository:
+    """
+    Слой доступа к данным: таблица processing_jobs.
+
+    Захват — условный UPDATE (id + «всё ещё свободна»): из нескольких
+    воркеров rowcount=1 получает ровно один, без SELECT ... FOR UPDATE
+    (работает и на SQLite, и на PostgreSQL). Завершение и продление
+    аренды проверяют lease_owner — опоздавший исполнитель, чью задачу
+    уже забрали, ничего не перезапишет.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, job_id: int) -> Optional[ProcessingJob]:
+        return self.db.get(ProcessingJob, job_id)
+
+    def get_by_media(self, media_id: int) -> Optional[ProcessingJob]:
+        return self.db.query(ProcessingJob).filter(ProcessingJob.media_id == media_id).first()
+
+    def stage(self, media_id: int, remove_bg: bool, now: datetime) -> ProcessingJob:
+        """
+        Поставить в очередь без commit — задача фиксируется в транзакции
+        вызывающего (например, вместе с новым MediaItem).
+        """
+        job = self.get_by_media(media_id)
+        if job is None:
+            job = ProcessingJob(media_id=media_id, created_at=now)
+            self.db.add(job)
+        job.remove_bg = remove_bg
+        job.status = "pending"
+        job.attempts = 0
+        job.run_after = now
+        job.lease_owner = None
+        job.lease_expires_at = None
+        job.last_error = None
+        job.updated_at = now
+        return job
+
+    def enqueue(self, media_id: int, remove_bg: bool, now: datetime) -> ProcessingJob:
+        """Поставить файл в очередь; повторная постановка сбрасывает попытки."""
+        job = self.stage(media_id, remove_bg, now)
+        try:
+            self.db.commit()
+        except IntegrityError:
+            # Параллельная постановка того же файла — задача уже есть
+            self.db.rollback()
+            job = self.get_by_media(media_id)
+        return job
+
+    def due_ids(self, now: datetime, limit: int, max_attempts: int) -> List[int]:
+        rows = (
+            self.db.query(ProcessingJob.id)
+            .filter(_claimable(now, max_attempts))
+            .order_by(ProcessingJob.run_after, ProcessingJob.id)
+            .limit(limit)
+            .all()
+        )
+        return [row[0] for row in rows]
+
+    def exhausted_ids(self, now: datetime, limit: int, max_attempts: int) -> List[int]:
+        """Брошенные задачи, у которых попытки кончились."""
+        rows = (
+            self.db.query(ProcessingJob.id)
+            .filter(_abandoned(now), ProcessingJob.attempts >= max_attempts)
+            .order_by(ProcessingJob.id)
+            .limit(limit)
+            .all()
+        )
+        return [row[0] for row in rows]
+
+    def fail_exhausted(self, job_id: int, now: datetime, max_attempts: int, error: str) -> bool:
+        """failed — если задача всё ещё брошена без запаса попыток (её не перехватили)."""
+        result = self.db.execute(
+            update(ProcessingJob)
+            .where(
+                ProcessingJob.id == job_id,
+                _abandoned(now),
+                ProcessingJob.attempts >= max_attempts,
+            )
+            .values(
+                status="failed",
+                lease_owner=None,
+                lease_expires_at=None,
+                last_error=error,
+                updated_at=now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        return result.rowcount == 1
+
+    def claim(self, job_id: int, owner: str, now: datetime, lease_until: datetime, max_attempts: int) -> bool:
+        result = self.db.execute(
+            update(ProcessingJob)
+            .where(ProcessingJob.id == job_id, _claimable(now, max_attempts))
+            .values(
+                status="running",
+                lease_owner=owner,
+                lease_expires_at=lease_until,
+                attempts=ProcessingJob.attempts + 1,
+                updated_at=now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        return result.rowcount == 1
+
+    def extend_lease(self, job_id: int, owner: str, lease_until: datetime) -> bool:
+        result = self.db.execute(
+            update(ProcessingJob)
+            .where(
+                ProcessingJob.id == job_id,
+                ProcessingJob.status == "running",
+                ProcessingJob.lease_owner == owner,
+            )
+            .values(lease_expires_at=lease_until)
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        return result.rowcount == 1
+
+    def finish(
+        self,
+        job_id: int,
+        owner: str,
+        status: str,
+        now: datetime,
+        error: Optional[str] = None,
+        run_after: Optional[datetime] = None,
+    ) -> bool:
+        """done / failed / pending (повтор в run_after) — если аренда ещё наша."""
+        values = dict(
+            status=status,
+            lease_owner=None,
+            lease_expires_at=None,
+            last_error=error,
+            updated_at=now,
+        )
+        if run_after is not None:
+            values["run_after"] = run_after
+        result = self.db.execute(
+            update(ProcessingJob)
+            .where(
+                ProcessingJob.id == job_id,
+                ProcessingJob.status == "running",
+                ProcessingJob.lease_owner == owner,
+            )
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        return result.rowcount == 1
+
+    def counts(self) -> Dict[str, int]:
+        rows = self.db.query(ProcessingJob.status, func.count(ProcessingJob.id)).group_by(ProcessingJob.status)
+        counts = {status: 0 for status in JOB_STATUSES}
+        counts.update({status: count for status, count in rows})
+        return counts
@@ -1,10 +1,13 @@
-from typing import Optional, List, Tuple
+from typing import Any, Optional, List, Tuple
 from datetime import datetime
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, asc, desc
+from sqlalchemy import and_, or_, asc, desc, delete, func, select
 
 from models.models import MediaItem
+from repositories.job_repository import JobRepository
+from repositories.media_search import get_search
 
 # Допустимые поля для сортировки → маппинг на столбцы модели
 ALLOWED_SORT_FIELDS = {
@@ -14,54 +17,106 @@ ALLOWED_SORT_FIELDS = {
     "id": MediaItem.id,
 }
 
+# Сортировка по релевантности поиска (только вместе с search)
+RELEVANCE_SORT = "relevance"
 
-class MediaRepository:
-    """Слой доступа к данным: таблица media_items."""
+# Диалекты, где NULL меньше любого значения (в ASC идут первыми);
+# в PostgreSQL наоборот — NULL больше любого значения
+NULLS_LOW_DIALECTS = {"sqlite", "mysql", "mariadb"}
 
-    def __init__(self, db: Session):
-        self.db = db
 
-    def get_by_id(self, media_id: int) -> Optional[MediaItem]:
-        return self.db.query(MediaItem).filter(MediaItem.id == media_id).first()
+# Колонки с именами объектов в хранилище
+OBJECT_NAME_COLUMNS = (
+    MediaItem.original_object_name,
+    MediaItem.processed_object_name,
+    MediaItem.thumbnail_object_name,
+    MediaItem.preview_object_name,
+)
 
-    def get_all(self) -> List[MediaItem]:
-        return self.db.query(MediaItem).all()
+# Пачка id для IN (...) — ниже лимита переменных SQLite
+BULK_CHUNK_SIZE = 500
 
-    def get_by_user(self, user_id: int) -> List[MediaItem]:
-        return self.db.query(MediaItem).filter(MediaItem.user_id == user_id).all()
 
-    def get_filtered(
+class _MediaQueries:
+    """Построение запросов списка — общее для sync Query и async select()."""
+
+    def _listing(
+        self,
+        query,
+        user_id: Optional[int],
+        search: Optional[str],
+        processed: Optional[bool],
+        file_type: Optional[str],
+        date_from: Optional[datetime],
+        date_to: Optional[datetime],
+        sort_by: str,
+        sort_order: str,
+        page: int,
+        page_size: int,
+        after: Optional[Tuple[Any, int]],
+    ):
+        """
+        Общая сборка списка для Query и select(): возвращает
+        (отфильтрованный запрос для подсчёта, страницу с LIMIT page_size+1).
+        """
+        # ── Релевантность: поиск применяется вместе с рангом ──
+        ranked = sort_by == RELEVANCE_SORT and bool(search)
+        query = self._apply_filters(
+            query,
+            user_id=user_id,
+            search=None if ranked else search,
+            processed=processed,
+            file_type=file_type,
+            date_from=date_from,
+            date_to=date_to,
+        )
+        rank = None
+        if ranked:
+            query, rank = self._search(search).apply_ranked(query)
+        filtered = query
+
+        # ── Сортировка: id — тай-брейкер для стабильного порядка ──
+        sort_column = ALLOWED_SORT_FIELDS.get(sort_by, MediaItem.created_at)
+        descending = sort_order != "asc"
+        order_func = desc if descending else asc
+        if rank is not None:
+            query = query.order_by(order_func(rank), desc(MediaItem.created_at), desc(MediaItem.id))
+        elif sort_column is MediaItem.id:
+            query = query.order_by(order_func(MediaItem.id))
+        else:
+            query = query.order_by(order_func(sort_column), order_func(MediaItem.id))
+
+        # ── Пагинация: keyset по курсору или OFFSET по номеру страницы ──
+        if after is not None:
+            nulls_low = self.db.get_bind().dialect.name in NULLS_LOW_DIALECTS
+            query = query.filter(_keyset_condition(sort_column, after, descending, nulls_low))
+        else:
+            query = query.offset((page - 1) * page_size)
+
+        return filtered, query.limit(page_size + 1)
+
+    def _search(self, term: str):
+        return get_search(self.db.get_bind().dialect.name, term)
+
+    def _apply_filters(
         self,
+        query,
         user_id: Optional[int] = None,
         search: Optional[str] = None,
         processed: Optional[bool] = None,
         file_type: Optional[str] = None,
         date_from: Optional[datetime] = None,
         date_to: Optional[datetime] = None,
-        sort_by: str = "created_at",
-        sort_order: str = "desc",
-        page: int = 1,
-        page_size: int = 10,
-    ) -> Tuple[List[MediaItem], int]:
-        """
-        Фильтрованный, отсортированный, постраничный запрос.
-        Возвращает (items, total_count).
-        """
-        query = self.db.query(MediaItem)
-
+    ):
+        """Общие фильтры списка и массового удаления."""
         # ── Фильтр по владельцу (обычный пользователь видит только своё) ──
         if user_id is not None:
             query = query.filter(MediaItem.user_id == user_id)
 
-        # ── Поиск по описанию и имени файла ──
-        if search:
-            pattern = f"%{search}%"
-            query = query.filter(
-                or_(
-                    MediaItem.description.ilike(pattern),
-                    MediaItem.original_filename.ilike(pattern),
-                )
-            )
+        # ── Поиск по описанию и имени файла (FTS5 / pg_trgm / ILIKE) ──
+        search_backend = self._search(search) if search else None
+        if search_backend is not None:
+            query = search_backend.apply(query)
 
         # ── Фильтр по статусу обработки ──
         if processed is not None:
@@ -77,19 +132,72 @@ class MediaRepository:
         if date_to:
             query = query.filter(MediaItem.created_at <= date_to)
 
-        # ── Подсчёт до пагинации ──
-        total = query.count()
+        return query
 
-        # ── Сортировка ──
-        sort_column = ALLOWED_SORT_FIELDS.get(sort_by, MediaItem.created_at)
-        order_func = asc if sort_order == "asc" else desc
-        query = query.order_by(order_func(sort_column))
 
-        # ── Пагинация ──
-        offset = (page - 1) * page_size
-        items = query.offset(offset).limit(page_size).all()
+class MediaRepository(_MediaQueries):
+    """Слой доступа к данным: таблица media_items."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_by_id(self, media_id: int) -> Optional[MediaItem]:
+        return self.db.query(MediaItem).filter(MediaItem.id == media_id).first()
 
-        return items, total
+    def get_all(self) -> List[MediaItem]:
+        return self.db.query(MediaItem).all()
+
+    def get_by_user(self, user_id: int) -> List[MediaItem]:
+        return self.db.query(MediaItem).filter(MediaItem.user_id == user_id).all()
+
+    def get_filtered(
+        self,
+        user_id: Optional[int] = None,
+        search: Optional[str] = None,
+        processed: Optional[bool] = None,
+        file_type: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        page: int = 1,
+        page_size: int = 10,
+        after: Optional[Tuple[Any, int]] = None,
+        include_total: bool = True,
+    ) -> Tuple[List[MediaItem], Optional[int], bool]:
+        """
+        Фильтрованный, отсортированный, постраничный запрос.
+        Возвращает (items, total_count | None, has_more).
+
+        after=(значение сортировки, id) включает keyset-пагинацию:
+        WHERE (sort_col, id) > / < (после последней строки) вместо
+        OFFSET — стоимость страницы не растёт с её номером.
+
+        sort_by="relevance" вместе с search упорядочивает по рангу
+        индекса поиска (desc — самые релевантные первыми).
+        """
+        filtered, paged = self._listing(
+            self.db.query(MediaItem),
+            user_id=user_id,
+            search=search,
+            processed=processed,
+            file_type=file_type,
+            date_from=date_from,
+            date_to=date_to,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            page=page,
+            page_size=page_size,
+            after=after,
+        )
+
+        # ── Подсчёт до пагинации (можно отключить) ──
+        total = filtered.count() if include_total else None
+
+        rows = paged.all()
+        has_more = len(rows) > page_size
+
+        return rows[:page_size], total, has_more
 
     def create(
         self,
@@ -100,7 +208,12 @@ class MediaRepository:
         file_type: str = None,
         file_size: int = None,
         content_type: str = None,
+        remove_bg: Optional[bool] = None,
     ) -> MediaItem:
+        """
+        remove_bg не None — в той же транзакции ставится задача обработки:
+        запись без задачи (или задача без записи) не появится никогда.
+        """
         item = MediaItem(
             user_id=user_id,
             original_object_name=original_object_name,
@@ -113,7 +226,14 @@ class MediaRepository:
             content_type=content_type,
         )
         self.db.add(item)
-        self.db.commit()
+        try:
+            if remove_bg is not None:
+                self.db.flush()
+                JobRepository(self.db).stage(item.id, remove_bg, datetime.utcnow())
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
         self.db.refresh(item)
         return item
 
@@ -130,3 +250,257 @@ class MediaRepository:
     def delete(self, item: MediaItem) -> None:
         self.db.delete(item)
         self.db.commit()
+
+    # ── Массовое удаление ──
+
+    def get_by_ids(self, media_ids: List[int]) -> List[MediaItem]:
+        if not media_ids:
+            return []
+        return self.db.query(MediaItem).filter(MediaItem.id.in_(media_ids)).all()
+
+    def get_ids_filtered(
+        self,
+        user_id: Optional[int] = None,
+        search: Optional[str] = None,
+        processed: Optional[bool] = None,
+        file_type: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+    ) -> List[int]:
+        query = self._apply_filters(
+            self.db.query(MediaItem.id),
+            user_id=user_id,
+            search=search,
+            processed=processed,
+            file_type=file_type,
+            date_from=date_from,
+            date_to=date_to,
+        )
+        return [row.id for row in query]
+
+    def get_object_names(self, media_ids: List[int]) -> List[str]:
+        """Все объекты хранилища (оригинал, обработка, renditions) для записей."""
+        names: List[str] = []
+        for chunk in _chunks(media_ids, BULK_CHUNK_SIZE):
+            rows = self.db.query(*OBJECT_NAME_COLUMNS).filter(MediaItem.id.in_(chunk))
+            for row in rows:
+                names.extend(name for name in row if name)
+        return names
+
+    def delete_by_ids(self, media_ids: List[int]) -> int:
+        """DELETE ... WHERE id IN (...) — одним запросом на пачку, без загрузки ORM."""
+        deleted = 0
+        for chunk in _chunks(media_ids, BULK_CHUNK_SIZE):
+            deleted += (
+                self.db.query(MediaItem)
+                .filter(MediaItem.id.in_(chunk))
+                .delete(synchronize_session=False)
+            )
+        self.db.commit()
+        return deleted
+
+    def delete_by_user(self, user_id: int) -> List[str]:
+        """
+        Удалить все медиа пользователя, вернуть имена осиротевших объектов.
+        Только flush: коммитит вызывающий — вместе с удалением самого пользователя.
+        """
+        names: List[str] = []
+        rows = self.db.query(*OBJECT_NAME_COLUMNS).filter(MediaItem.user_id == user_id)
+        for row in rows:
+            names.extend(name for name in row if name)
+
+        self.db.query(MediaItem).filter(MediaItem.user_id == user_id).delete(
+            synchronize_session=False
+        )
+        self.db.flush()
+        return names
+
+
+class AsyncMediaRepository(_MediaQueries):
+    """То же для AsyncSession (SQLAlchemy 2.0 select-стиль)."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_by_id(self, media_id: int) -> Optional[MediaItem]:
+        return await self.db.get(MediaItem, media_id)
+
+    async def get_all(self) -> List[MediaItem]:
+        return list(await self.db.scalars(select(MediaItem)))
+
+    async def get_by_user(self, user_id: int) -> List[MediaItem]:
+        return list(await self.db.scalars(select(MediaItem).where(MediaItem.user_id == user_id)))
+
+    async def get_filtered(
+        self,
+        user_id: Optional[int] = None,
+        search: Optional[str] = None,
+        processed: Optional[bool] = None,
+        file_type: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        page: int = 1,
+        page_size: int = 10,
+        after: Optional[Tuple[Any, int]] = None,
+        include_total: bool = True,
+    ) -> Tuple[List[MediaItem], Optional[int], bool]:
+        """См. MediaRepository.get_filtered."""
+        filtered, paged = self._listing(
+            select(MediaItem),
+            user_id=user_id,
+            search=search,
+            processed=processed,
+            file_type=file_type,
+            date_from=date_from,
+            date_to=date_to,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            page=page,
+            page_size=page_size,
+            after=after,
+        )
+
+        total = None
+        if include_total:
+            total = await self.db.scalar(
+                select(func.count()).select_from(filtered.subquery())
+            )
+
+        rows = list(await self.db.scalars(paged))
+        has_more = len(rows) > page_size
+
+        return rows[:page_size], total, has_more
+
+    async def create(
+        self,
+        user_id: int,
+        original_object_name: str,
+        original_filename: str,
+        description: str = None,
+        file_type: str = None,
+        file_size: int = None,
+        content_type: str = None,
+    ) -> MediaItem:
+        item = MediaItem(
+            user_id=user_id,
+            original_object_name=original_object_name,
+            original_filename=original_filename,
+            description=description,
+            processed=False,
+            processed_object_name=None,
+            file_type=file_type,
+            file_size=file_size,
+            content_type=content_type,
+        )
+        self.db.add(item)
+        await self.db.commit()
+        await self.db.refresh(item)
+        return item
+
+    async def update(self, item: MediaItem, **kwargs) -> MediaItem:
+        for key, value in kwargs.items():
+            if hasattr(item, key):
+                setattr(item, key, value)
+        item.updated_at = datetime.utcnow()
+        await self.db.commit()
+        await self.db.refresh(item)
+        return item
+
+    async def delete(self, item: MediaItem) -> None:
+        await self.db.delete(item)
+        await self.db.commit()
+
+    # ── Массовое удаление ──
+
+    async def get_by_ids(self, media_ids: List[int]) -> List[MediaItem]:
+        if not media_ids:
+            return []
+        return list(await self.db.scalars(select(MediaItem).where(MediaItem.id.in_(media_ids))))
+
+    async def get_ids_filtered(
+        self,
+        user_id: Optional[int] = None,
+        search: Optional[str] = None,
+        processed: Optional[bool] = None,
+        file_type: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+    ) -> List[int]:
+        query = self._apply_filters(
+            select(MediaItem.id),
+            user_id=user_id,
+            search=search,
+            processed=processed,
+            file_type=file_type,
+            date_from=date_from,
+            date_to=date_to,
+        )
+        return list(await self.db.scalars(query))
+
+    async def get_object_names(self, media_ids: List[int]) -> List[str]:
+        names: List[str] = []
+        for chunk in _chunks(media_ids, BULK_CHUNK_SIZE):
+            rows = await self.db.execute(
+                select(*OBJECT_NAME_COLUMNS).where(MediaItem.id.in_(chunk))
+            )
+            for row in rows:
+                names.extend(name for name in row if name)
+        return names
+
+    async def delete_by_ids(self, media_ids: List[int]) -> int:
+        deleted = 0
+        for chunk in _chunks(media_ids, BULK_CHUNK_SIZE):
+            result = await self.db.execute(
+                delete(MediaItem)
+                .where(MediaItem.id.in_(chunk))
+                .execution_options(synchronize_session=False)
+            )
+            deleted += result.rowcount
+        await self.db.commit()
+        return deleted
+
+    async def delete_by_user(self, user_id: int) -> List[str]:
+        """Как MediaRepository.delete_by_user: только flush, коммит за вызывающим."""
+        names: List[str] = []
+        rows = await self.db.execute(
+            select(*OBJECT_NAME_COLUMNS).where(MediaItem.user_id == user_id)
+        )
+        for row in rows:
+            names.extend(name for name in row if name)
+
+        await self.db.execute(
+            delete(MediaItem)
+            .where(MediaItem.user_id == user_id)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.flush()
+        return names
+
+
+def _keyset_condition(sort_column, after: Tuple[Any, int], descending: bool, nulls_low: bool):
+    """
+    Условие «строго после (value, id)» в порядке сортировки.
+    Порядок NULL — родной для диалекта (чтобы сортировка шла по индексу),
+    поэтому NULL-группа стоит в начале или в конце выдачи: из неё
+    переходим к непустым значениям, а к ней — после непустых.
+    """
+    value, last_id = after
+    id_cond = MediaItem.id < last_id if descending else MediaItem.id > last_id
+    if sort_column is MediaItem.id:
+        return id_cond
+
+    nulls_first = nulls_low != descending
+    if value is None:
+        in_null_group = and_(sort_column.is_(None), id_cond)
+        return or_(in_null_group, sort_column.isnot(None)) if nulls_first else in_null_group
+
+    value_cond = sort_column < value if descending else sort_column > value
+    after_value = or_(value_cond, and_(sort_column == value, id_cond))
+    return after_value if nulls_first else or_(after_value, sort_column.is_(None))
+
+
+def _chunks(values: List[int], size: int):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
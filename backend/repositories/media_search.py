@@ -0,0 +1,92 @@
+"""
+Поиск по медиа поверх индекса из core/search_index.py.
+
+Бэкенд выбирается по диалекту соединения:
+- sqlite     → FTS5 trigram (MATCH по media_search, ранг bm25);
+- postgresql → ILIKE по GIN trgm-индексам, ранг similarity();
+- иначе / короткий запрос → обычный ILIKE без ранжирования.
+
+Триграммы требуют минимум 3 символа: более короткие запросы
+индекс не ускорит, для них остаётся ILIKE.
+"""
+
+from typing import Optional
+
+from sqlalchemy import column, func, literal, literal_column, or_, select, table
+
+from core.search_index import FTS5_TRIGRAM_AVAILABLE, FTS_TABLE
+from models.models import MediaItem
+
+MIN_INDEXED_TERM = 3
+
+_fts = table(FTS_TABLE, column("rowid"), column("rank"))
+
+
+class LikeSearch:
+    """ILIKE '%term%' по описанию и имени файла (полный скан)."""
+
+    def __init__(self, term: str):
+        self.term = term
+
+    def condition(self):
+        pattern = f"%{self.term}%"
+        return or_(
+            MediaItem.description.ilike(pattern),
+            MediaItem.original_filename.ilike(pattern),
+        )
+
+    def apply(self, query):
+        return query.filter(self.condition())
+
+    def apply_ranked(self, query):
+        """Фильтр + выражение релевантности (больше — лучше) или None."""
+        return self.apply(query), None
+
+
+class FtsSearch(LikeSearch):
+    """SQLite FTS5 с токенизатором trigram."""
+
+    def _match(self):
+        # Фраза в кавычках: trigram ищет её как подстроку; кавычки экранируем
+        phrase = '"' + self.term.replace('"', '""') + '"'
+        return literal_column(FTS_TABLE).op("MATCH")(phrase)
+
+    def condition(self):
+        return MediaItem.id.in_(select(_fts.c.rowid).where(self._match()))
+
+    def apply_ranked(self, query):
+        # JOIN с совпадениями: MATCH вычисляется один раз, а не на каждую строку
+        hits = (
+            select(_fts.c.rowid.label("media_id"), _fts.c.rank.label("rank"))
+            .where(self._match())
+            .subquery("search_hits")
+        )
+        query = query.join(hits, hits.c.media_id == MediaItem.id)
+        # bm25: чем меньше, тем релевантнее — меняем знак
+        return query, -hits.c.rank
+
+
+class TrigramSearch(LikeSearch):
+    """PostgreSQL pg_trgm: ILIKE по GIN-индексам + similarity()."""
+
+    def apply_ranked(self, query):
+        term = literal(self.term)
+        rank = func.greatest(
+            func.similarity(MediaItem.original_filename, term),
+            func.similarity(func.coalesce(MediaItem.description, ""), term),
+        )
+        return self.apply(query), rank
+
+
+def get_search(dialect_name: str, term: Optional[str]) -> Optional[LikeSearch]:
+    """Подобрать бэкенд поиска для диалекта и запроса."""
+    term = (term or "").strip()
+    if not term:
+        return None
+    if len(term) < MIN_INDEXED_TERM:
+        return LikeSearch(term)
+    if dialect_name == "sqlite" and FTS5_TRIGRAM_AVAILABLE:
+        return FtsSearch(term)
+    if dialect_name == "postgresql":
+        return TrigramSearch(term)
+    return LikeSearch(term)
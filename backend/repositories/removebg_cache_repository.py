@@ -0,0 +1,65 @@
+from typing import List, Optional
+from datetime import datetime
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models.models import RemoveBgCacheEntry
+
+
+class RemoveBgCacheRepository:
+    """Слой доступа к данным: таблица removebg_cache."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_by_key(self, cache_key: str) -> Optional[RemoveBgCacheEntry]:
+        return (
+            self.db.query(RemoveBgCacheEntry)
+            .filter(RemoveBgCacheEntry.cache_key == cache_key)
+            .first()
+        )
+
+    def touch(self, entry: RemoveBgCacheEntry, now: datetime) -> None:
+        entry.hits = RemoveBgCacheEntry.hits + 1
+        entry.last_used_at = now
+        self.db.commit()
+
+    def create(self, cache_key: str, object_name: str, size_bytes: int, now: datetime) -> RemoveBgCacheEntry:
+        entry = RemoveBgCacheEntry(
+            cache_key=cache_key,
+            object_name=object_name,
+            size_bytes=size_bytes,
+            created_at=now,
+            last_used_at=now,
+        )
+        self.db.add(entry)
+        self.db.commit()
+        return entry
+
+    def refresh(self, entry: RemoveBgCacheEntry, size_bytes: int, now: datetime) -> None:
+        """Объект перезаписан заново — запись снова свежая."""
+        entry.size_bytes = size_bytes
+        entry.last_used_at = now
+        self.db.commit()
+
+    def totals(self) -> tuple:
+        """(число записей, суммарный размер, суммарные попадания)."""
+        count, size, hits = self.db.query(
+            func.count(RemoveBgCacheEntry.id),
+            func.coalesce(func.sum(RemoveBgCacheEntry.size_bytes), 0),
+            func.coalesce(func.sum(RemoveBgCacheEntry.hits), 0),
+        ).one()
+        return count, size, hits
+
+    def least_recently_used(self, limit: int, unused_since: Optional[datetime] = None) -> List[RemoveBgCacheEntry]:
+        """Самые давно использованные записи (по индексу last_used_at)."""
+        query = self.db.query(RemoveBgCacheEntry)
+        if unused_since is not None:
+            query = query.filter(RemoveBgCacheEntry.last_used_at < unused_since)
+        return query.order_by(RemoveBgCacheEntry.last_used_at, RemoveBgCacheEntry.id).limit(limit).all()
+
+    def delete(self, entries: List[RemoveBgCacheEntry]) -> None:
+        for entry in entries:
+            self.db.delete(entry)
+        self.db.commit()
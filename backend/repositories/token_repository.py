@@ -1,11 +1,34 @@
 from typing import Optional
 from datetime import datetime, timedelta
 
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from models.models import RefreshToken
+from models.models import RefreshToken, User
 from core.config import settings
 
+# Виды строк, которые удаляет TokenSweeper
+SWEEP_KINDS = ("expired", "revoked", "superseded")
+
+
+def _sweep_candidates(kind: str, now: datetime, revoked_before: datetime, limit: int):
+    """
+    id строк на удаление одного вида — каждый вид идёт по своему индексу:
+    expired — expires_at, revoked — revoked_at, superseded — JOIN по user_id.
+    """
+    query = select(RefreshToken.id)
+    if kind == "expired":
+        query = query.where(RefreshToken.expires_at < now)
+    elif kind == "revoked":
+        query = query.where(RefreshToken.revoked_at < revoked_before)
+    else:
+        # Поколение, отозванное revoke_all_for_user (или пользователь удалён)
+        query = query.outerjoin(User, User.id == RefreshToken.user_id).where(
+            (User.id.is_(None)) | (RefreshToken.generation < User.token_version)
+        )
+    return query.limit(limit)
+
 
 class TokenRepository:
     """Слой доступа к данным: таблица refresh_tokens."""
@@ -18,11 +41,13 @@ class TokenRepository:
         user_id: int,
         token_hash: str,
         device_info: str,
+        generation: int = 0,
     ) -> RefreshToken:
         stored = RefreshToken(
             user_id=user_id,
             token_hash=token_hash,
             device_info=device_info,
+            generation=generation,
             expires_at=datetime.utcnow()
             + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
         )
@@ -37,12 +62,97 @@ class TokenRepository:
             .first()
         )
 
+    def is_revoked(self, token: RefreshToken) -> bool:
+        """Отозван сам (ротация/logout) или всё его поколение (revoke_all_for_user)."""
+        if token.revoked:
+            return True
+        current = self.db.query(User.token_version).filter(User.id == token.user_id).scalar()
+        return current is None or token.generation != current
+
     def revoke(self, token: RefreshToken) -> None:
         token.revoked = True
+        token.revoked_at = datetime.utcnow()
         self.db.commit()
 
     def revoke_all_for_user(self, user_id: int) -> None:
-        self.db.query(RefreshToken).filter(
-            RefreshToken.user_id == user_id,
-        ).update({"revoked": True})
+        """
+        Отзыв всех сессий — +1 к поколению пользователя (одна строка users),
+        а не UPDATE по всем его токенам. Заодно гасит выданные access-токены
+        (claim ver). Старые строки удаляет TokenSweeper.
+        """
+        self.db.query(User).filter(User.id == user_id).update(
+            {User.token_version: User.token_version + 1},
+            synchronize_session="fetch",
+        )
         self.db.commit()
+
+    def delete_batch(self, kind: str, now: datetime, revoked_before: datetime, limit: int) -> int:
+        """Удалить не больше limit строк одного вида; коммит на пачку — короткие блокировки."""
+        ids = _sweep_candidates(kind, now, revoked_before, limit).scalar_subquery()
+        result = self.db.execute(
+            delete(RefreshToken)
+            .where(RefreshToken.id.in_(ids))
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        return result.rowcount or 0
+
+
+class AsyncTokenRepository:
+    """То же для AsyncSession (SQLAlchemy 2.0 select-стиль)."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create(
+        self,
+        user_id: int,
+        token_hash: str,
+        device_info: str,
+        generation: int = 0,
+    ) -> RefreshToken:
+        stored = RefreshToken(
+            user_id=user_id,
+            token_hash=token_hash,
+            device_info=device_info,
+            generation=generation,
+            expires_at=datetime.utcnow()
+            + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+        self.db.add(stored)
+        await self.db.commit()
+        return stored
+
+    async def get_by_hash(self, token_hash: str) -> Optional[RefreshToken]:
+        return await self.db.scalar(
+            select(RefreshToken).where(RefreshToken.token_hash == token_hash).limit(1)
+        )
+
+    async def is_revoked(self, token: RefreshToken) -> bool:
+        if token.revoked:
+            return True
+        current = await self.db.scalar(select(User.token_version).where(User.id == token.user_id))
+        return current is None or token.generation != current
+
+    async def revoke(self, token: RefreshToken) -> None:
+        token.revoked = True
+        token.revoked_at = datetime.utcnow()
+        await self.db.commit()
+
+    async def revoke_all_for_user(self, user_id: int) -> None:
+        await self.db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(token_version=User.token_version + 1)
+        )
+        await self.db.commit()
+
+    async def delete_batch(self, kind: str, now: datetime, revoked_before: datetime, limit: int) -> int:
+        ids = _sweep_candidates(kind, now, revoked_before, limit).scalar_subquery()
+        result = await self.db.execute(
+            delete(RefreshToken)
+            .where(RefreshToken.id.in_(ids))
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount or 0
@@ -1,5 +1,7 @@
 from typing import Optional, List
 
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from models.models import User
@@ -23,6 +25,11 @@ class UserRepository:
     def get_all(self) -> List[User]:
         return self.db.query(User).all()
 
+    def get_token_version(self, user_id: int) -> Optional[int]:
+        """Только версия токенов — без загрузки всей строки."""
+        row = self.db.query(User.token_version).filter(User.id == user_id).first()
+        return row.token_version if row else None
+
     def create(
         self, username: str, email: str, password_hash: str, role: str = "user"
     ) -> User:
@@ -43,6 +50,60 @@ class UserRepository:
         self.db.refresh(user)
         return user
 
+    def update_password_hash(self, user: User, password_hash: str) -> None:
+        user.password_hash = password_hash
+        self.db.commit()
+
     def delete(self, user: User) -> None:
         self.db.delete(user)
         self.db.commit()
+
+
+class AsyncUserRepository:
+    """То же для AsyncSession (SQLAlchemy 2.0 select-стиль)."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_by_id(self, user_id: int) -> Optional[User]:
+        return await self.db.get(User, user_id)
+
+    async def get_by_email(self, email: str) -> Optional[User]:
+        return await self.db.scalar(select(User).where(User.email == email).limit(1))
+
+    async def get_by_username(self, username: str) -> Optional[User]:
+        return await self.db.scalar(select(User).where(User.username == username).limit(1))
+
+    async def get_all(self) -> List[User]:
+        return list(await self.db.scalars(select(User)))
+
+    async def get_token_version(self, user_id: int) -> Optional[int]:
+        return await self.db.scalar(select(User.token_version).where(User.id == user_id))
+
+    async def create(
+        self, username: str, email: str, password_hash: str, role: str = "user"
+    ) -> User:
+        user = User(
+            username=username,
+            email=email,
+            password_hash=password_hash,
+            role=role,
+        )
+        self.db.add(user)
+        await self.db.commit()
+        await self.db.refresh(user)
+        return user
+
+    async def update_role(self, user: User, role: str) -> User:
+        user.role = role
+        await self.db.commit()
+        await self.db.refresh(user)
+        return user
+
+    async def update_password_hash(self, user: User, password_hash: str) -> None:
+        user.password_hash = password_hash
+        await self.db.commit()
+
+    async def delete(self, user: User) -> None:
+        await self.db.delete(user)
+        await self.db.commit()
@@ -17,6 +17,11 @@ from models.schemas import (
 from repositories.user_repository import UserRepository
 from repositories.token_repository import TokenRepository
 from services.auth_service import AuthService
+from services.principal_cache import (
+    UserPrincipal,
+    get_principal_cache,
+    get_token_version_cache,
+)
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
@@ -41,7 +46,17 @@ def get_auth_service(db: Session = Depends(get_db)) -> AuthService:
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
     db: Session = Depends(get_db),
-) -> User:
+) -> UserPrincipal:
+    """
+    Пользователь из access-токена. Снимок кэшируется по id на короткий TTL,
+    так что БД читается только на промахе. FastAPI кэширует зависимость
+    в пределах запроса — router-level Depends и Depends в маршруте
+    (включая require_role) разрешаются одним вызовом.
+
+    Токен с claims role/ver авторизуется без строки users: достаточно
+    сверить ver с текущей версией пользователя (кэш, на промахе —
+    SELECT одной колонки). Несовпадение = токен отозван.
+    """
     token = credentials.credentials
     try:
         payload = jwt.decode(
@@ -56,17 +71,42 @@ def get_current_user(
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid token")
 
+        if settings.AUTH_STATELESS_CLAIMS and "ver" in payload and "role" in payload:
+            return _principal_from_claims(int(user_id), payload, db)
+
+        cache = get_principal_cache()
+        principal = cache.get(int(user_id))
+        if principal is not None:
+            return principal
+
         user = UserRepository(db).get_by_id(int(user_id))
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
 
-        return user
+        principal = UserPrincipal.from_user(user)
+        cache.put(principal)
+        return principal
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
 
+def _principal_from_claims(user_id: int, payload: dict, db: Session) -> UserPrincipal:
+    versions = get_token_version_cache()
+    current = versions.get(user_id)
+    if current is None:
+        current = UserRepository(db).get_token_version(user_id)
+        if current is None:
+            raise HTTPException(status_code=401, detail="User not found")
+        versions.set(user_id, current)
+
+    if payload["ver"] != current:
+        raise HTTPException(status_code=401, detail="Token revoked")
+
+    return UserPrincipal(id=user_id, role=payload["role"])
+
+
 def require_role(*allowed_roles: str):
-    def _check(current_user: User = Depends(get_current_user)) -> User:
+    def _check(current_user: UserPrincipal = Depends(get_current_user)) -> UserPrincipal:
         if current_user.role not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -80,22 +120,23 @@ def require_role(*allowed_roles: str):
 # ── Endpoints ──
 
 
+# register/login — async: хеширование в своём пуле, а не в threadpool маршрутов
 @router.post("/register", response_model=UserResponse, status_code=201)
-def register(
+async def register(
     payload: UserCreate,
     service: AuthService = Depends(get_auth_service),
 ):
-    return service.register(payload.username, payload.email, payload.password)
+    return await service.register_async(payload.username, payload.email, payload.password)
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(
+async def login(
     payload: LoginRequest,
     request: Request,
     service: AuthService = Depends(get_auth_service),
 ):
     device_info = request.headers.get("User-Agent", "unknown")[:200]
-    result = service.login(payload.email, payload.password, device_info)
+    result = await service.login_async(payload.email, payload.password, device_info)
     return TokenResponse(**result)
 
 
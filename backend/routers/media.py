@@ -4,6 +4,7 @@ from datetime import datetime
 
 from fastapi import (
     APIRouter,
+    Request,
     UploadFile,
     File,
     Form,
@@ -15,20 +16,29 @@ from fastapi.responses import StreamingResponse
 from starlette.background import BackgroundTask
 from sqlalchemy.orm import Session
 
+from core.config import settings
 from core.database import get_db
 from models.models import User
 from models.schemas import (
+    BulkDeleteRequest,
+    BulkDeleteResponse,
+    FailedObject,
     MediaResponse,
+    MediaStatusResponse,
     MediaUpdate,
     PaginatedMediaResponse,
+    RemoveBgCacheStatsResponse,
     RemoveBgStatusResponse,
 )
 from repositories.media_repository import MediaRepository
-from services.media_service import MediaService
+from services.media_service import MediaService, purge_media_objects
 from services.storage_service import StorageService
 from services.processing_service import process_media_item
-from services.removebg_service import RemoveBgService
-from routers.auth import get_current_user
+from services.removebg_service import get_removebg_service
+from services.local_bg_removal import get_background_remover
+from services.removebg_cache import get_cache_stats
+from services.processing_events import open_subscription, sse_stream
+from routers.auth import get_current_user, require_role
 
 router = APIRouter(prefix="/media", tags=["Media"])
 
@@ -48,18 +58,44 @@ def get_media_service(db: Session = Depends(get_db)) -> MediaService:
 @router.get("/removebg/status", response_model=RemoveBgStatusResponse)
 def removebg_status(current_user: User = Depends(get_current_user)):
     """
-    Проверить доступность сервиса Remove.bg.
+    Проверить доступность удаления фона для выбранного BG_REMOVAL_BACKEND.
 
     Фронтенд вызывает при загрузке CensoringPage,
     чтобы показать/скрыть чекбокс "Remove Background".
     """
-    service = RemoveBgService()
-    if service.is_available():
+    if settings.BG_REMOVAL_BACKEND == "local":
+        if get_background_remover().is_available():
+            return RemoveBgStatusResponse(
+                available=True,
+                backend="local",
+                rate_limit_per_minute=0,
+                message="Local background removal model is available",
+            )
+        return RemoveBgStatusResponse(
+            available=False,
+            backend="local",
+            rate_limit_per_minute=0,
+            message=(
+                "Local background removal is not available. "
+                "Install onnxruntime and set BG_REMOVAL_LOCAL_MODEL_PATH."
+            ),
+        )
+
+    api = get_removebg_service()
+    if api.is_available():
         return RemoveBgStatusResponse(
             available=True,
-            rate_limit_per_minute=service.max_requests_per_minute,
+            rate_limit_per_minute=api.max_requests_per_minute,
             message="Remove.bg service is available",
         )
+    # Без ключа API остаётся локальный fallback, если он настроен
+    if get_background_remover().is_available():
+        return RemoveBgStatusResponse(
+            available=True,
+            backend="local",
+            rate_limit_per_minute=0,
+            message="Remove.bg is not configured; using the local background removal model",
+        )
     return RemoveBgStatusResponse(
         available=False,
         rate_limit_per_minute=0,
@@ -67,6 +103,15 @@ def removebg_status(current_user: User = Depends(get_current_user)):
     )
 
 
+@router.get("/removebg/cache/stats", response_model=RemoveBgCacheStatsResponse)
+def removebg_cache_stats(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("admin")),
+):
+    """Размер кэша результатов Remove.bg, hit rate и сэкономленные кредиты."""
+    return get_cache_stats(db)
+
+
 # ── Upload (обновлённый с remove_bg параметром) ─────────────────
 @router.post("/upload", response_model=MediaResponse, status_code=201)
 async def upload_media(
@@ -81,13 +126,16 @@ async def upload_media(
     file_content = await file.read()
     file_size = len(file_content)
 
-    item, response = service.upload(
+    item, response = await service.upload_async(
         file_obj=io.BytesIO(file_content),
         filename=file.filename,
         content_type=file.content_type,
         file_size=file_size,
         user_id=current_user.id,
         description=description,
+        # Запись и задача processing_jobs — одной транзакцией,
+        # быстрый путь (background task) — уже после неё
+        remove_bg=bool(remove_bg),
     )
     # 5.2: Передаём remove_bg в background task
     background_tasks.add_task(process_media_item, item.id, remove_bg)
@@ -106,6 +154,8 @@ def list_media(
     sort_order: str = Query("desc"),
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    include_total: bool = Query(True),
     current_user: User = Depends(get_current_user),
     service: MediaService = Depends(get_media_service),
 ):
@@ -120,6 +170,58 @@ def list_media(
         sort_order=sort_order,
         page=page,
         page_size=page_size,
+        cursor=cursor,
+        include_total=include_total,
+    )
+
+
+# ── Bulk delete ─────────────────────────────────────────────────
+@router.post("/bulk-delete", response_model=BulkDeleteResponse)
+def bulk_delete_media(
+    payload: BulkDeleteRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    service: MediaService = Depends(get_media_service),
+):
+    report, object_names = service.bulk_delete(
+        current_user=current_user,
+        ids=payload.ids,
+        search=payload.search,
+        processed=payload.processed,
+        file_type=payload.file_type,
+        date_from=payload.date_from,
+        date_to=payload.date_to,
+    )
+
+    if payload.wait_for_storage:
+        failures = purge_media_objects(object_names, service.storage)
+        report.objects_scheduled = 0
+        report.failed_objects = [
+            FailedObject(object_name=name, error=error) for name, error in failures
+        ]
+    else:
+        background_tasks.add_task(purge_media_objects, object_names, service.storage)
+
+    return report
+
+
+@router.get("/events")
+async def media_events(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    SSE-поток переходов обработки файлов текущего пользователя
+    (event: status, data — как у GET /{media_id}/status).
+    """
+    # Поток живёт долго — соединение из пула ему не нужно
+    db.close()
+    subscription = await open_subscription(current_user.id)
+    return StreamingResponse(
+        sse_stream(subscription, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
@@ -132,6 +234,15 @@ def get_media(
     return service.get_media(media_id, current_user)
 
 
+@router.get("/{media_id}/status", response_model=MediaStatusResponse)
+def get_media_status(
+    media_id: int,
+    current_user: User = Depends(get_current_user),
+    service: MediaService = Depends(get_media_service),
+):
+    return service.get_status(media_id, current_user)
+
+
 @router.patch("/{media_id}", response_model=MediaResponse)
 def update_media(
     media_id: int,
@@ -1,6 +1,6 @@
 from typing import List
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, BackgroundTasks, Depends
 from sqlalchemy.orm import Session
 
 from core.database import get_db
@@ -8,7 +8,9 @@ from models.models import User
 from models.schemas import UserResponse, ChangeRoleRequest
 from repositories.user_repository import UserRepository
 from repositories.token_repository import TokenRepository
+from repositories.media_repository import MediaRepository
 from services.user_service import UserService
+from services.media_service import purge_media_objects
 from routers.auth import get_current_user, require_role
 
 router = APIRouter(prefix="/users", tags=["Users"])
@@ -18,6 +20,7 @@ def get_user_service(db: Session = Depends(get_db)) -> UserService:
     return UserService(
         user_repo=UserRepository(db),
         token_repo=TokenRepository(db),
+        media_repo=MediaRepository(db),
     )
 
 
@@ -30,7 +33,13 @@ def list_users(
 
 
 @router.get("/me", response_model=UserResponse)
-def get_me(current_user: User = Depends(get_current_user)):
+def get_me(
+    current_user: User = Depends(get_current_user),
+    service: UserService = Depends(get_user_service),
+):
+    # Principal из stateless-токена не несёт username/email
+    if current_user.username is None:
+        return service.get_by_id(current_user.id)
     return current_user
 
 
@@ -56,8 +65,10 @@ def change_user_role(
 @router.delete("/{user_id}", status_code=204)
 def delete_user(
     user_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(require_role("admin")),
     service: UserService = Depends(get_user_service),
 ):
-    service.delete_user(user_id, current_user)
+    object_names = service.delete_user(user_id, current_user)
+    background_tasks.add_task(purge_media_objects, object_names)
     return
@@ -0,0 +1,279 @@
+"""
+Async-вариант интеграции с Remove.bg на httpx.AsyncClient.
+
+Синхронный RemoveBgService ждёт backoff через time.sleep и держит
+поток воркера на всё время запроса. Здесь:
+- ожидание лимитера и backoff — asyncio.sleep, loop свободен;
+- число одновременных запросов к API ограничено семафором
+  (REMOVEBG_MAX_CONCURRENCY) — один воркер держит много задач
+  в полёте, но не заваливает API;
+- jittered exponential backoff и Retry-After — как в sync-версии
+  (RemoveBgService.backoff_delay);
+- отмена задачи (CancelledError) прерывает ожидание или запрос и
+  освобождает слот семафора.
+
+Пайплайн обработки синхронный (поток воркера), поэтому в него клиент
+подключён через LoopBoundRemoveBgService: вызов уходит в event loop
+приложения, привязанный в lifespan (bind_removebg_loop).
+
+Нормализация ответа, лимитер и настройки общие с RemoveBgService.
+"""
+
+import asyncio
+import math
+import logging
+import threading
+from concurrent.futures import CancelledError, Future
+from typing import Optional, Set
+
+import httpx
+
+from core.config import settings
+from services.rate_limiter import RateLimitExceeded
+from services.removebg_service import (
+    H2_AVAILABLE,
+    RemoveBgQuotaError,
+    RemoveBgRateLimitError,
+    RemoveBgResult,
+    RemoveBgServerError,
+    RemoveBgService,
+    get_removebg_service,
+)
+
+logger = logging.getLogger(__name__)
+
+_async_client: Optional[httpx.AsyncClient] = None
+_async_client_lock = threading.Lock()
+
+
+def _build_async_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=settings.REMOVEBG_HTTP2 and H2_AVAILABLE,
+        timeout=httpx.Timeout(
+            connect=settings.REMOVEBG_CONNECT_TIMEOUT_SECONDS,
+            read=settings.REMOVEBG_TIMEOUT_SECONDS,
+            write=settings.REMOVEBG_WRITE_TIMEOUT_SECONDS,
+            pool=settings.REMOVEBG_POOL_TIMEOUT_SECONDS,
+        ),
+        limits=httpx.Limits(
+            max_connections=settings.REMOVEBG_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.REMOVEBG_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.REMOVEBG_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+    )
+
+
+def get_removebg_async_client() -> httpx.AsyncClient:
+    """Общий AsyncClient (живёт в event loop приложения)."""
+    global _async_client
+
+    if _async_client is None:
+        with _async_client_lock:
+            if _async_client is None:
+                _async_client = _build_async_client()
+    return _async_client
+
+
+async def close_removebg_async_client() -> None:
+    global _async_client, _async_service
+
+    with _async_client_lock:
+        # Семафор сервиса привязан к этому loop — при следующем старте новый
+        client, _async_client = _async_client, None
+        _async_service = None
+    if client is not None:
+        await client.aclose()
+
+
+class AsyncRemoveBgService:
+    """Async-обёртка над RemoveBgService: тот же API, без блокировок."""
+
+    def __init__(
+        self,
+        service: Optional[RemoveBgService] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        max_concurrency: Optional[int] = None,
+    ):
+        self.service = service or get_removebg_service()
+        self._client = client
+        self.max_concurrency = max_concurrency or settings.REMOVEBG_MAX_CONCURRENCY
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self.in_flight = 0
+
+    def is_available(self) -> bool:
+        return self.service.is_available()
+
+    async def _wait_for_capacity(self) -> None:
+        try:
+            delay = self.service.rate_limiter.reserve()
+        except RateLimitExceeded as e:
+            raise RemoveBgRateLimitError(retry_after=math.ceil(e.retry_after))
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def remove_background(self, image_data: bytes) -> RemoveBgResult:
+        """См. RemoveBgService.remove_background — те же результат и исключения."""
+        service = self.service
+        if not service.enabled:
+            return RemoveBgResult(
+                success=False,
+                error_message="Remove.bg service is not configured (missing API key)",
+            )
+
+        attempts = service.max_retries + 1
+        last_error: Optional[str] = None
+
+        for attempt in range(attempts):
+            retry_after: Optional[int] = None
+            await self._wait_for_capacity()
+            try:
+                return await self._do_request(image_data)
+
+            except RemoveBgRateLimitError as e:
+                service.rate_limiter.defer(e.retry_after)
+                if attempt >= service.max_retries:
+                    raise
+                logger.warning(f"[RemoveBg] API rate limited, waiting {e.retry_after}s")
+                continue
+
+            except RemoveBgQuotaError:
+                raise
+
+            except RemoveBgServerError as e:
+                last_error = str(e)
+                retry_after = e.retry_after
+                logger.warning(f"[RemoveBg] Server error on attempt {attempt + 1}/{attempts}")
+
+            except httpx.TimeoutException as e:
+                last_error = f"Timeout after {service.timeout}s: {str(e)}"
+                logger.warning(f"[RemoveBg] Timeout on attempt {attempt + 1}/{attempts}")
+
+            except httpx.TransportError as e:
+                last_error = f"Connection error: {str(e)}"
+                logger.warning(f"[RemoveBg] Connection error on attempt {attempt + 1}/{attempts}")
+
+            if attempt < service.max_retries:
+                backoff = service.backoff_delay(attempt, retry_after)
+                logger.info(f"[RemoveBg] Retrying in {backoff:.1f}s...")
+                await asyncio.sleep(backoff)
+
+        return RemoveBgResult(
+            success=False,
+            error_message=f"Failed after {attempts} attempts. Last error: {last_error}",
+        )
+
+    async def _do_request(self, image_data: bytes) -> RemoveBgResult:
+        client = self._client or get_removebg_async_client()
+        async with self._slots:
+            self.in_flight += 1
+            try:
+                response = await client.post(
+                    self.service.api_url,
+                    **self.service.build_request_kwargs(image_data),
+                )
+            finally:
+                self.in_flight -= 1
+        return self.service.normalize_response(response)
+
+
+_async_service: Optional[AsyncRemoveBgService] = None
+
+
+def get_async_removebg_service() -> AsyncRemoveBgService:
+    global _async_service
+
+    if _async_service is None:
+        service = get_removebg_service()
+        with _async_client_lock:
+            if _async_service is None:
+                _async_service = AsyncRemoveBgService(service=service)
+    return _async_service
+
+
+# ── Мост для синхронного пайплайна ──
+
+_app_loop: Optional[asyncio.AbstractEventLoop] = None
+_pending: Set[Future] = set()
+_pending_lock = threading.Lock()
+
+
+def bind_removebg_loop(loop: asyncio.AbstractEventLoop) -> None:
+    """Event loop приложения, в котором пайплайн выполняет запросы к API."""
+    global _app_loop
+    _app_loop = loop
+
+
+def unbind_removebg_loop() -> None:
+    """
+    Отвязать loop при остановке. Незавершённые вызовы отменяются
+    (asyncio.CancelledError в потоке задачи): задача остаётся под арендой
+    и после её истечения достаётся другому воркеру.
+    """
+    global _app_loop
+    _app_loop = None
+    with _pending_lock:
+        pending = list(_pending)
+    for future in pending:
+        future.cancel()
+
+
+def _on_loop_thread(loop: asyncio.AbstractEventLoop) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
+
+
+class LoopBoundRemoveBgService:
+    """
+    Синхронный фасад Remove.bg для пайплайна обработки.
+
+    Запрос, ожидание лимитера и backoff выполняются в event loop
+    приложения через AsyncRemoveBgService: общий AsyncClient, семафор
+    REMOVEBG_MAX_CONCURRENCY на все задачи процесса, asyncio.sleep вместо
+    time.sleep. Поток задачи ждёт только готовый результат. Без
+    привязанного loop (CLI, тесты без lifespan) — синхронный RemoveBgService.
+    """
+
+    def __init__(self, service: RemoveBgService, async_service: Optional[AsyncRemoveBgService] = None):
+        self.service = service
+        self._async_service = async_service
+
+    def is_available(self) -> bool:
+        return self.service.is_available()
+
+    def request_params(self) -> dict:
+        return self.service.request_params()
+
+    def remove_background(self, image_data: bytes) -> RemoveBgResult:
+        loop = _app_loop
+        if loop is None or loop.is_closed() or _on_loop_thread(loop):
+            return self.service.remove_background(image_data)
+
+        async_service = self._async_service or get_async_removebg_service()
+        future = asyncio.run_coroutine_threadsafe(async_service.remove_background(image_data), loop)
+        with _pending_lock:
+            _pending.add(future)
+        try:
+            return future.result()
+        except CancelledError:
+            # Остановка воркера — не ошибка Remove.bg: попытка не засчитывается
+            # как сбой, задача дождётся истечения аренды
+            raise asyncio.CancelledError()
+        finally:
+            with _pending_lock:
+                _pending.discard(future)
+
+
+_loop_bound_service: Optional[LoopBoundRemoveBgService] = None
+
+
+def get_loop_bound_removebg_service() -> LoopBoundRemoveBgService:
+    global _loop_bound_service
+
+    if _loop_bound_service is None:
+        service = get_removebg_service()
+        with _async_client_lock:
+            if _loop_bound_service is None:
+                _loop_bound_service = LoopBoundRemoveBgService(service)
+    return _loop_bound_service
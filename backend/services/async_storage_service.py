@@ -0,0 +1,92 @@
+"""
+Async-вариант StorageService для async-роутов.
+
+Minio-клиент синхронный: put_object в async-эндпоинте блокирует
+event loop на всё время передачи, и остальные запросы воркера стоят.
+Здесь блокирующие вызовы уходят в отдельный ограниченный пул потоков
+(STORAGE_IO_WORKERS), чтобы loop оставался свободным, а число
+одновременных передач в MinIO — предсказуемым.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import IO, Dict, Iterable, Optional
+
+from core.config import settings
+from services.storage_service import StorageService
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_storage_executor() -> ThreadPoolExecutor:
+    """Общий для процесса пул потоков под I/O хранилища."""
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.STORAGE_IO_WORKERS,
+                    thread_name_prefix="storage-io",
+                )
+    return _executor
+
+
+def shutdown_storage_executor() -> None:
+    global _executor
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+        _executor = None
+
+
+class AsyncStorageService:
+    """Async-обёртка над StorageService."""
+
+    def __init__(self, storage: StorageService):
+        self.storage = storage
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            get_storage_executor(), partial(func, *args, **kwargs)
+        )
+
+    async def upload_fileobj(
+        self,
+        file_obj: IO,
+        filename: str,
+        user_id: int,
+        content_type: str = "application/octet-stream",
+    ) -> str:
+        return await self._run(
+            self.storage.upload_fileobj, file_obj, filename, user_id, content_type=content_type
+        )
+
+    async def upload_bytes(
+        self,
+        data: bytes,
+        filename: str,
+        user_id: int,
+        content_type: str = "application/octet-stream",
+    ) -> str:
+        return await self._run(
+            self.storage.upload_bytes, data, filename, user_id, content_type=content_type
+        )
+
+    async def download_bytes(self, object_name: str) -> bytes:
+        return await self._run(self.storage.download_bytes, object_name)
+
+    async def delete_object(self, object_name: str) -> None:
+        await self._run(self.storage.delete_object, object_name)
+
+    async def get_presigned_urls(
+        self, object_names: Iterable[str], expires: int = 3600
+    ) -> Dict[str, str]:
+        return await self._run(
+            self.storage.get_presigned_urls, list(object_names), expires
+        )
@@ -1,34 +1,29 @@
 import hashlib
-import secrets
-import binascii
+from typing import Optional
 
 from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 
 from models.models import User
 from repositories.user_repository import UserRepository
 from repositories.token_repository import TokenRepository
+from core.config import settings
 from services.jwt_service import create_access_token, create_refresh_token
+from services.password_service import PasswordHasher, get_password_hasher
+from services.principal_cache import invalidate_user
 
 # ── Хеширование паролей ──
 
 
+# Синхронные обёртки над services.password_service (схема и стоимость — из settings)
+
+
 def hash_password(password: str) -> str:
-    salt = secrets.token_hex(16)
-    dk = hashlib.pbkdf2_hmac(
-        "sha256", password.encode("utf-8"), salt.encode("utf-8"), 100_000
-    )
-    return f"{salt}${binascii.hexlify(dk).decode()}"
+    return get_password_hasher().hash(password)
 
 
 def verify_password(password: str, stored: str) -> bool:
-    try:
-        salt, hashed = stored.split("$", 1)
-    except ValueError:
-        return False
-    dk = hashlib.pbkdf2_hmac(
-        "sha256", password.encode("utf-8"), salt.encode("utf-8"), 100_000
-    )
-    return binascii.hexlify(dk).decode() == hashed
+    return get_password_hasher().verify(password, stored)
 
 
 def hash_token(token: str) -> str:
@@ -41,11 +36,36 @@ def hash_token(token: str) -> str:
 class AuthService:
     """Service-слой: регистрация, логин, refresh, logout."""
 
-    def __init__(self, user_repo: UserRepository, token_repo: TokenRepository):
+    def __init__(
+        self,
+        user_repo: UserRepository,
+        token_repo: TokenRepository,
+        hasher: Optional[PasswordHasher] = None,
+    ):
         self.user_repo = user_repo
         self.token_repo = token_repo
+        self.hasher = hasher or get_password_hasher()
 
     def register(self, username: str, email: str, password: str) -> User:
+        self._check_unique(username, email)
+        return self.user_repo.create(
+            username=username,
+            email=email,
+            password_hash=self.hasher.hash(password),
+        )
+
+    async def register_async(self, username: str, email: str, password: str) -> User:
+        """register для async-роута: хеш — в пуле хеширования, БД — в threadpool."""
+        await run_in_threadpool(self._check_unique, username, email)
+        password_hash = await self.hasher.hash_async(password)
+        return await run_in_threadpool(
+            self.user_repo.create,
+            username=username,
+            email=email,
+            password_hash=password_hash,
+        )
+
+    def _check_unique(self, username: str, email: str) -> None:
         if self.user_repo.get_by_email(email):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -56,27 +76,46 @@ class AuthService:
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="User with this username already exists",
             )
-        return self.user_repo.create(
-            username=username,
-            email=email,
-            password_hash=hash_password(password),
-        )
 
     def login(self, email: str, password: str, device_info: str) -> dict:
         user = self.user_repo.get_by_email(email)
-        if not user or not verify_password(password, user.password_hash):
+        valid = self.hasher.verify(password, user.password_hash if user else None)
+        self._check_credentials(user, valid)
+
+        # Устаревшие алгоритм/параметры — пересчитываем, пока пароль известен
+        if self.hasher.needs_rehash(user.password_hash):
+            self.user_repo.update_password_hash(user, self.hasher.hash(password))
+
+        return self._issue_tokens(user, device_info)
+
+    async def login_async(self, email: str, password: str, device_info: str) -> dict:
+        user = await run_in_threadpool(self.user_repo.get_by_email, email)
+        valid = await self.hasher.verify_async(password, user.password_hash if user else None)
+        self._check_credentials(user, valid)
+
+        if self.hasher.needs_rehash(user.password_hash):
+            new_hash = await self.hasher.hash_async(password)
+            await run_in_threadpool(self.user_repo.update_password_hash, user, new_hash)
+
+        return await run_in_threadpool(self._issue_tokens, user, device_info)
+
+    @staticmethod
+    def _check_credentials(user: Optional[User], valid: bool) -> None:
+        if not user or not valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid credentials",
             )
 
-        access_token = create_access_token({"sub": str(user.id)})
+    def _issue_tokens(self, user: User, device_info: str) -> dict:
+        access_token = create_access_token(self._access_claims(user))
         refresh_token = create_refresh_token({"sub": str(user.id)})
 
         self.token_repo.create(
             user_id=user.id,
             token_hash=hash_token(refresh_token),
             device_info=device_info,
+            generation=user.token_version or 0,
         )
 
         return {
@@ -87,7 +126,6 @@ class AuthService:
 
     def refresh(self, raw_refresh_token: str, device_info: str) -> dict:
         from jose import jwt, JWTError
-        from core.config import settings
         from datetime import datetime
 
         try:
@@ -110,8 +148,10 @@ class AuthService:
         if not stored:
             raise HTTPException(status_code=401, detail="Token not found")
 
-        if stored.revoked:
+        if self.token_repo.is_revoked(stored):
+            # Утечка токена: новое поколение гасит и refresh-, и access-токены
             self.token_repo.revoke_all_for_user(stored.user_id)
+            invalidate_user(stored.user_id)
             raise HTTPException(
                 status_code=401,
                 detail="Token reuse detected. All sessions revoked.",
@@ -128,13 +168,14 @@ class AuthService:
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
 
-        new_access = create_access_token({"sub": str(user.id)})
+        new_access = create_access_token(self._access_claims(user))
         new_refresh = create_refresh_token({"sub": str(user.id)})
 
         self.token_repo.create(
             user_id=user.id,
             token_hash=hash_token(new_refresh),
             device_info=device_info,
+            generation=user.token_version or 0,
         )
 
         return {
@@ -143,6 +184,15 @@ class AuthService:
             "token_type": "Bearer",
         }
 
+    @staticmethod
+    def _access_claims(user: User) -> dict:
+        """sub + (опционально) role/ver для авторизации без чтения users."""
+        claims = {"sub": str(user.id)}
+        if settings.AUTH_STATELESS_CLAIMS:
+            claims["role"] = user.role
+            claims["ver"] = user.token_version or 0
+        return claims
+
     def logout(self, raw_refresh_token: str, user_id: int) -> None:
         stored = self.token_repo.get_by_hash(hash_token(raw_refresh_token))
         if stored and stored.user_id == user_id:
@@ -0,0 +1,57 @@
+"""
+Удаление фона в уменьшенном размере с наложением маски на оригинал.
+
+Раньше в Remove.bg уходило полноразмерное обработанное изображение:
+десятки мегабайт PNG для больших фото, долгая загрузка и долгий ответ.
+Теперь:
+- в API уходит копия не больше REMOVEBG_UPLOAD_MAX_SIDE по длинной
+  стороне (JPEG — альфа на входе не нужна);
+- с REMOVEBG_CHANNELS=alpha API возвращает только маску (grayscale PNG),
+  а не RGBA-картинку — ответ тоже меньше;
+- маска растягивается до размера оригинала и накладывается на
+  полноразмерное локальное изображение — результат в полном разрешении.
+
+Если бэкенд вернул RGBA (локальная модель, channels=rgba), маской
+служит его альфа-канал — контракт один для всех бэкендов.
+"""
+
+import io
+from typing import Tuple
+
+from PIL import Image
+
+UPLOAD_JPEG_QUALITY = 90
+
+
+def prepare_upload(image: Image.Image, original: bytes, max_side: int) -> Tuple[bytes, bool]:
+    """
+    Байты для отправки в API и признак, что картинка уменьшена.
+    max_side=0 или картинка уже меньше лимита — отправляем оригинал.
+    """
+    if max_side <= 0 or max(image.size) <= max_side:
+        return original, False
+
+    small = image.convert("RGB")
+    small.thumbnail((max_side, max_side), Image.LANCZOS)
+    buf = io.BytesIO()
+    small.save(buf, format="JPEG", quality=UPLOAD_JPEG_QUALITY)
+    return buf.getvalue(), True
+
+
+def extract_matte(result_data: bytes) -> Image.Image:
+    """Маска из ответа: альфа-канал RGBA или сама grayscale-картинка."""
+    result = Image.open(io.BytesIO(result_data))
+    if result.mode in ("RGBA", "LA") or "transparency" in result.info:
+        return result.convert("RGBA").getchannel("A")
+    return result.convert("L")
+
+
+def apply_matte(image: Image.Image, matte: Image.Image) -> bytes:
+    """Маска в размере оригинала как альфа-канал полноразмерного изображения → PNG."""
+    if matte.size != image.size:
+        matte = matte.resize(image.size, Image.BILINEAR)
+    output = image.convert("RGBA")
+    output.putalpha(matte)
+    buf = io.BytesIO()
+    output.save(buf, format="PNG")
+    return buf.getvalue()
@@ -0,0 +1,220 @@
+"""
+Долговечная очередь обработки: таблица processing_jobs + аренда.
+
+Раньше обработка жила только в BackgroundTasks воркера: рестарт или
+деплой терял задачу, и MediaItem навсегда оставался processed=False.
+Теперь:
+- загрузка сначала пишет задачу в БД, потом BackgroundTask сразу же
+  её исполняет — быстрый путь не изменился;
+- исполнитель берёт задачу под аренду (PROCESSING_JOB_LEASE_SECONDS)
+  и продлевает её на каждом этапе; аренда истекла — исполнитель умер,
+  задачу забирает фоновый цикл восстановления любого воркера;
+- ошибка — повтор с jittered exponential backoff, после
+  PROCESSING_JOB_MAX_ATTEMPTS попыток — failed с последней ошибкой;
+  попытка, на которой исполнитель умер, тоже считается: задача,
+  брошенная после последней попытки, не перезапускается, а получает failed;
+- гарантия at-least-once: обработчик идемпотентен (уже обработанный
+  файл не обрабатывается повторно, удалённый — пропускается).
+
+Запуск вручную (разобрать просроченные и отложенные задачи):
+    python -m services.job_queue
+"""
+
+import os
+import uuid
+import socket
+import random
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from repositories.job_repository import JobRepository
+
+logger = logging.getLogger(__name__)
+
+# Идентификатор исполнителя: хост, процесс и запуск
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaseLost(Exception):
+    """Аренду забрал другой исполнитель — эту попытку надо бросить."""
+
+
+class JobRunner:
+    """
+    Захват и исполнение задач processing_jobs.
+
+    handler(media_id, remove_bg, heartbeat) делает работу и бросает
+    исключение при ошибке; heartbeat() продлевает аренду (LeaseLost,
+    если её уже забрали). on_failure(media_id, error, final) — отразить
+    ошибку в MediaItem (повтор будет или нет).
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[int, bool, Callable[[], None]], None],
+        session_factory: Callable[[], Session],
+        on_failure: Optional[Callable[[int, str, bool], None]] = None,
+        owner: str = WORKER_ID,
+        lease_seconds: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        backoff_base: Optional[float] = None,
+        backoff_max: Optional[float] = None,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ):
+        self.handler = handler
+        self.session_factory = session_factory
+        self.on_failure = on_failure
+        self.owner = owner
+        self.lease = timedelta(seconds=lease_seconds or settings.PROCESSING_JOB_LEASE_SECONDS)
+        self.max_attempts = max_attempts or settings.PROCESSING_JOB_MAX_ATTEMPTS
+        self.backoff_base = backoff_base or settings.PROCESSING_JOB_BACKOFF_BASE_SECONDS
+        self.backoff_max = backoff_max or settings.PROCESSING_JOB_BACKOFF_MAX_SECONDS
+        self._clock = clock
+
+    def backoff_delay(self, attempts: int) -> float:
+        """Как у Remove.bg: половина шага фиксирована, половина случайна."""
+        step = min(self.backoff_max, self.backoff_base * 2 ** max(0, attempts - 1))
+        return step / 2 + random.uniform(0, step / 2)
+
+    def enqueue(self, media_id: int, remove_bg: bool) -> int:
+        db = self.session_factory()
+        try:
+            return JobRepository(db).enqueue(media_id, remove_bg, self._clock()).id
+        finally:
+            db.close()
+
+    def run_for_media(self, media_id: int, remove_bg: bool = False) -> Optional[str]:
+        """
+        Исполнить задачу файла (быстрый путь после загрузки). Нет задачи —
+        ставим; задачу уже держит другой исполнитель — ничего не делаем.
+        """
+        db = self.session_factory()
+        try:
+            job = JobRepository(db).get_by_media(media_id)
+            job_id = job.id if job is not None else None
+        finally:
+            db.close()
+        if job_id is None:
+            job_id = self.enqueue(media_id, remove_bg)
+        return self.run_job(job_id)
+
+    def run_due(self, limit: Optional[int] = None) -> int:
+        """Разобрать отложенные и брошенные задачи; вернуть число исполненных."""
+        limit = limit or settings.PROCESSING_JOB_BATCH_SIZE
+        db = self.session_factory()
+        try:
+            repo = JobRepository(db)
+            self._fail_exhausted(repo, limit)
+            job_ids = repo.due_ids(self._clock(), limit, self.max_attempts)
+        finally:
+            db.close()
+
+        executed = 0
+        for job_id in job_ids:
+            if self.run_job(job_id) is not None:
+                executed += 1
+        return executed
+
+    def run_job(self, job_id: int) -> Optional[str]:
+        """Захватить и исполнить; итог: done | retry | failed | lost, None — не захвачена."""
+        db = self.session_factory()
+        try:
+            repo = JobRepository(db)
+            now = self._clock()
+            if not repo.claim(job_id, self.owner, now, now + self.lease, self.max_attempts):
+                return None
+            job = repo.get(job_id)
+            media_id, remove_bg, attempts = job.media_id, job.remove_bg, job.attempts
+
+            def heartbeat() -> None:
+                if not repo.extend_lease(job_id, self.owner, self._clock() + self.lease):
+                    raise LeaseLost(f"Job #{job_id} was taken over by another worker")
+
+            try:
+                self.handler(media_id, remove_bg, heartbeat)
+            except LeaseLost as e:
+                db.rollback()
+                logger.warning(f"[JOBS] {e}")
+                return "lost"
+            except Exception as e:
+                db.rollback()
+                return self._record_failure(repo, job_id, media_id, attempts, str(e) or type(e).__name__)
+
+            repo.finish(job_id, self.owner, "done", self._clock())
+            return "done"
+        finally:
+            db.close()
+
+    def _fail_exhausted(self, repo: JobRepository, limit: int) -> None:
+        """Брошенные на последней попытке — failed, без ещё одного запуска."""
+        for job_id in repo.exhausted_ids(self._clock(), limit, self.max_attempts):
+            job = repo.get(job_id)
+            media_id, attempts = job.media_id, job.attempts
+            error = f"Processing was interrupted {attempts} times (worker crashed or restarted)"
+            if not repo.fail_exhausted(job_id, self._clock(), self.max_attempts, error):
+                continue
+            logger.error(f"[JOBS] Media #{media_id} failed: {error}")
+            if self.on_failure is not None:
+                self.on_failure(media_id, error, True)
+
+    def _record_failure(self, repo: JobRepository, job_id: int, media_id: int, attempts: int, error: str) -> str:
+        final = attempts >= self.max_attempts
+        now = self._clock()
+        if final:
+            owned = repo.finish(job_id, self.owner, "failed", now, error=error)
+            logger.error(f"[JOBS] Media #{media_id} failed after {attempts} attempts: {error}")
+        else:
+            delay = self.backoff_delay(attempts)
+            owned = repo.finish(
+                job_id, self.owner, "pending", now, error=error, run_after=now + timedelta(seconds=delay)
+            )
+            logger.warning(
+                f"[JOBS] Media #{media_id} attempt {attempts}/{self.max_attempts} failed: {error}. "
+                f"Retrying in {delay:.0f}s"
+            )
+        if not owned:
+            return "lost"
+        if self.on_failure is not None:
+            self.on_failure(media_id, error, final)
+        return "failed" if final else "retry"
+
+
+# ── Фоновое восстановление ──
+
+
+async def run_job_recovery(runner_factory: Callable[[], JobRunner], interval_seconds: float) -> None:
+    """Фоновый цикл: ошибка одного прогона не останавливает следующие."""
+    while True:
+        try:
+            executed = await run_in_threadpool(lambda: runner_factory().run_due())
+            if executed:
+                logger.info(f"[JOBS] Recovered {executed} processing jobs")
+        except Exception as e:
+            logger.warning(f"[JOBS] Job recovery failed: {e}")
+        await asyncio.sleep(interval_seconds)
+
+
+def start_job_recovery(runner_factory: Callable[[], JobRunner]) -> Optional[asyncio.Task]:
+    if settings.PROCESSING_JOB_POLL_SECONDS <= 0:
+        return None
+    return asyncio.create_task(
+        run_job_recovery(runner_factory, settings.PROCESSING_JOB_POLL_SECONDS)
+    )
+
+
+def main() -> int:
+    from services.processing_service import get_job_runner
+
+    logging.basicConfig(level=logging.INFO)
+    print(get_job_runner().run_due())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
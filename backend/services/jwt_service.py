@@ -7,6 +7,10 @@ from jose import jwt
 from core.config import settings
 
 
+# Необязательные claims авторизации: role и версия токенов пользователя
+AUTHZ_CLAIMS = ("role", "ver")
+
+
 def create_access_token(data: dict, expires_minutes: Optional[int] = None) -> str:
     expires_minutes = expires_minutes or settings.ACCESS_TOKEN_EXPIRE_MINUTES
     now = datetime.utcnow()
@@ -17,6 +21,9 @@ def create_access_token(data: dict, expires_minutes: Optional[int] = None) -> st
         "iat": now,
         "exp": now + timedelta(minutes=expires_minutes),
     }
+    for claim in AUTHZ_CLAIMS:
+        if data.get(claim) is not None:
+            payload[claim] = data[claim]
     return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
 
 
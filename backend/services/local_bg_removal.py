@@ -0,0 +1,195 @@
+"""
+Локальное удаление фона: сегментационная модель (U²-Net / MODNet)
+через ONNX Runtime на CPU — без сети и без кредитов Remove.bg.
+
+Тот же контракт, что у RemoveBgService: is_available(),
+remove_background(bytes) → RemoveBgResult (PNG с альфа-каналом).
+
+Выбор бэкенда (BG_REMOVAL_BACKEND):
+- "api"   — Remove.bg; при BG_REMOVAL_LOCAL_FALLBACK и доступной
+            локальной модели квота (402) и rate limit (429) не роняют
+            задачу — её досчитывает локальная модель;
+- "local" — только локальная модель.
+
+Модель загружается один раз на процесс. Если onnxruntime не
+установлен или файла модели нет — локальный бэкенд недоступен,
+и всё работает как раньше.
+"""
+
+import io
+import os
+import logging
+import threading
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+from core.config import settings
+from services.removebg_service import (
+    RemoveBgQuotaError,
+    RemoveBgRateLimitError,
+    RemoveBgResult,
+)
+from services.async_removebg_service import LoopBoundRemoveBgService, get_loop_bound_removebg_service
+
+try:
+    import onnxruntime as ort
+
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Нормализация ImageNet — на ней обучены U²-Net и MODNet
+_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _load_session(model_path: str):
+    """InferenceSession один раз на процесс (CPU, потоки — из настроек)."""
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                options = ort.SessionOptions()
+                options.intra_op_num_threads = settings.BG_REMOVAL_LOCAL_THREADS
+                _session = ort.InferenceSession(
+                    model_path,
+                    sess_options=options,
+                    providers=["CPUExecutionProvider"],
+                )
+                logger.info(f"[LocalBg] Model loaded: {model_path}")
+    return _session
+
+
+class LocalBgRemovalService:
+    """Удаление фона локальной моделью сегментации."""
+
+    source = "local"
+    # Локальный результат ничего не стоит — кэшировать его незачем
+    cacheable = False
+
+    def __init__(
+        self,
+        model_path: Optional[str] = None,
+        input_size: Optional[int] = None,
+        session=None,
+    ):
+        self.model_path = model_path or settings.BG_REMOVAL_LOCAL_MODEL_PATH
+        self.input_size = input_size or settings.BG_REMOVAL_LOCAL_INPUT_SIZE
+        self._session = session
+
+    def is_available(self) -> bool:
+        if self._session is not None:
+            return True
+        return ONNX_AVAILABLE and os.path.exists(self.model_path)
+
+    def request_params(self) -> dict:
+        return {
+            "backend": self.source,
+            "model": os.path.basename(self.model_path),
+            "input_size": self.input_size,
+        }
+
+    def _get_session(self):
+        return self._session or _load_session(self.model_path)
+
+    def _predict_mask(self, image: Image.Image) -> np.ndarray:
+        """Маска переднего плана 0..1 в размере входной картинки модели."""
+        resized = image.resize((self.input_size, self.input_size), Image.BILINEAR)
+        tensor = (np.asarray(resized, dtype=np.float32) / 255.0 - _MEAN) / _STD
+        tensor = tensor.transpose(2, 0, 1)[np.newaxis].astype(np.float32)
+
+        session = self._get_session()
+        input_name = session.get_inputs()[0].name
+        # U²-Net отдаёт несколько карт, первая — итоговая
+        mask = np.asarray(session.run(None, {input_name: tensor})[0]).squeeze()
+
+        low, high = float(mask.min()), float(mask.max())
+        if high - low > 1e-6:
+            mask = (mask - low) / (high - low)
+        return np.clip(mask, 0.0, 1.0)
+
+    def remove_background(self, image_data: bytes) -> RemoveBgResult:
+        if not self.is_available():
+            return RemoveBgResult(
+                success=False,
+                error_message="Local background removal model is not available",
+                source=self.source,
+            )
+
+        try:
+            image = Image.open(io.BytesIO(image_data)).convert("RGB")
+            mask = self._predict_mask(image)
+
+            alpha = Image.fromarray((mask * 255).astype(np.uint8), mode="L")
+            alpha = alpha.resize(image.size, Image.BILINEAR)
+            output = image.convert("RGBA")
+            output.putalpha(alpha)
+
+            buf = io.BytesIO()
+            output.save(buf, format="PNG")
+        except Exception as e:
+            logger.error(f"[LocalBg] Segmentation failed: {e}", exc_info=True)
+            return RemoveBgResult(
+                success=False,
+                error_message=f"Local background removal failed: {e}",
+                source=self.source,
+            )
+
+        return RemoveBgResult(
+            success=True,
+            image_data=buf.getvalue(),
+            image_width=image.width,
+            image_height=image.height,
+            source=self.source,
+        )
+
+
+class FallbackBgRemover:
+    """
+    Remove.bg, а при исчерпанной квоте или rate limit — локальная модель.
+    Ключ кэша — как у Remove.bg; в кэш попадают только его результаты
+    (RemoveBgResult.source), локальные не подменяют платные.
+    """
+
+    cacheable = True
+
+    def __init__(self, primary: LoopBoundRemoveBgService, fallback: LocalBgRemovalService):
+        self.primary = primary
+        self.fallback = fallback
+
+    def is_available(self) -> bool:
+        return self.primary.is_available() or self.fallback.is_available()
+
+    def request_params(self) -> dict:
+        return self.primary.request_params()
+
+    def remove_background(self, image_data: bytes) -> RemoveBgResult:
+        if not self.primary.is_available():
+            return self.fallback.remove_background(image_data)
+        try:
+            return self.primary.remove_background(image_data)
+        except (RemoveBgQuotaError, RemoveBgRateLimitError) as e:
+            logger.warning(f"[LocalBg] Remove.bg unavailable ({e}), falling back to local model")
+            return self.fallback.remove_background(image_data)
+
+
+def get_background_remover():
+    """Бэкенд удаления фона по BG_REMOVAL_BACKEND (с fallback, если включён)."""
+    if settings.BG_REMOVAL_BACKEND == "local":
+        return LocalBgRemovalService()
+
+    # Remove.bg из потока задачи — через async-клиент в loop приложения
+    api = get_loop_bound_removebg_service()
+    if settings.BG_REMOVAL_LOCAL_FALLBACK:
+        local = LocalBgRemovalService()
+        if local.is_available():
+            return FallbackBgRemover(api, local)
+    return api
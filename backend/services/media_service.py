@@ -1,14 +1,26 @@
 import math
-from typing import List, Optional, Tuple
+import json
+import base64
+import logging
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 
 from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
 
 from core.config import settings
 from models.models import MediaItem, User
-from models.schemas import MediaResponse, PaginatedMediaResponse
+from models.schemas import (
+    BulkDeleteResponse,
+    MediaResponse,
+    MediaStatusResponse,
+    PaginatedMediaResponse,
+)
 from repositories.media_repository import MediaRepository
 from services.storage_service import StorageService
+from services.async_storage_service import AsyncStorageService
+
+logger = logging.getLogger(__name__)
 
 # ── Ограничения ──
 MAX_FILE_SIZE = settings.MAX_FILE_SIZE_MB * 1024 * 1024
@@ -23,26 +35,94 @@ ALLOWED_CONTENT_TYPES = {
     "video/quicktime",
 }
 
-ALLOWED_SORT_FIELDS = {"created_at", "original_filename", "file_size", "id"}
+ALLOWED_SORT_FIELDS = {"created_at", "original_filename", "file_size", "id", "relevance"}
 ALLOWED_SORT_ORDERS = {"asc", "desc"}
 ALLOWED_FILE_TYPES = {"image", "video"}
+MAX_BULK_DELETE_IDS = 1000
+
+
+# ── Курсор keyset-пагинации ──
+# Непрозрачный для клиента токен: base64url(JSON) с ключом последней
+# строки страницы и параметрами сортировки, под которые он выдан.
+
+
+def _encode_cursor(item: MediaItem, sort_by: str, sort_order: str) -> str:
+    value = getattr(item, sort_by)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = {"s": sort_by, "o": sort_order, "v": value, "id": item.id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort_by: str, sort_order: str) -> Tuple[Any, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        value, last_id = payload["v"], int(payload["id"])
+        if sort_by == "created_at" and value is not None:
+            value = datetime.fromisoformat(value)
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if payload.get("s") != sort_by or payload.get("o") != sort_order:
+        raise HTTPException(
+            status_code=400,
+            detail="Cursor does not match sort_by/sort_order",
+        )
+    return value, last_id
+
+
+def purge_media_objects(
+    object_names: List[str], storage: Optional[StorageService] = None
+) -> List[Tuple[str, str]]:
+    """
+    Удалить объекты уже удалённых записей (фоновая задача).
+    Неудачи логируются; оставшиеся сироты подберёт сборщик мусора.
+    """
+    if not object_names:
+        return []
+
+    storage = storage or StorageService()
+    failures = storage.delete_objects(object_names)
+    for name, error in failures:
+        logger.warning(f"[MEDIA] Failed to delete object {name}: {error}")
+    if failures:
+        logger.warning(
+            f"[MEDIA] {len(failures)}/{len(object_names)} objects were not deleted"
+        )
+    return failures
 
 
 class MediaService:
     """Бизнес-логика работы с медиа."""
 
-    def __init__(self, media_repo: MediaRepository, storage: StorageService):
+    def __init__(
+        self,
+        media_repo: MediaRepository,
+        storage: StorageService,
+        async_storage: Optional[AsyncStorageService] = None,
+    ):
         self.media_repo = media_repo
         self.storage = storage
+        self.async_storage = async_storage or AsyncStorageService(storage)
 
     # ── Построение ответа с presigned URL ──
 
-    def _build_response(self, item: MediaItem) -> MediaResponse:
-        original_url = self.storage.get_presigned_url(item.original_object_name)
+    def _build_response(
+        self, item: MediaItem, urls: Optional[Dict[str, str]] = None
+    ) -> MediaResponse:
+        if urls is None:
+            urls = self._sign_urls([item])
+        original_url = urls[item.original_object_name]
         processed_url = (
-            self.storage.get_presigned_url(item.processed_object_name)
-            if item.processed_object_name
-            else None
+            urls[item.processed_object_name] if item.processed_object_name else None
+        )
+        thumbnail_url = (
+            urls[item.thumbnail_object_name] if item.thumbnail_object_name else None
+        )
+        preview_url = (
+            urls[item.preview_object_name] if item.preview_object_name else None
         )
         return MediaResponse(
             id=item.id,
@@ -59,8 +139,31 @@ class MediaService:
             updated_at=item.updated_at,
             # ═══ ИСПРАВЛЕНИЕ: передаём bg_removed в ответ ═══
             bg_removed=bool(item.bg_removed) if item.bg_removed is not None else False,
+            thumbnail_url=thumbnail_url,
+            preview_url=preview_url,
+            processing_status=item.processing_status,
         )
 
+    def _build_responses(self, items: List[MediaItem]) -> List[MediaResponse]:
+        urls = self._sign_urls(items)
+        return [self._build_response(i, urls) for i in items]
+
+    def _sign_urls(self, items: List[MediaItem]) -> Dict[str, str]:
+        """Одна пакетная подпись на всю страницу вместо 2 вызовов на элемент."""
+        names = []
+        for item in items:
+            names.append(item.original_object_name)
+            names.extend(
+                name
+                for name in (
+                    item.processed_object_name,
+                    item.thumbnail_object_name,
+                    item.preview_object_name,
+                )
+                if name
+            )
+        return self.storage.get_presigned_urls(names)
+
     # ── Список (без фильтров — обратная совместимость) ──
 
     def list_media(self, current_user: User) -> List[MediaResponse]:
@@ -68,7 +171,7 @@ class MediaService:
             items = self.media_repo.get_all()
         else:
             items = self.media_repo.get_by_user(current_user.id)
-        return [self._build_response(i) for i in items]
+        return self._build_responses(items)
 
     # ── Список с фильтрацией, сортировкой, пагинацией ──
 
@@ -84,6 +187,8 @@ class MediaService:
         sort_order: str = "desc",
         page: int = 1,
         page_size: int = 10,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
     ) -> PaginatedMediaResponse:
         if sort_by not in ALLOWED_SORT_FIELDS:
             raise HTTPException(
@@ -105,9 +210,19 @@ class MediaService:
         if page_size < 1 or page_size > 100:
             raise HTTPException(status_code=400, detail="page_size must be 1..100")
 
+        # Ранг не хранится в строке — keyset по нему не построить
+        relevance = sort_by == "relevance"
+        if relevance and cursor:
+            raise HTTPException(
+                status_code=400,
+                detail="Cursor pagination is not supported for relevance sort",
+            )
+
+        after = _decode_cursor(cursor, sort_by, sort_order) if cursor else None
+
         user_id = None if current_user.role == "admin" else current_user.id
 
-        items, total = self.media_repo.get_filtered(
+        items, total, has_more = self.media_repo.get_filtered(
             user_id=user_id,
             search=search,
             processed=processed,
@@ -118,16 +233,27 @@ class MediaService:
             sort_order=sort_order,
             page=page,
             page_size=page_size,
+            after=after,
+            include_total=include_total,
         )
 
-        pages = math.ceil(total / page_size) if total > 0 else 0
+        pages = None
+        if total is not None:
+            pages = math.ceil(total / page_size) if total > 0 else 0
+
+        next_cursor = (
+            _encode_cursor(items[-1], sort_by, sort_order)
+            if has_more and items and not relevance
+            else None
+        )
 
         return PaginatedMediaResponse(
-            items=[self._build_response(i) for i in items],
+            items=self._build_responses(items),
             total=total,
             page=page,
             page_size=page_size,
             pages=pages,
+            next_cursor=next_cursor,
         )
 
     # ── Просмотр одного файла ──
@@ -136,6 +262,17 @@ class MediaService:
         item = self._get_and_check_access(media_id, current_user)
         return self._build_response(item)
 
+    def get_status(self, media_id: int, current_user: User) -> MediaStatusResponse:
+        """Этап обработки — без подписи URL, для частого опроса."""
+        item = self._get_and_check_access(media_id, current_user)
+        return MediaStatusResponse(
+            id=item.id,
+            status=item.processing_status,
+            processed=item.processed,
+            bg_removed=bool(item.bg_removed),
+            error=item.processing_error,
+        )
+
     # ── Загрузка файла ──
 
     def upload(
@@ -146,26 +283,46 @@ class MediaService:
         file_size: int,
         user_id: int,
         description: str = None,
+        remove_bg: Optional[bool] = None,
     ) -> Tuple[MediaItem, MediaResponse]:
-        if content_type not in ALLOWED_CONTENT_TYPES:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Unsupported file type: {content_type}. "
-                f"Allowed: {', '.join(sorted(ALLOWED_CONTENT_TYPES))}",
-            )
+        file_type_cat = self._validate_upload(content_type, file_size)
 
-        if file_size > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=400,
-                detail=f"File too large ({file_size} bytes). "
-                f"Maximum: {settings.MAX_FILE_SIZE_MB} MB",
-            )
+        object_name = self.storage.upload_fileobj(
+            file_obj, filename, user_id, content_type=content_type
+        )
 
-        file_type_cat = "image" if content_type.startswith("image/") else "video"
+        item = self.media_repo.create(
+            user_id=user_id,
+            original_object_name=object_name,
+            original_filename=filename,
+            description=description,
+            file_type=file_type_cat,
+            file_size=file_size,
+            content_type=content_type,
+            remove_bg=remove_bg,
+        )
 
-        object_name = self.storage.upload_fileobj(file_obj, filename, user_id)
+        return item, self._build_response(item)
 
-        item = self.media_repo.create(
+    async def upload_async(
+        self,
+        file_obj,
+        filename: str,
+        content_type: str,
+        file_size: int,
+        user_id: int,
+        description: str = None,
+        remove_bg: Optional[bool] = None,
+    ) -> Tuple[MediaItem, MediaResponse]:
+        """То же, что upload, но не блокирует event loop на передаче в MinIO."""
+        file_type_cat = self._validate_upload(content_type, file_size)
+
+        object_name = await self.async_storage.upload_fileobj(
+            file_obj, filename, user_id, content_type=content_type
+        )
+
+        item = await run_in_threadpool(
+            self.media_repo.create,
             user_id=user_id,
             original_object_name=object_name,
             original_filename=filename,
@@ -173,10 +330,30 @@ class MediaService:
             file_type=file_type_cat,
             file_size=file_size,
             content_type=content_type,
+            remove_bg=remove_bg,
         )
 
         return item, self._build_response(item)
 
+    @staticmethod
+    def _validate_upload(content_type: str, file_size: int) -> str:
+        """Проверить тип и размер файла, вернуть категорию (image | video)."""
+        if content_type not in ALLOWED_CONTENT_TYPES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported file type: {content_type}. "
+                f"Allowed: {', '.join(sorted(ALLOWED_CONTENT_TYPES))}",
+            )
+
+        if file_size > MAX_FILE_SIZE:
+            raise HTTPException(
+                status_code=400,
+                detail=f"File too large ({file_size} bytes). "
+                f"Maximum: {settings.MAX_FILE_SIZE_MB} MB",
+            )
+
+        return "image" if content_type.startswith("image/") else "video"
+
     # ── Обновление описания (PATCH) ──
 
     def update_media(
@@ -201,15 +378,93 @@ class MediaService:
     def delete_media(self, media_id: int, current_user: User) -> None:
         item = self._get_and_check_access(media_id, current_user)
 
-        for obj_name in (item.original_object_name, item.processed_object_name):
+        for obj_name in (
+            item.original_object_name,
+            item.processed_object_name,
+            item.thumbnail_object_name,
+            item.preview_object_name,
+        ):
             if obj_name:
                 try:
                     self.storage.delete_object(obj_name)
-                except Exception:
-                    pass
+                except Exception as e:
+                    logger.warning(f"[MEDIA] Failed to delete object {obj_name}: {e}")
 
         self.media_repo.delete(item)
 
+    # ── Массовое удаление ──
+
+    def bulk_delete(
+        self,
+        current_user: User,
+        ids: Optional[List[int]] = None,
+        search: Optional[str] = None,
+        processed: Optional[bool] = None,
+        file_type: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+    ) -> Tuple[BulkDeleteResponse, List[str]]:
+        """
+        Удалить записи одним DELETE (на пачку id).
+        Возвращает (отчёт, имена объектов для удаления из хранилища).
+        """
+        has_filter = bool(search) or any(
+            value is not None for value in (processed, file_type, date_from, date_to)
+        )
+        if ids is None and not has_filter:
+            raise HTTPException(
+                status_code=400,
+                detail="Provide ids or at least one filter",
+            )
+        if ids is not None and has_filter:
+            raise HTTPException(
+                status_code=400,
+                detail="Use either ids or filters, not both",
+            )
+        if ids is not None and len(ids) > MAX_BULK_DELETE_IDS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many ids. Maximum: {MAX_BULK_DELETE_IDS}",
+            )
+        if file_type and file_type not in ALLOWED_FILE_TYPES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid file_type. Allowed: {', '.join(sorted(ALLOWED_FILE_TYPES))}",
+            )
+
+        owner_id = None if current_user.role == "admin" else current_user.id
+
+        if ids is not None:
+            items = self.media_repo.get_by_ids(ids)
+            target_ids = sorted(
+                item.id
+                for item in items
+                if owner_id is None or item.user_id == owner_id
+            )
+            # Чужие и несуществующие id не различаем — не раскрываем чужие записи
+            skipped_ids = sorted(set(ids) - set(target_ids))
+        else:
+            target_ids = self.media_repo.get_ids_filtered(
+                user_id=owner_id,
+                search=search,
+                processed=processed,
+                file_type=file_type,
+                date_from=date_from,
+                date_to=date_to,
+            )
+            skipped_ids = []
+
+        object_names = self.media_repo.get_object_names(target_ids)
+        deleted = self.media_repo.delete_by_ids(target_ids)
+
+        report = BulkDeleteResponse(
+            deleted=deleted,
+            deleted_ids=target_ids,
+            skipped_ids=skipped_ids,
+            objects_scheduled=len(object_names),
+        )
+        return report, object_names
+
     # ── Скачивание ──
 
     def get_download_info(self, media_id: int, current_user: User) -> tuple:
@@ -0,0 +1,145 @@
+"""
+Разбор и сборка строк хешей паролей (PHC-подобный формат).
+
+Поддерживаемые алгоритмы и версии:
+    $argon2id$v=19$m=19456,t=2,p=1$<salt>$<hash>   argon2id / argon2i / argon2d
+    $argon2i$m=4096,t=3,p=1$<salt>$<hash>          argon2 v1.0 (v=16, без поля v)
+    $scrypt$ln=15,r=8,p=1$<salt>$<hash>
+    $pbkdf2-sha256$i=600000$<salt>$<hash>          также pbkdf2-sha512
+    <salt_text>$<hash_hex>                         legacy: PBKDF2-SHA256, 100 000 итераций
+
+salt/hash — base64 без паддинга; разбор возвращает сырые байты,
+поэтому проверка сравнивает digest-ы напрямую, без hex/base64 на
+каждом логине.
+"""
+
+import base64
+import binascii
+from typing import Dict, Optional
+
+ARGON2_ALGORITHMS = ("argon2id", "argon2i", "argon2d")
+PBKDF2_ALGORITHMS = ("pbkdf2-sha256", "pbkdf2-sha512")
+ALGORITHMS = ARGON2_ALGORITHMS + PBKDF2_ALGORITHMS + ("scrypt",)
+
+ARGON2_VERSION = 19
+ARGON2_LEGACY_VERSION = 16
+LEGACY_ITERATIONS = 100_000
+
+# Обязательные параметры каждого алгоритма (все целые)
+REQUIRED_PARAMS = {
+    "argon2": ("m", "t", "p"),
+    "scrypt": ("ln", "r", "p"),
+    "pbkdf2": ("i",),
+}
+
+
+class ParsedHash:
+    """Разобранный хеш: алгоритм, версия, параметры, соль и digest в байтах."""
+
+    __slots__ = ("algorithm", "version", "params", "salt", "digest", "legacy")
+
+    def __init__(
+        self,
+        algorithm: str,
+        params: Dict[str, int],
+        salt: bytes,
+        digest: bytes,
+        version: Optional[int] = None,
+        legacy: bool = False,
+    ):
+        self.algorithm = algorithm
+        self.version = version
+        self.params = params
+        self.salt = salt
+        self.digest = digest
+        self.legacy = legacy
+
+    @property
+    def family(self) -> str:
+        if self.algorithm in ARGON2_ALGORITHMS:
+            return "argon2"
+        if self.algorithm in PBKDF2_ALGORITHMS:
+            return "pbkdf2"
+        return self.algorithm
+
+
+def b64encode(raw: bytes) -> str:
+    return base64.b64encode(raw).decode("ascii").rstrip("=")
+
+
+def b64decode(text: str) -> bytes:
+    return base64.b64decode(text + "=" * (-len(text) % 4), validate=True)
+
+
+def _parse_params(text: str) -> Dict[str, int]:
+    params = {}
+    for item in text.split(","):
+        key, value = item.split("=", 1)
+        params[key] = int(value)
+    return params
+
+
+def parse_hash(stored: str) -> ParsedHash:
+    """Разобрать строку хеша; ValueError на любом нераспознанном формате."""
+    if not stored:
+        raise ValueError("Empty password hash")
+
+    if not stored.startswith("$"):
+        salt, sep, hashed = stored.partition("$")
+        if not sep or not salt or not hashed:
+            raise ValueError("Unrecognized password hash format")
+        try:
+            digest = bytes.fromhex(hashed)
+        except ValueError:
+            raise ValueError("Legacy hash is not hex")
+        return ParsedHash(
+            algorithm="pbkdf2-sha256",
+            params={"i": LEGACY_ITERATIONS},
+            # В legacy-формате солью служит сам hex-текст, а не его байты
+            salt=salt.encode("utf-8"),
+            digest=digest,
+            legacy=True,
+        )
+
+    parts = stored.split("$")
+    algorithm = parts[1] if len(parts) > 1 else ""
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unsupported password hash algorithm '{algorithm}'")
+
+    version = None
+    fields = parts[2:]
+    if algorithm in ARGON2_ALGORITHMS:
+        if fields and fields[0].startswith("v="):
+            version = int(fields[0][2:])
+            fields = fields[1:]
+        else:
+            version = ARGON2_LEGACY_VERSION
+    if len(fields) != 3:
+        raise ValueError("Malformed password hash")
+
+    params_text, salt_text, digest_text = fields
+    params = _parse_params(params_text)
+    try:
+        salt, digest = b64decode(salt_text), b64decode(digest_text)
+    except (binascii.Error, ValueError):
+        raise ValueError("Malformed base64 in password hash")
+
+    parsed = ParsedHash(algorithm, params, salt, digest, version=version)
+    missing = [key for key in REQUIRED_PARAMS[parsed.family] if key not in params]
+    if missing or not salt or not digest:
+        raise ValueError("Incomplete password hash parameters")
+    return parsed
+
+
+def format_hash(
+    algorithm: str,
+    params: Dict[str, int],
+    salt: bytes,
+    digest: bytes,
+    version: Optional[int] = None,
+) -> str:
+    head = f"${algorithm}$"
+    if version is not None:
+        head += f"v={version}$"
+    params_text = ",".join(f"{key}={value}" for key, value in params.items())
+    return f"{head}{params_text}${b64encode(salt)}${b64encode(digest)}"
@@ -0,0 +1,249 @@
+"""
+Хеширование паролей: argon2id / scrypt / PBKDF2 с параметрами в строке хеша.
+
+Раньше PBKDF2 (100 000 итераций) считался прямо в обработчиках login
+и register: под волной логинов он занимал весь threadpool, и остальные
+эндпоинты стояли в очереди за ним. Теперь:
+- хеширование идёт в отдельном ограниченном пуле (PASSWORD_HASH_WORKERS),
+  а число ожидающих задач ограничено PASSWORD_HASH_MAX_PENDING —
+  сверх лимита сразу 503, а не бесконечная очередь;
+- алгоритм и его параметры записаны в самой строке хеша, поэтому
+  смена стоимости не ломает старые пароли;
+- needs_rehash() сообщает, что хеш устарел (другой алгоритм или
+  параметры) — AuthService пересчитывает его при успешном логине.
+
+Форматы:
+    $argon2id$v=19$m=19456,t=2,p=1$<salt>$<hash>   (argon2-cffi)
+    $scrypt$ln=15,r=8,p=1$<salt>$<hash>
+    $pbkdf2-sha256$i=600000$<salt>$<hash>
+    <salt_hex>$<hash_hex>                          (legacy, PBKDF2 100k)
+
+Разбор строк — services/password_hash_format.py.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Optional
+
+from fastapi import HTTPException, status
+
+from core.config import settings
+from services.password_hash_format import (
+    ARGON2_VERSION,
+    ParsedHash,
+    format_hash,
+    parse_hash,
+)
+
+try:
+    from argon2.low_level import Type as Argon2Type, hash_secret_raw
+    ARGON2_AVAILABLE = True
+    ARGON2_TYPES = {
+        "argon2id": Argon2Type.ID,
+        "argon2i": Argon2Type.I,
+        "argon2d": Argon2Type.D,
+    }
+except ImportError:
+    ARGON2_AVAILABLE = False
+    ARGON2_TYPES = {}
+
+SCHEMES = ("argon2id", "scrypt", "pbkdf2-sha256")
+SALT_BYTES = 16
+DIGEST_BYTES = 32
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_pending = threading.BoundedSemaphore(settings.PASSWORD_HASH_MAX_PENDING)
+
+
+def get_hashing_executor() -> ThreadPoolExecutor:
+    """Отдельный от threadpool FastAPI пул под CPU-тяжёлое хеширование."""
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1,
+                    thread_name_prefix="password-hash",
+                )
+    return _executor
+
+
+def shutdown_hashing_executor() -> None:
+    global _executor
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+        _executor = None
+
+
+class PasswordHasher:
+    """Хеширование/проверка паролей с настраиваемой схемой и стоимостью."""
+
+    def __init__(
+        self,
+        scheme: Optional[str] = None,
+        argon2_time_cost: Optional[int] = None,
+        argon2_memory_kib: Optional[int] = None,
+        argon2_parallelism: Optional[int] = None,
+        scrypt_log2_n: Optional[int] = None,
+        scrypt_r: Optional[int] = None,
+        scrypt_p: Optional[int] = None,
+        pbkdf2_iterations: Optional[int] = None,
+    ):
+        scheme = scheme or settings.PASSWORD_HASH_SCHEME
+        if scheme == "argon2id" and not ARGON2_AVAILABLE:
+            scheme = "scrypt"
+        if scheme not in SCHEMES:
+            raise ValueError(f"Unknown password hash scheme '{scheme}'")
+        self.scheme = scheme
+
+        self.scrypt_log2_n = scrypt_log2_n or settings.SCRYPT_LOG2_N
+        self.scrypt_r = scrypt_r or settings.SCRYPT_R
+        self.scrypt_p = scrypt_p or settings.SCRYPT_P
+        self.pbkdf2_iterations = pbkdf2_iterations or settings.PBKDF2_ITERATIONS
+
+        self.argon2_time_cost = argon2_time_cost or settings.ARGON2_TIME_COST
+        self.argon2_memory_kib = argon2_memory_kib or settings.ARGON2_MEMORY_KIB
+        self.argon2_parallelism = argon2_parallelism or settings.ARGON2_PARALLELISM
+        self._dummy_hash: Optional[str] = None
+
+    def _target_params(self) -> Dict[str, int]:
+        """Параметры, с которыми считаются новые хеши (порядок = порядок в строке)."""
+        if self.scheme == "argon2id":
+            return {
+                "m": self.argon2_memory_kib,
+                "t": self.argon2_time_cost,
+                "p": self.argon2_parallelism,
+            }
+        if self.scheme == "scrypt":
+            return {"ln": self.scrypt_log2_n, "r": self.scrypt_r, "p": self.scrypt_p}
+        return {"i": self.pbkdf2_iterations}
+
+    # ── Хеширование ──
+
+    def hash(self, password: str) -> str:
+        target = ParsedHash(
+            algorithm=self.scheme,
+            params=self._target_params(),
+            salt=secrets.token_bytes(SALT_BYTES),
+            digest=b"",
+            version=ARGON2_VERSION if self.scheme == "argon2id" else None,
+        )
+        digest = self._derive(password.encode("utf-8"), target, DIGEST_BYTES)
+        return format_hash(target.algorithm, target.params, target.salt, digest, target.version)
+
+    @staticmethod
+    def _derive(password: bytes, parsed: ParsedHash, length: int) -> bytes:
+        """Сырой digest по алгоритму и параметрам из разобранного хеша."""
+        params = parsed.params
+        family = parsed.family
+        if family == "argon2":
+            if not ARGON2_AVAILABLE:
+                raise ValueError("argon2-cffi is not installed")
+            return hash_secret_raw(
+                password,
+                parsed.salt,
+                time_cost=params["t"],
+                memory_cost=params["m"],
+                parallelism=params["p"],
+                hash_len=length,
+                type=ARGON2_TYPES[parsed.algorithm],
+                version=parsed.version,
+            )
+        if family == "scrypt":
+            n = 1 << params["ln"]
+            return hashlib.scrypt(
+                password,
+                salt=parsed.salt,
+                n=n,
+                r=params["r"],
+                p=params["p"],
+                maxmem=256 * n * params["r"] + 1024 * 1024,
+                dklen=length,
+            )
+        digest_name = parsed.algorithm.split("-", 1)[1]
+        return hashlib.pbkdf2_hmac(digest_name, password, parsed.salt, params["i"], dklen=length)
+
+    # ── Проверка ──
+
+    def verify(self, password: str, stored: Optional[str]) -> bool:
+        """
+        Сравнение сырых digest-ов через hmac.compare_digest — время не
+        зависит от позиции первого несовпадающего байта.
+
+        stored=None (пользователь не найден) всё равно считает хеш —
+        время ответа не выдаёт, существует ли email.
+        """
+        if not stored:
+            self.verify(password, self._get_dummy_hash())
+            return False
+        try:
+            parsed = parse_hash(stored)
+            computed = self._derive(password.encode("utf-8"), parsed, len(parsed.digest))
+        except (ValueError, KeyError, OverflowError):
+            return False
+        return hmac.compare_digest(computed, parsed.digest)
+
+    def _get_dummy_hash(self) -> str:
+        if self._dummy_hash is None:
+            self._dummy_hash = self.hash(secrets.token_urlsafe(16))
+        return self._dummy_hash
+
+    def needs_rehash(self, stored: str) -> bool:
+        """Хеш посчитан другим алгоритмом/версией или с другими параметрами."""
+        try:
+            parsed = parse_hash(stored)
+        except ValueError:
+            return True
+        expected_version = ARGON2_VERSION if self.scheme == "argon2id" else None
+        return (
+            parsed.legacy
+            or parsed.algorithm != self.scheme
+            or parsed.version != expected_version
+            or parsed.params != self._target_params()
+            or len(parsed.digest) != DIGEST_BYTES
+        )
+
+    # ── Async: вне event loop и вне общего threadpool ──
+
+    async def _run(self, func, *args):
+        if not _pending.acquire(blocking=False):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests in flight, retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(get_hashing_executor(), partial(func, *args))
+        finally:
+            _pending.release()
+
+    async def hash_async(self, password: str) -> str:
+        return await self._run(self.hash, password)
+
+    async def verify_async(self, password: str, stored: Optional[str]) -> bool:
+        return await self._run(self.verify, password, stored)
+
+
+_hasher: Optional[PasswordHasher] = None
+_hasher_lock = threading.Lock()
+
+
+def get_password_hasher() -> PasswordHasher:
+    global _hasher
+
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                _hasher = PasswordHasher()
+    return _hasher
@@ -0,0 +1,220 @@
+"""
+Кэш аутентифицированного пользователя (principal) для get_current_user.
+
+Без кэша каждый авторизованный запрос делает SELECT по users — это
+половина всех запросов к БД. JWT уже подтверждает личность, из БД
+нужны только актуальные роль/имя, а они меняются редко.
+
+- UserPrincipal — отвязанный от сессии снимок (id, username, email,
+  role): его можно безопасно держать между запросами;
+- TTL короткий (AUTH_USER_CACHE_TTL_SECONDS) — верхняя граница
+  устаревания в других воркерах;
+- UserService инвалидирует запись при смене роли и удалении;
+- при AUTH_USER_CACHE_REDIS_URL кэш общий для всех воркеров,
+  и инвалидация видна сразу везде.
+
+Для stateless-токенов (role/ver в claims) хранится только
+user_id → token_version: этого достаточно, чтобы отсечь отозванные.
+"""
+
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+from core.config import settings
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class UserPrincipal:
+    """
+    Снимок пользователя для авторизации (не ORM-объект).
+    Из stateless-токена известны только id и role.
+    """
+
+    __slots__ = ("id", "username", "email", "role")
+
+    def __init__(
+        self,
+        id: int,
+        username: Optional[str] = None,
+        email: Optional[str] = None,
+        role: str = "user",
+    ):
+        self.id = id
+        self.username = username
+        self.email = email
+        self.role = role
+
+    @classmethod
+    def from_user(cls, user) -> "UserPrincipal":
+        return cls(id=user.id, username=user.username, email=user.email, role=user.role)
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class TTLCache:
+    """Потокобезопасный LRU с TTL в памяти процесса (ключ → значение)."""
+
+    backend = "memory"
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+class PrincipalCache(TTLCache):
+    """user_id → UserPrincipal."""
+
+    def put(self, principal: UserPrincipal) -> None:
+        self.set(principal.id, principal)
+
+
+class RedisPrincipalCache:
+    """
+    Тот же интерфейс поверх Redis-совместимого клиента (get/setex/delete).
+    Ошибки Redis не ломают авторизацию — считаем промахом.
+    """
+
+    KEY_PREFIX = "pg:principal:"
+
+    def __init__(self, client, ttl_seconds: float):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, user_id: int) -> str:
+        return f"{self.KEY_PREFIX}{user_id}"
+
+    def get(self, user_id: int) -> Optional[UserPrincipal]:
+        try:
+            raw = self.client.get(self._key(user_id))
+        except Exception as e:
+            logger.warning(f"[AUTH] Principal cache read failed: {e}")
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return UserPrincipal(**json.loads(raw))
+
+    def put(self, principal: UserPrincipal) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        try:
+            self.client.setex(
+                self._key(principal.id),
+                max(1, int(self.ttl_seconds)),
+                json.dumps(principal.to_dict()),
+            )
+        except Exception as e:
+            logger.warning(f"[AUTH] Principal cache write failed: {e}")
+
+    def invalidate(self, user_id: int) -> None:
+        try:
+            self.client.delete(self._key(user_id))
+        except Exception as e:
+            logger.warning(f"[AUTH] Principal cache invalidation failed: {e}")
+
+    def clear(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "hits": self.hits, "misses": self.misses}
+
+
+def _build_cache():
+    if settings.AUTH_USER_CACHE_REDIS_URL:
+        if REDIS_AVAILABLE:
+            return RedisPrincipalCache(
+                redis.Redis.from_url(settings.AUTH_USER_CACHE_REDIS_URL),
+                ttl_seconds=settings.AUTH_USER_CACHE_TTL_SECONDS,
+            )
+        logger.warning("[AUTH] AUTH_USER_CACHE_REDIS_URL set but redis is not installed")
+    return PrincipalCache(
+        max_size=settings.AUTH_USER_CACHE_SIZE,
+        ttl_seconds=settings.AUTH_USER_CACHE_TTL_SECONDS,
+    )
+
+
+_principal_cache = _build_cache()
+
+# user_id → текущий token_version (проверка отзыва stateless-токенов)
+_token_version_cache = TTLCache(
+    max_size=settings.AUTH_USER_CACHE_SIZE,
+    ttl_seconds=settings.AUTH_TOKEN_VERSION_TTL_SECONDS,
+)
+
+
+def get_principal_cache():
+    return _principal_cache
+
+
+def get_token_version_cache() -> TTLCache:
+    return _token_version_cache
+
+
+def invalidate_user(user_id: int) -> None:
+    """Сбросить всё закэшированное о пользователе (роль, версия токенов)."""
+    _principal_cache.invalidate(user_id)
+    _token_version_cache.invalidate(user_id)
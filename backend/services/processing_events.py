@@ -0,0 +1,237 @@
+"""
+Push-канал статусов обработки: pub/sub внутри процесса + SSE.
+
+Раньше клиент узнавал о завершении обработки только повторным
+GET /media/{id} или списком — каждый раз запрос в БД и подпись
+presigned URL, а открытые дашборды опрашивали их постоянно. Теперь
+конвейер обработки публикует каждый переход этапа
+(MediaItem.processing_status), а GET /api/media/events держит один
+SSE-поток на вкладку и отдаёт события только этого пользователя.
+
+Брокеры:
+- memory — подписчики в этом процессе (по умолчанию). Обработка идёт
+  в BackgroundTasks того же процесса, что и обслуживает поток;
+- redis  — публикация в Redis-канал, один поток-слушатель на процесс
+  раскладывает сообщения локальным подписчикам: события доходят,
+  даже если задачу выполнил другой воркер.
+
+Публикация синхронная и потокобезопасная (вызывается из threadpool);
+очередь подписчика ограничена — медленный клиент теряет старые события,
+а не память сервера.
+"""
+
+import json
+import asyncio
+import logging
+import threading
+from typing import Dict, Optional, Set
+
+from fastapi.concurrency import run_in_threadpool
+
+from core.config import settings
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+def build_event(item) -> dict:
+    """Событие из MediaItem — те же поля, что у MediaStatusResponse."""
+    return {
+        "id": item.id,
+        "status": item.processing_status,
+        "processed": bool(item.processed),
+        "bg_removed": bool(item.bg_removed),
+        "error": item.processing_error,
+    }
+
+
+class Subscription:
+    """Очередь событий одного SSE-потока (живёт в event loop приложения)."""
+
+    def __init__(self, broker: "MemoryEventBroker", user_id: int, queue_size: int):
+        self.broker = broker
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.loop = asyncio.get_running_loop()
+        self.dropped = 0
+
+    def _deliver(self, event: dict) -> None:
+        # Выполняется в loop подписчика
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self) -> dict:
+        return await self.queue.get()
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class MemoryEventBroker:
+    backend = "memory"
+
+    def __init__(self, queue_size: Optional[int] = None):
+        self.queue_size = queue_size or settings.PROCESSING_EVENTS_QUEUE_SIZE
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def ready(self) -> None:
+        """Блокирующая подготовка перед подписками (вызывать вне event loop)."""
+
+    def subscribe(self, user_id: int) -> Subscription:
+        """Вызывать из event loop — подписка привязывается к нему."""
+        subscription = Subscription(self, user_id, self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def subscriber_count(self, user_id: Optional[int] = None) -> int:
+        with self._lock:
+            if user_id is not None:
+                return len(self._subscribers.get(user_id, ()))
+            return sum(len(s) for s in self._subscribers.values())
+
+    def publish(self, user_id: int, event: dict) -> None:
+        """Из любого потока: событие уходит всем потокам пользователя."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._deliver, event)
+            except RuntimeError:
+                # loop уже закрыт — поток умер, не дождавшись отписки
+                self.unsubscribe(subscription)
+
+
+class RedisEventBroker(MemoryEventBroker):
+    """Публикация через Redis; слушатель раздаёт события локальным подписчикам."""
+
+    backend = "redis"
+    CHANNEL_PREFIX = "pg:media-events:"
+    SUBSCRIBE_TIMEOUT_SECONDS = 5.0
+
+    def __init__(self, client, queue_size: Optional[int] = None):
+        super().__init__(queue_size)
+        self.client = client
+        self._listener: Optional[threading.Thread] = None
+        self._subscribed = threading.Event()
+
+    def ready(self) -> None:
+        # Первый поток процесса: «: connected» клиенту — только когда
+        # подписка в Redis уже есть, иначе ранние события потеряются
+        self._start_listener()
+        if not self._subscribed.wait(timeout=self.SUBSCRIBE_TIMEOUT_SECONDS):
+            logger.warning("[EVENTS] Redis subscription is not confirmed yet")
+
+    def subscribe(self, user_id: int) -> Subscription:
+        self._start_listener()
+        return super().subscribe(user_id)
+
+    def publish(self, user_id: int, event: dict) -> None:
+        self.client.publish(f"{self.CHANNEL_PREFIX}{user_id}", json.dumps(event))
+
+    def _start_listener(self) -> None:
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(
+                    target=self._listen, name="media-events-listener", daemon=True
+                )
+                self._listener.start()
+
+    def _listen(self) -> None:
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(f"{self.CHANNEL_PREFIX}*")
+        self._subscribed.set()
+        for message in pubsub.listen():
+            try:
+                channel = message["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                user_id = int(channel[len(self.CHANNEL_PREFIX):])
+                MemoryEventBroker.publish(self, user_id, json.loads(message["data"]))
+            except Exception as e:
+                logger.warning(f"[EVENTS] Bad message from Redis: {e}")
+
+
+def build_event_broker(backend: str, redis_url: str = "") -> MemoryEventBroker:
+    if backend == "redis":
+        if REDIS_AVAILABLE and redis_url:
+            return RedisEventBroker(redis.Redis.from_url(redis_url))
+        logger.warning("[EVENTS] Redis event broker requested but unavailable, using memory")
+    return MemoryEventBroker()
+
+
+_broker: Optional[MemoryEventBroker] = None
+_broker_lock = threading.Lock()
+
+
+def get_event_broker() -> MemoryEventBroker:
+    global _broker
+
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = build_event_broker(
+                    settings.PROCESSING_EVENTS_BACKEND,
+                    settings.PROCESSING_EVENTS_REDIS_URL,
+                )
+    return _broker
+
+
+def publish_item(item) -> None:
+    """Опубликовать текущий этап MediaItem; ошибка брокера не ломает обработку."""
+    try:
+        get_event_broker().publish(item.user_id, build_event(item))
+    except Exception as e:
+        logger.warning(f"[EVENTS] Publish failed for media #{item.id}: {e}")
+
+
+async def open_subscription(user_id: int) -> Subscription:
+    """
+    Подписка для SSE-потока: ожидание брокера (PSUBSCRIBE в Redis) уходит
+    в threadpool, сама подписка создаётся в event loop.
+    """
+    broker = get_event_broker()
+    await run_in_threadpool(broker.ready)
+    return broker.subscribe(user_id)
+
+
+# ── SSE ──
+
+
+def format_sse(event: dict, name: str = "status") -> str:
+    return f"event: {name}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+
+
+async def sse_stream(subscription: Subscription, is_disconnected, heartbeat: Optional[float] = None):
+    """
+    Поток SSE: события подписки и комментарий-heartbeat, пока клиент
+    не отключится (прокси не рвут молчащее соединение).
+    """
+    heartbeat = heartbeat or settings.PROCESSING_EVENTS_HEARTBEAT_SECONDS
+    try:
+        yield ": connected\n\n"
+        while not await is_disconnected():
+            try:
+                event = await asyncio.wait_for(subscription.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield format_sse(event)
+    finally:
+        subscription.close()
@@ -2,8 +2,7 @@ import io
 import os
 import time
 import logging
-import traceback
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple
 
 import numpy as np
 from PIL import Image
@@ -11,7 +10,14 @@ from PIL import Image
 from core.database import SessionLocal
 from models import models as mdl
 from services.storage_service import StorageService
-from services.removebg_service import RemoveBgService, RemoveBgResult, RemoveBgError
+from services.removebg_service import RemoveBgResult, RemoveBgError
+from services.local_bg_removal import get_background_remover
+from services.rendition_service import build_image_renditions, extract_video_poster
+from services.removebg_cache import RemoveBgCache, cache_key
+from services.processing_events import publish_item
+from services.job_queue import JobRunner
+from services.bg_matte import apply_matte, extract_matte, prepare_upload
+from core.config import settings
 
 try:
     from ultralytics import YOLO
@@ -39,15 +45,27 @@ _face_model = None
 _plate_model = None
 _models_initialized = False
 
-MIN_PROCESSING_SECONDS = 1.0
+# Этапы обработки — MediaItem.processing_status (GET /api/media/{id}/status)
+PROCESSING_STAGES = (
+    "queued",
+    "downloading",
+    "detecting",
+    "blurring",
+    "removing_background",
+    "uploading",
+    "done",
+    "failed",
+)
 
 
 def get_storage_service() -> StorageService:
     return StorageService()
 
 
-def get_removebg_service() -> RemoveBgService:
-    return RemoveBgService()
+def get_removebg_service():
+    # Remove.bg — один экземпляр на процесс (иначе у каждой задачи свой пустой
+    # лимитер); либо локальная модель / Remove.bg с локальным fallback
+    return get_background_remover()
 
 
 def _init_models():
@@ -58,27 +76,27 @@ def _init_models():
 
     _models_initialized = True
 
-    print(f"[PROCESS] YOLO_AVAILABLE={YOLO_AVAILABLE}")
-    print(f"[PROCESS] CV2_AVAILABLE={CV2_AVAILABLE}")
+    logger.info(f"[PROCESS] YOLO_AVAILABLE={YOLO_AVAILABLE}")
+    logger.info(f"[PROCESS] CV2_AVAILABLE={CV2_AVAILABLE}")
 
     removebg_service = get_removebg_service()
-    print(f"[PROCESS] RemoveBg_AVAILABLE={removebg_service.is_available()}")
+    logger.info(f"[PROCESS] RemoveBg_AVAILABLE={removebg_service.is_available()}")
 
     if not YOLO_AVAILABLE:
-        print("[PROCESS] YOLO not available, skipping model load")
+        logger.info("[PROCESS] YOLO not available, skipping model load")
         return
 
     if os.path.exists(_FACE_MODEL_PATH):
         _face_model = YOLO(_FACE_MODEL_PATH)
-        print("[PROCESS] Face model loaded")
+        logger.info("[PROCESS] Face model loaded")
     else:
-        print(f"[PROCESS] Face model NOT FOUND: {_FACE_MODEL_PATH}")
+        logger.warning(f"[PROCESS] Face model NOT FOUND: {_FACE_MODEL_PATH}")
 
     if os.path.exists(_PLATE_MODEL_PATH):
         _plate_model = YOLO(_PLATE_MODEL_PATH)
-        print("[PROCESS] Plate model loaded")
+        logger.info("[PROCESS] Plate model loaded")
     else:
-        print(f"[PROCESS] Plate model NOT FOUND: {_PLATE_MODEL_PATH}")
+        logger.warning(f"[PROCESS] Plate model NOT FOUND: {_PLATE_MODEL_PATH}")
 
 
 def _detect_boxes(image: np.ndarray) -> List[Tuple[int, int, int, int]]:
@@ -127,21 +145,25 @@ def _blur_boxes(
     return out
 
 
-def process_image_bytes(data: bytes) -> bytes:
+def process_image_bytes(data: bytes, on_stage: Optional[Callable[[str], None]] = None) -> bytes:
     if not CV2_AVAILABLE:
         return data
 
     image = Image.open(io.BytesIO(data)).convert("RGB")
     np_img = np.array(image)
 
+    if on_stage:
+        on_stage("detecting")
     boxes = _detect_boxes(np_img)
-    print(f"[PROCESS] Detected {len(boxes)} boxes")
+    logger.info(f"[PROCESS] Detected {len(boxes)} boxes")
 
     if not boxes:
         buf = io.BytesIO()
         image.save(buf, format="JPEG")
         return buf.getvalue()
 
+    if on_stage:
+        on_stage("blurring")
     blurred_np = _blur_boxes(np_img, boxes)
     blurred_img = Image.fromarray(blurred_np)
 
@@ -150,23 +172,51 @@ def process_image_bytes(data: bytes) -> bytes:
     return buf.getvalue()
 
 
-def _apply_remove_bg(image_data: bytes) -> Tuple[bytes, bool]:
+def _apply_remove_bg(image_data: bytes, storage: Optional[StorageService] = None) -> Tuple[bytes, bool]:
     removebg_service = get_removebg_service()
 
     if not removebg_service.is_available():
         logger.info("[PROCESS] Remove.bg not available, skipping")
         return image_data, False
 
+    # Тот же вход с теми же параметрами уже обрабатывался — не платим повторно
+    cache = key = None
+    if settings.REMOVEBG_CACHE_ENABLED and getattr(removebg_service, "cacheable", True):
+        cache = RemoveBgCache(storage or get_storage_service())
+        params = {
+            **removebg_service.request_params(),
+            "upload_max_side": settings.REMOVEBG_UPLOAD_MAX_SIDE,
+        }
+        key = cache_key(image_data, params)
+        cached = cache.get(key)
+        if cached is not None:
+            logger.info(f"[PROCESS] Remove.bg cache hit ({len(cached)} bytes)")
+            return cached, True
+
     try:
-        result: RemoveBgResult = removebg_service.remove_background(image_data)
+        # В API — уменьшенная копия, маска ложится на полноразмерный оригинал
+        image = Image.open(io.BytesIO(image_data))
+        image.load()
+        upload, downscaled = prepare_upload(image, image_data, settings.REMOVEBG_UPLOAD_MAX_SIDE)
+        if downscaled:
+            logger.info(
+                f"[PROCESS] Uploading downscaled copy for background removal: "
+                f"{len(upload)} of {len(image_data)} bytes"
+            )
+
+        result: RemoveBgResult = removebg_service.remove_background(upload)
 
         if result.success and result.image_data:
+            output = apply_matte(image, extract_matte(result.image_data))
             logger.info(
                 f"[PROCESS] Background removed successfully. "
-                f"Output: {len(result.image_data)} bytes. "
+                f"Output: {len(output)} bytes. "
+                f"Source: {result.source}. "
                 f"Credits remaining: {result.credits_remaining}"
             )
-            return result.image_data, True
+            if cache is not None and result.source == "remove.bg":
+                cache.put(key, output)
+            return output, True
 
         logger.warning(
             f"[PROCESS] Remove.bg returned error: {result.error_message}. "
@@ -183,6 +233,45 @@ def _apply_remove_bg(image_data: bytes) -> Tuple[bytes, bool]:
         return image_data, False
 
 
+def _blur_frame(frame: np.ndarray) -> np.ndarray:
+    boxes = _detect_boxes(frame)
+    return _blur_boxes(frame, boxes) if boxes else frame
+
+
+def _store_renditions(
+    storage: StorageService,
+    source: Optional[bytes],
+    filename: str,
+    user_id: int,
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Сохранить миниатюру и превью. Ошибка здесь не должна ронять
+    обработку — карточка просто останется без превью.
+    """
+    if not source:
+        return None, None
+
+    try:
+        renditions = build_image_renditions(source)
+        base = os.path.splitext(filename)[0]
+        thumbnail_name = storage.upload_bytes(
+            renditions.thumbnail,
+            filename=f"{base}_thumb{renditions.extension}",
+            user_id=user_id,
+            content_type=renditions.content_type,
+        )
+        preview_name = storage.upload_bytes(
+            renditions.preview,
+            filename=f"{base}_preview{renditions.extension}",
+            user_id=user_id,
+            content_type=renditions.content_type,
+        )
+        return thumbnail_name, preview_name
+    except Exception as e:
+        logger.warning(f"[PROCESS] Rendition generation failed for {filename}: {e}")
+        return None, None
+
+
 def _guess_media_type(filename: str) -> str:
     ext = os.path.splitext(filename.lower())[1]
     if ext in IMAGE_EXTENSIONS:
@@ -192,7 +281,36 @@ def _guess_media_type(filename: str) -> str:
     return "unknown"
 
 
-def process_media_item(media_id: int, remove_bg: bool = False):
+def _set_stage(db, item: mdl.MediaItem, stage: str) -> None:
+    """Записать этап сразу и разослать подписчикам (/status, /events)."""
+    logger.debug(f"[PROCESS] Media #{item.id} stage: {stage}")
+    item.processing_status = stage
+    db.add(item)
+    db.commit()
+    publish_item(item)
+
+
+def _record_failure(media_id: int, error: str, final: bool) -> None:
+    """Ошибка попытки: failed, если повторов больше не будет, иначе снова queued."""
+    db = SessionLocal()
+    try:
+        item = db.get(mdl.MediaItem, media_id)
+        if item is not None:
+            item.processing_status = "failed" if final else "queued"
+            item.processing_error = error[:500]
+            db.commit()
+            publish_item(item)
+    except Exception as e:
+        logger.error(f"[PROCESS] Could not record failure for media #{media_id}: {e}")
+    finally:
+        db.close()
+
+
+def _run_pipeline(media_id: int, remove_bg: bool, heartbeat: Callable[[], None]) -> None:
+    """
+    Обработка одного файла; ошибка — исключение (повтор решает JobRunner).
+    Идемпотентна: обработанный или удалённый файл пропускается.
+    """
     started_at = time.time()
 
     db = SessionLocal()
@@ -202,56 +320,100 @@ def process_media_item(media_id: int, remove_bg: bool = False):
         item: mdl.MediaItem | None = (
             db.query(mdl.MediaItem).filter(mdl.MediaItem.id == media_id).first()
         )
-        if not item or not item.original_filename:
+        if not item or not item.original_filename or item.processed:
             return
 
+        def stage(name: str) -> None:
+            _set_stage(db, item, name)
+            heartbeat()
+
         media_type = _guess_media_type(item.original_filename)
+        stage("downloading")
         original_data = storage.download_bytes(item.original_object_name)
-        print(f"[PROCESS] Downloaded {len(original_data)} bytes for media #{media_id}")
+        logger.info(f"[PROCESS] Downloaded {len(original_data)} bytes for media #{media_id}")
 
         bg_was_removed = False
 
         if media_type == "image":
-            processed_data = process_image_bytes(original_data)
+            processed_data = process_image_bytes(original_data, on_stage=stage)
 
             if remove_bg:
-                processed_data, bg_was_removed = _apply_remove_bg(processed_data)
+                stage("removing_background")
+                processed_data, bg_was_removed = _apply_remove_bg(processed_data, storage)
 
             output_filename = item.original_filename
             if bg_was_removed and not output_filename.lower().endswith(".png"):
                 base = os.path.splitext(output_filename)[0]
                 output_filename = f"{base}.png"
 
+            stage("uploading")
             processed_object_name = storage.upload_bytes(
                 processed_data,
                 filename=output_filename,
                 user_id=item.user_id,
             )
+            rendition_source = processed_data
         else:
+            stage("uploading")
             processed_object_name = storage.upload_bytes(
                 original_data,
                 filename=item.original_filename,
                 user_id=item.user_id,
             )
+            rendition_source = (
+                extract_video_poster(
+                    original_data, item.original_filename, transform=_blur_frame
+                )
+                if media_type == "video"
+                else None
+            )
+
+        thumbnail_object_name, preview_object_name = _store_renditions(
+            storage, rendition_source, item.original_filename, item.user_id
+        )
 
         item.processed_object_name = processed_object_name
+        item.thumbnail_object_name = thumbnail_object_name
+        item.preview_object_name = preview_object_name
         item.processed = True
         item.bg_removed = bg_was_removed
+        item.processing_status = "done"
+        item.processing_error = None
 
         db.add(item)
         db.commit()
+        publish_item(item)
 
         elapsed = time.time() - started_at
-        if elapsed < MIN_PROCESSING_SECONDS:
-            time.sleep(MIN_PROCESSING_SECONDS - elapsed)
-
-        print(
+        logger.info(
             f"[PROCESS] Media #{media_id} done. "
             f"bg_removed={bg_was_removed}, elapsed={elapsed:.1f}s"
         )
 
     except Exception:
-        print("PROCESSING ERROR:")
-        traceback.print_exc()
+        db.rollback()
+        raise
     finally:
         db.close()
+
+
+def get_job_runner() -> JobRunner:
+    # SessionLocal берётся при вызове — подменяется в тестах
+    return JobRunner(
+        handler=_run_pipeline,
+        session_factory=lambda: SessionLocal(),
+        on_failure=_record_failure,
+    )
+
+
+def process_media_item(media_id: int, remove_bg: bool = False):
+    """
+    Быстрый путь после загрузки (BackgroundTasks): исполнить задачу
+    из processing_jobs. Если воркер умрёт посреди обработки, задачу
+    доберёт цикл восстановления (services/job_queue.py).
+    """
+    try:
+        outcome = get_job_runner().run_for_media(media_id, remove_bg)
+        logger.info(f"[PROCESS] Media #{media_id} job outcome: {outcome}")
+    except Exception:
+        logger.exception(f"[PROCESS] Processing media #{media_id} failed")
@@ -0,0 +1,239 @@
+"""
+Общий для процесса (и, опционально, для всех воркеров) rate limiter.
+
+Алгоритм — GCRA (generic cell rate algorithm): на ключ хранится одно
+число, TAT — теоретическое время прихода следующего запроса. Запрос с
+интервалом T = period / rate и допуском tau = T * (burst - 1):
+    allow_at = max(TAT, now) - tau
+    delay    = max(0, allow_at - now)
+    TAT      = max(TAT, now) + T
+O(1) по времени и памяти, без списков отметок.
+
+reserve() сразу бронирует слот и возвращает, сколько ждать: задачи
+встают в очередь за ёмкостью, а не падают. Если ждать дольше max_wait —
+слот не бронируется и выбрасывается RateLimitExceeded.
+
+Хранилища TAT:
+- memory — в процессе (по умолчанию);
+- sqlite — файл на общей машине, все воркеры делят лимит
+  (BEGIN IMMEDIATE сериализует обновления);
+- redis  — Redis-совместимый сервер, атомарно через Lua.
+Время — time.time(): TAT сравнивается между процессами.
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import tempfile
+import threading
+from typing import Optional, Tuple
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitExceeded(Exception):
+    """Ждать ёмкости пришлось бы дольше max_wait."""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(f"Rate limit exceeded. Retry after {retry_after:.1f}s")
+
+
+def gcra_reserve(
+    tat: Optional[float],
+    now: float,
+    interval: float,
+    tolerance: float,
+    max_wait: float,
+) -> Tuple[Optional[float], float]:
+    """
+    Один шаг GCRA: (новый TAT или None, задержка).
+    None — слот не забронирован (задержка больше max_wait).
+    """
+    base = max(tat or now, now)
+    delay = max(0.0, base - tolerance - now)
+    if delay > max_wait:
+        return None, delay
+    return base + interval, delay
+
+
+# ── Хранилища TAT ──
+
+
+class MemoryGcraStore:
+    backend = "memory"
+
+    def __init__(self):
+        self._tats: dict = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, key: str, now: float, interval: float, tolerance: float, max_wait: float) -> float:
+        with self._lock:
+            new_tat, delay = gcra_reserve(self._tats.get(key), now, interval, tolerance, max_wait)
+            if new_tat is not None:
+                self._tats[key] = new_tat
+            return delay
+
+    def defer(self, key: str, tat: float) -> None:
+        with self._lock:
+            self._tats[key] = max(self._tats.get(key) or 0.0, tat)
+
+
+class SqliteGcraStore:
+    """TAT в отдельном файле SQLite — общий для процессов на одной машине."""
+
+    backend = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS gcra (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _update(self, key: str, step) -> float:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT tat FROM gcra WHERE key = ?", (key,)).fetchone()
+            new_tat, result = step(row[0] if row else None)
+            if new_tat is not None:
+                conn.execute(
+                    "INSERT INTO gcra (key, tat) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                    (key, new_tat),
+                )
+            conn.execute("COMMIT")
+            return result
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def reserve(self, key: str, now: float, interval: float, tolerance: float, max_wait: float) -> float:
+        return self._update(key, lambda tat: gcra_reserve(tat, now, interval, tolerance, max_wait))
+
+    def defer(self, key: str, tat: float) -> None:
+        self._update(key, lambda current: (max(current or 0.0, tat), 0.0))
+
+
+class RedisGcraStore:
+    """TAT в Redis; шаг GCRA атомарно на стороне сервера (Lua)."""
+
+    backend = "redis"
+    KEY_PREFIX = "pg:gcra:"
+
+    RESERVE_SCRIPT = """
+local tat = tonumber(redis.call('GET', KEYS[1]))
+local now, interval, tolerance, max_wait = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local base = now
+if tat and tat > now then base = tat end
+local delay = math.max(0, base - tolerance - now)
+if delay <= max_wait then
+    redis.call('SET', KEYS[1], tostring(base + interval), 'PX', math.ceil((base + interval - now) * 1000) + 1000)
+end
+return tostring(delay)
+"""
+
+    DEFER_SCRIPT = """
+local tat = tonumber(redis.call('GET', KEYS[1]))
+local target, now = tonumber(ARGV[1]), tonumber(ARGV[2])
+if not tat or tat < target then
+    redis.call('SET', KEYS[1], tostring(target), 'PX', math.ceil((target - now) * 1000) + 1000)
+end
+return 1
+"""
+
+    def __init__(self, client):
+        self.client = client
+        self._reserve = client.register_script(self.RESERVE_SCRIPT)
+        self._defer = client.register_script(self.DEFER_SCRIPT)
+
+    def reserve(self, key: str, now: float, interval: float, tolerance: float, max_wait: float) -> float:
+        raw = self._reserve(keys=[self.KEY_PREFIX + key], args=[now, interval, tolerance, max_wait])
+        return float(raw)
+
+    def defer(self, key: str, tat: float) -> None:
+        self._defer(keys=[self.KEY_PREFIX + key], args=[tat, time.time()])
+
+
+def build_gcra_store(backend: str, sqlite_path: str = "", redis_url: str = ""):
+    if backend == "redis":
+        if REDIS_AVAILABLE and redis_url:
+            return RedisGcraStore(redis.Redis.from_url(redis_url))
+        logger.warning("[RATE] Redis rate limit store requested but unavailable, using memory")
+    elif backend == "sqlite":
+        path = sqlite_path or os.path.join(tempfile.gettempdir(), "privacyguard-ratelimit.db")
+        return SqliteGcraStore(path)
+    return MemoryGcraStore()
+
+
+# ── Лимитер ──
+
+
+class GcraRateLimiter:
+    """rate запросов за period секунд, до burst подряд без ожидания."""
+
+    def __init__(
+        self,
+        key: str,
+        rate: int,
+        period: float = 60.0,
+        burst: int = 1,
+        max_wait: float = 300.0,
+        store=None,
+        clock=time.time,
+        sleep=time.sleep,
+    ):
+        if rate <= 0:
+            raise ValueError("Rate limit must be positive")
+        self.key = key
+        self.rate = rate
+        self.period = period
+        self.burst = max(1, burst)
+        self.max_wait = max_wait
+        self.store = store or MemoryGcraStore()
+        self._clock = clock
+        self._sleep = sleep
+
+    @property
+    def interval(self) -> float:
+        return self.period / self.rate
+
+    @property
+    def tolerance(self) -> float:
+        return self.interval * (self.burst - 1)
+
+    def reserve(self, max_wait: Optional[float] = None) -> float:
+        """Забронировать слот; вернуть задержку до него (секунды)."""
+        max_wait = self.max_wait if max_wait is None else max_wait
+        delay = self.store.reserve(self.key, self._clock(), self.interval, self.tolerance, max_wait)
+        if delay > max_wait:
+            raise RateLimitExceeded(retry_after=delay)
+        return delay
+
+    def acquire(self, max_wait: Optional[float] = None) -> float:
+        """Дождаться своего слота (блокирующе). Возвращает время ожидания."""
+        delay = self.reserve(max_wait)
+        if delay > 0:
+            logger.info(f"[RATE] '{self.key}' waiting {delay:.2f}s for capacity")
+            self._sleep(delay)
+        return delay
+
+    def defer(self, seconds: float) -> None:
+        """
+        Внешний сервис ответил 429 с Retry-After: никто не получает
+        слот раньше, чем через seconds.
+        """
+        self.store.defer(self.key, self._clock() + seconds + self.tolerance)
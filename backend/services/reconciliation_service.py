@@ -0,0 +1,248 @@
+"""
+Сборщик мусора хранилища: сверка объектов MinIO с таблицей media_items.
+
+Сироты появляются, когда обработка падает после загрузки объекта,
+когда удаление из хранилища не удалось, или когда запись удалили,
+а фоновая очистка не дошла до конца.
+
+Алгоритм (память ограничена размером одного префикса, а не бакета):
+- потоково перебираем префиксы верхнего уровня "<user_id>/";
+- для префикса строим множество имён из БД потоковым запросом
+  (yield_per); для очень больших префиксов — Bloom-фильтр
+  (ложное срабатывание = объект ошибочно считается живым и
+  просто не удаляется, что безопасно);
+- потоково читаем list_objects по префиксу и удаляем/отчитываемся
+  о сиротах пачками.
+
+Свежие объекты (моложе min_age) не трогаем: загрузка кладёт объект
+раньше, чем коммитит запись в БД.
+
+Префикс "<user_id>/" сверяется только с записями этого владельца.
+Записи без владельца (user_id IS NULL) учитываются лишь с
+--include-unowned: тогда их объекты под префиксом считаются живыми.
+
+Запуск:
+    python -m services.reconciliation_service            # dry-run
+    python -m services.reconciliation_service --delete
+"""
+
+import json
+import math
+import hashlib
+import argparse
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from models.models import MediaItem
+from repositories.media_repository import OBJECT_NAME_COLUMNS
+from services.storage_service import StorageService
+
+logger = logging.getLogger(__name__)
+
+# Сколько имён держим в обычном set, дальше — Bloom-фильтр
+SET_LIMIT = 200_000
+SAMPLE_SIZE = 20
+
+
+class BloomFilter:
+    """Компактное множество с ложноположительными ответами."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: str):
+        digest = hashlib.sha256(value.encode("utf-8")).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, value: str) -> None:
+        for pos in self._positions(value):
+            self._bits[pos // 8] |= 1 << (pos % 8)
+
+    def __contains__(self, value: str) -> bool:
+        return all(self._bits[pos // 8] & (1 << (pos % 8)) for pos in self._positions(value))
+
+
+class ReconciliationReport:
+    """Итог прогона сборщика."""
+
+    def __init__(self, dry_run: bool):
+        self.dry_run = dry_run
+        self.prefixes = 0
+        self.scanned = 0
+        self.orphans = 0
+        self.deleted = 0
+        self.skipped_recent = 0
+        self.failed: List[dict] = []
+        self.sample: List[str] = []
+
+    def to_dict(self) -> dict:
+        return {
+            "dry_run": self.dry_run,
+            "prefixes": self.prefixes,
+            "scanned": self.scanned,
+            "orphans": self.orphans,
+            "deleted": self.deleted,
+            "skipped_recent": self.skipped_recent,
+            "failed": self.failed,
+            "sample": self.sample,
+        }
+
+
+class StorageReconciler:
+    """Сверка бакета с БД и удаление осиротевших объектов."""
+
+    def __init__(
+        self,
+        db: Session,
+        storage: StorageService,
+        dry_run: bool = True,
+        batch_size: int = 1000,
+        min_age: timedelta = timedelta(hours=1),
+        set_limit: int = SET_LIMIT,
+        include_unowned: bool = False,
+    ):
+        self.db = db
+        self.storage = storage
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.min_age = min_age
+        self.set_limit = set_limit
+        self.include_unowned = include_unowned
+
+    def run(self, prefixes: Optional[List[str]] = None) -> ReconciliationReport:
+        report = ReconciliationReport(self.dry_run)
+        cutoff = datetime.now(timezone.utc) - self.min_age
+
+        for prefix in prefixes or self.storage.list_prefixes():
+            user_id = self._parse_user_id(prefix)
+            if user_id is None:
+                # Служебные префиксы (например, кэш Remove.bg) не наши
+                continue
+            report.prefixes += 1
+            self._reconcile_prefix(prefix, user_id, cutoff, report)
+
+        logger.info(f"[GC] Reconciliation finished: {report.to_dict()}")
+        return report
+
+    @staticmethod
+    def _parse_user_id(prefix: str) -> Optional[int]:
+        head = prefix.rstrip("/")
+        return int(head) if head.isdigit() else None
+
+    def _referenced_names(self, user_id: int, prefix: str):
+        """Имена объектов из БД для префикса (set или Bloom-фильтр)."""
+        owner_filter = MediaItem.user_id == user_id
+        if self.include_unowned:
+            owner_filter = or_(owner_filter, MediaItem.user_id.is_(None))
+        count = (
+            self.db.query(func.count(MediaItem.id)).filter(owner_filter).scalar() or 0
+        )
+        capacity = count * len(OBJECT_NAME_COLUMNS)
+        names = BloomFilter(capacity) if capacity > self.set_limit else set()
+
+        rows = (
+            self.db.query(*OBJECT_NAME_COLUMNS)
+            .filter(owner_filter)
+            .execution_options(yield_per=5000)
+        )
+        for row in rows:
+            for name in row:
+                if name and name.startswith(prefix):
+                    names.add(name)
+        return names
+
+    def _reconcile_prefix(
+        self,
+        prefix: str,
+        user_id: int,
+        cutoff: datetime,
+        report: ReconciliationReport,
+    ) -> None:
+        referenced = self._referenced_names(user_id, prefix)
+        pending: List[str] = []
+
+        for name, last_modified in self.storage.iter_objects(prefix):
+            report.scanned += 1
+            if name in referenced:
+                continue
+            if last_modified is not None and last_modified > cutoff:
+                report.skipped_recent += 1
+                continue
+
+            report.orphans += 1
+            if len(report.sample) < SAMPLE_SIZE:
+                report.sample.append(name)
+            pending.append(name)
+            if len(pending) >= self.batch_size:
+                self._flush(pending, report)
+                pending = []
+
+        if pending:
+            self._flush(pending, report)
+
+    def _flush(self, names: List[str], report: ReconciliationReport) -> None:
+        if self.dry_run:
+            return
+        failures = self.storage.delete_objects(names)
+        report.deleted += len(names) - len(failures)
+        report.failed.extend(
+            {"object_name": name, "error": error} for name, error in failures
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from core.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Remove orphaned MinIO objects")
+    parser.add_argument(
+        "--delete",
+        action="store_true",
+        help="actually delete orphans (default: dry-run, report only)",
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--min-age-minutes", type=int, default=60)
+    parser.add_argument(
+        "--prefix",
+        action="append",
+        help="limit to prefix (e.g. '42/'), can be repeated",
+    )
+    parser.add_argument(
+        "--include-unowned",
+        action="store_true",
+        help="also treat objects of media rows without an owner (user_id IS NULL) as referenced",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    logger.info(f"[GC] Bucket: {settings.MINIO_BUCKET}, delete={args.delete}")
+
+    db = SessionLocal()
+    try:
+        report = StorageReconciler(
+            db,
+            StorageService(),
+            dry_run=not args.delete,
+            batch_size=args.batch_size,
+            min_age=timedelta(minutes=args.min_age_minutes),
+            include_unowned=args.include_unowned,
+        ).run(prefixes=args.prefix)
+    finally:
+        db.close()
+
+    print(json.dumps(report.to_dict(), indent=2))
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,186 @@
+"""
+Кэш результатов Remove.bg по содержимому (content-addressed).
+
+Повторная обработка и повторные загрузки того же файла отправляли
+в Remove.bg одни и те же байты — каждый раз платно и за секунды.
+Ключ кэша — SHA-256 от входных байт и параметров запроса, поэтому
+одинаковый вход с одинаковыми параметрами всегда даёт один ключ.
+
+- PNG лежит в MinIO под removebg-cache/<ключ[:2]>/<ключ>.png
+  (сборщик сирот пропускает нечисловые префиксы);
+- метаданные — таблица removebg_cache;
+- вытеснение: TTL по последнему использованию
+  (REMOVEBG_CACHE_TTL_DAYS) и LRU до REMOVEBG_CACHE_MAX_BYTES;
+- статистика: попадания/промахи процесса и сэкономленные кредиты.
+
+Ошибка кэша никогда не ломает обработку — считаем промахом.
+"""
+
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.database import SessionLocal
+from repositories.removebg_cache_repository import RemoveBgCacheRepository
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "removebg-cache/"
+EVICTION_BATCH_SIZE = 100
+
+
+def cache_key(image_data: bytes, params: dict) -> str:
+    """SHA-256 входных байт + канонический JSON параметров запроса."""
+    digest = hashlib.sha256(image_data)
+    digest.update(b"\0")
+    digest.update(json.dumps(params, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def object_name_for(key: str) -> str:
+    return f"{CACHE_PREFIX}{key[:2]}/{key}.png"
+
+
+class CacheCounters:
+    """Попадания/промахи в этом процессе."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+_counters = CacheCounters()
+
+
+def get_cache_counters() -> CacheCounters:
+    return _counters
+
+
+class RemoveBgCache:
+    """Поиск, запись и вытеснение результатов Remove.bg."""
+
+    def __init__(
+        self,
+        storage,
+        session_factory: Optional[Callable[[], Session]] = None,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[timedelta] = None,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ):
+        self.storage = storage
+        self.session_factory = session_factory or SessionLocal
+        self.max_bytes = settings.REMOVEBG_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.ttl = ttl or timedelta(days=settings.REMOVEBG_CACHE_TTL_DAYS)
+        self._clock = clock
+
+    def get(self, key: str) -> Optional[bytes]:
+        db = self.session_factory()
+        try:
+            repo = RemoveBgCacheRepository(db)
+            entry = repo.get_by_key(key)
+            now = self._clock()
+            if entry is None or entry.last_used_at < now - self.ttl:
+                _counters.record(hit=False)
+                return None
+            data = self.storage.download_bytes(entry.object_name)
+            repo.touch(entry, now)
+            _counters.record(hit=True)
+            return data
+        except Exception as e:
+            logger.warning(f"[RemoveBgCache] Lookup failed for {key[:12]}: {e}")
+            _counters.record(hit=False)
+            return None
+        finally:
+            db.close()
+
+    def put(self, key: str, data: bytes) -> None:
+        name = object_name_for(key)
+        db = self.session_factory()
+        try:
+            self.storage.put_bytes(name, data, content_type="image/png")
+            repo = RemoveBgCacheRepository(db)
+            now = self._clock()
+            try:
+                repo.create(key, name, len(data), now)
+            except IntegrityError:
+                # Ключ уже есть (параллельная задача или запись, устаревшая по TTL):
+                # объект только что перезаписан — продлеваем запись, иначе
+                # _evict ниже удалит её вместе со свежим объектом
+                db.rollback()
+                entry = repo.get_by_key(key)
+                if entry is not None:
+                    repo.refresh(entry, len(data), now)
+            self._evict(db)
+        except Exception as e:
+            logger.warning(f"[RemoveBgCache] Store failed for {key[:12]}: {e}")
+        finally:
+            db.close()
+
+    def _evict(self, db: Session) -> int:
+        """Сначала устаревшие по TTL, потом LRU, пока кэш больше лимита."""
+        repo = RemoveBgCacheRepository(db)
+        evicted = 0
+
+        while True:
+            expired = repo.least_recently_used(EVICTION_BATCH_SIZE, unused_since=self._clock() - self.ttl)
+            if not expired:
+                break
+            evicted += self._drop(repo, expired)
+
+        _, total_size, _ = repo.totals()
+        while total_size > self.max_bytes:
+            victims = []
+            for entry in repo.least_recently_used(EVICTION_BATCH_SIZE):
+                victims.append(entry)
+                total_size -= entry.size_bytes
+                if total_size <= self.max_bytes:
+                    break
+            if not victims:
+                break
+            evicted += self._drop(repo, victims)
+
+        if evicted:
+            logger.info(f"[RemoveBgCache] Evicted {evicted} entries")
+        return evicted
+
+    def _drop(self, repo: RemoveBgCacheRepository, entries) -> int:
+        self.storage.delete_objects([entry.object_name for entry in entries])
+        repo.delete(entries)
+        return len(entries)
+
+
+def get_cache_stats(db: Session) -> dict:
+    entries, size_bytes, lifetime_hits = RemoveBgCacheRepository(db).totals()
+    hits, misses = _counters.hits, _counters.misses
+    lookups = hits + misses
+    return {
+        "enabled": settings.REMOVEBG_CACHE_ENABLED,
+        "entries": entries,
+        "size_bytes": size_bytes,
+        "max_bytes": settings.REMOVEBG_CACHE_MAX_BYTES,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / lookups if lookups else 0.0,
+        "credits_saved": hits * settings.REMOVEBG_CREDITS_PER_CALL,
+        "lifetime_hits": lifetime_hits,
+    }
@@ -9,13 +9,23 @@ RemoveBgService — единственная точка контакта с вн
 Остальной код работает только с нашими типами (bytes in → bytes out).
 """
 
+import math
 import time
+import random
 import logging
+import threading
 from typing import Optional
 
 import httpx
 
 from core.config import settings
+from services.rate_limiter import GcraRateLimiter, RateLimitExceeded, build_gcra_store
+
+try:
+    import h2  # noqa: F401 — нужен httpx для HTTP/2
+    H2_AVAILABLE = True
+except ImportError:
+    H2_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +51,7 @@ class RemoveBgResult:
         credits_remaining: Optional[int] = None,
         image_width: Optional[int] = None,
         image_height: Optional[int] = None,
+        source: str = "remove.bg",
     ):
         self.success = success
         self.image_data = image_data
@@ -48,6 +59,8 @@ class RemoveBgResult:
         self.credits_remaining = credits_remaining
         self.image_width = image_width
         self.image_height = image_height
+        # Кто посчитал результат: "remove.bg" или "local" (services/local_bg_removal)
+        self.source = source
 
     def __repr__(self) -> str:
         if self.success:
@@ -70,12 +83,109 @@ class RemoveBgRateLimitError(RemoveBgError):
         super().__init__(f"Rate limit exceeded. Retry after {retry_after}s")
 
 
+class RemoveBgServerError(RemoveBgError):
+    """5xx от API — стоит повторить (с учётом Retry-After, если он есть)."""
+
+    def __init__(self, message: str, retry_after: Optional[int] = None):
+        self.retry_after = retry_after
+        super().__init__(message)
+
+
 class RemoveBgQuotaError(RemoveBgError):
     """Лимит бесплатных запросов исчерпан."""
 
     pass
 
 
+# ══════════════════════════════════════════════════════════════════
+# Process-wide HTTP client
+# ══════════════════════════════════════════════════════════════════
+# WHY: httpx.Client на каждый запрос = новый TCP + TLS handshake,
+# в том числе на каждом retry. Один клиент на процесс держит
+# keep-alive соединения (и HTTP/2, если установлен h2), ограничивает
+# их число и закрывается при остановке приложения.
+# ══════════════════════════════════════════════════════════════════
+
+_http_client: Optional[httpx.Client] = None
+_http_client_lock = threading.Lock()
+
+
+def _build_http_client() -> httpx.Client:
+    return httpx.Client(
+        http2=settings.REMOVEBG_HTTP2 and H2_AVAILABLE,
+        timeout=httpx.Timeout(
+            connect=settings.REMOVEBG_CONNECT_TIMEOUT_SECONDS,
+            read=settings.REMOVEBG_TIMEOUT_SECONDS,
+            write=settings.REMOVEBG_WRITE_TIMEOUT_SECONDS,
+            pool=settings.REMOVEBG_POOL_TIMEOUT_SECONDS,
+        ),
+        limits=httpx.Limits(
+            max_connections=settings.REMOVEBG_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.REMOVEBG_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.REMOVEBG_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+    )
+
+
+def get_removebg_http_client() -> httpx.Client:
+    """Общий для процесса httpx-клиент Remove.bg (создаётся лениво)."""
+    global _http_client
+
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                _http_client = _build_http_client()
+    return _http_client
+
+
+def close_removebg_http_client() -> None:
+    """Закрыть соединения (shutdown приложения)."""
+    global _http_client
+
+    with _http_client_lock:
+        if _http_client is not None:
+            _http_client.close()
+        _http_client = None
+
+
+_rate_limiter: Optional[GcraRateLimiter] = None
+_service: Optional["RemoveBgService"] = None
+_singleton_lock = threading.Lock()
+
+
+def get_removebg_rate_limiter() -> GcraRateLimiter:
+    """Один лимитер на процесс — общий для всех задач обработки."""
+    global _rate_limiter
+
+    if _rate_limiter is None:
+        with _singleton_lock:
+            if _rate_limiter is None:
+                _rate_limiter = GcraRateLimiter(
+                    key="removebg",
+                    rate=settings.REMOVEBG_RATE_LIMIT_PER_MINUTE,
+                    period=60.0,
+                    burst=settings.REMOVEBG_RATE_LIMIT_BURST,
+                    max_wait=settings.REMOVEBG_RATE_LIMIT_MAX_WAIT_SECONDS,
+                    store=build_gcra_store(
+                        settings.REMOVEBG_RATE_LIMIT_BACKEND,
+                        sqlite_path=settings.REMOVEBG_RATE_LIMIT_SQLITE_PATH,
+                        redis_url=settings.REMOVEBG_RATE_LIMIT_REDIS_URL,
+                    ),
+                )
+    return _rate_limiter
+
+
+def get_removebg_service() -> "RemoveBgService":
+    global _service
+
+    if _service is None:
+        rate_limiter = get_removebg_rate_limiter()
+        with _singleton_lock:
+            if _service is None:
+                _service = RemoveBgService(rate_limiter=rate_limiter)
+    return _service
+
+
 class RemoveBgService:
     """
     5.2. Adapter для Remove.bg API.
@@ -88,25 +198,33 @@ class RemoveBgService:
     - Нормализация ответа в RemoveBgResult (5.5)
     """
 
-    API_URL = "https://api.remove.bg/v1.0/removebg"
-
     # ══════════════════════════════════════════════════════════════
     # 5.4. Rate limiting на нашей стороне
     # ══════════════════════════════════════════════════════════════
     # WHY: Remove.bg бесплатный tier = 50 запросов/месяц.
     # Без ограничения один пользователь может сжечь весь лимит.
-    # Простой token bucket: MAX_REQUESTS_PER_MINUTE запросов в минуту.
+    # Лимитер общий на процесс (get_removebg_rate_limiter), а при
+    # REMOVEBG_RATE_LIMIT_BACKEND=sqlite|redis — на все воркеры.
     # ══════════════════════════════════════════════════════════════
 
-    def __init__(self):
+    def __init__(
+        self,
+        rate_limiter: Optional[GcraRateLimiter] = None,
+        http_client: Optional[httpx.Client] = None,
+        api_url: Optional[str] = None,
+    ):
+        self.api_url = api_url or settings.REMOVEBG_API_URL
         self.api_key = settings.REMOVEBG_API_KEY
         self.enabled = bool(self.api_key and self.api_key != "")
         self.timeout = settings.REMOVEBG_TIMEOUT_SECONDS
         self.max_retries = settings.REMOVEBG_MAX_RETRIES
         self.max_requests_per_minute = settings.REMOVEBG_RATE_LIMIT_PER_MINUTE
-
-        # Token bucket для rate limiting
-        self._request_timestamps: list[float] = []
+        self.backoff_base = settings.REMOVEBG_BACKOFF_BASE_SECONDS
+        self.backoff_max = settings.REMOVEBG_BACKOFF_MAX_SECONDS
+        self.rate_limiter = rate_limiter or get_removebg_rate_limiter()
+        # None — общий клиент процесса; берётся на каждый запрос,
+        # чтобы после close_removebg_http_client() создался новый
+        self._http_client = http_client
 
         if self.enabled:
             logger.info("[RemoveBg] Service enabled (API key configured)")
@@ -118,31 +236,19 @@ class RemoveBgService:
         return self.enabled
 
     # ══════════════════════════════════════════════════════════════
-    # 5.4. Rate limiter (token bucket)
+    # 5.4. Rate limiter (GCRA, services/rate_limiter.py)
     # ══════════════════════════════════════════════════════════════
 
-    def _check_rate_limit(self) -> None:
+    def _wait_for_capacity(self) -> None:
         """
-        Проверяет, не превышен ли лимит запросов.
-        Выбрасывает RemoveBgRateLimitError если превышен.
-
-        Алгоритм: sliding window за последнюю минуту.
+        Дождаться слота общего лимитера — задача встаёт в очередь,
+        а не падает. RemoveBgRateLimitError только если ждать пришлось
+        бы дольше REMOVEBG_RATE_LIMIT_MAX_WAIT_SECONDS.
         """
-        now = time.time()
-        window = 60.0  # 1 минута
-
-        # Удаляем старые timestamps
-        self._request_timestamps = [
-            ts for ts in self._request_timestamps if now - ts < window
-        ]
-
-        if len(self._request_timestamps) >= self.max_requests_per_minute:
-            oldest = self._request_timestamps[0]
-            retry_after = int(window - (now - oldest)) + 1
-            raise RemoveBgRateLimitError(retry_after=retry_after)
-
-        # Записываем текущий запрос
-        self._request_timestamps.append(now)
+        try:
+            self.rate_limiter.acquire()
+        except RateLimitExceeded as e:
+            raise RemoveBgRateLimitError(retry_after=math.ceil(e.retry_after))
 
     # ══════════════════════════════════════════════════════════════
     # 5.4. Retry с exponential backoff
@@ -169,24 +275,36 @@ class RemoveBgService:
                 error_message="Remove.bg service is not configured (missing API key)",
             )
 
-        # Проверяем наш rate limit
-        self._check_rate_limit()
-
         last_error: Optional[str] = None
 
         for attempt in range(self.max_retries + 1):
+            retry_after: Optional[int] = None
+            # Каждая попытка — запрос к API, и каждая проходит через лимитер
+            self._wait_for_capacity()
             try:
                 result = self._do_request(image_data)
                 return result
 
-            except RemoveBgRateLimitError:
-                # Rate limit от API — не retry, а пробрасываем
-                raise
+            except RemoveBgRateLimitError as e:
+                # 429 от API: сдвигаем общий лимитер, чтобы остальные задачи
+                # тоже подождали Retry-After, и пробуем снова через него
+                self.rate_limiter.defer(e.retry_after)
+                if attempt >= self.max_retries:
+                    raise
+                logger.warning(f"[RemoveBg] API rate limited, waiting {e.retry_after}s")
+                continue
 
             except RemoveBgQuotaError:
                 # Квота исчерпана — не retry, а пробрасываем
                 raise
 
+            except RemoveBgServerError as e:
+                last_error = str(e)
+                retry_after = e.retry_after
+                logger.warning(
+                    f"[RemoveBg] Server error on attempt {attempt + 1}/{self.max_retries + 1}"
+                )
+
             except httpx.TimeoutException as e:
                 last_error = f"Timeout after {self.timeout}s: {str(e)}"
                 logger.warning(
@@ -206,10 +324,9 @@ class RemoveBgService:
                     exc_info=True,
                 )
 
-            # Exponential backoff: 1s, 2s, 4s
             if attempt < self.max_retries:
-                backoff = 2**attempt
-                logger.info(f"[RemoveBg] Retrying in {backoff}s...")
+                backoff = self.backoff_delay(attempt, retry_after)
+                logger.info(f"[RemoveBg] Retrying in {backoff:.1f}s...")
                 time.sleep(backoff)
 
         # Все попытки исчерпаны
@@ -218,32 +335,53 @@ class RemoveBgService:
             error_message=f"Failed after {self.max_retries + 1} attempts. Last error: {last_error}",
         )
 
-    def _do_request(self, image_data: bytes) -> RemoveBgResult:
+    def backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
         """
-        Выполняет один HTTP-запрос к Remove.bg API.
-
-        5.5: Нормализация ответа — парсим headers и body,
-        преобразуем в наш RemoveBgResult.
+        Exponential backoff с jitter: половина шага фиксирована, половина
+        случайна — повторы разных задач не приходят к API одной волной.
+        Retry-After от API — нижняя граница.
         """
-        with httpx.Client(timeout=self.timeout) as client:
-            response = client.post(
-                self.API_URL,
-                files={"image_file": ("image.png", image_data, "image/png")},
-                data={
-                    "size": "auto",  # auto-detect best size
-                    "type": "auto",  # auto-detect foreground type
-                    "format": "png",  # PNG для прозрачности
-                    "bg_color": "",  # прозрачный фон
-                },
-                headers={
-                    "X-Api-Key": self.api_key,
-                },
-            )
+        step = min(self.backoff_max, self.backoff_base * 2**attempt)
+        delay = step / 2 + random.uniform(0, step / 2)
+        return max(delay, retry_after or 0)
+
+    @staticmethod
+    def request_params() -> dict:
+        """Параметры запроса — входят и в тело, и в ключ кэша результатов."""
+        return {
+            "size": "auto",  # auto-detect best size
+            "type": "auto",  # auto-detect foreground type
+            "format": "png",  # PNG для прозрачности
+            "bg_color": "",  # прозрачный фон
+            # alpha — только маска; накладывается на оригинал (services/bg_matte.py)
+            "channels": settings.REMOVEBG_CHANNELS,
+        }
 
-        # ══════════════════════════════════════════════════════
-        # 5.5. Нормализация: HTTP-ответ → RemoveBgResult
-        # ══════════════════════════════════════════════════════
+    def build_request_kwargs(self, image_data: bytes) -> dict:
+        # После уменьшения (services/bg_matte.py) в API уходит JPEG
+        if image_data.startswith(b"\xff\xd8"):
+            image_file = ("image.jpg", image_data, "image/jpeg")
+        else:
+            image_file = ("image.png", image_data, "image/png")
+        return {
+            "files": {"image_file": image_file},
+            "data": self.request_params(),
+            "headers": {
+                "X-Api-Key": self.api_key,
+            },
+        }
 
+    def _do_request(self, image_data: bytes) -> RemoveBgResult:
+        """Выполняет один HTTP-запрос к Remove.bg API."""
+        client = self._http_client or get_removebg_http_client()
+        response = client.post(self.api_url, **self.build_request_kwargs(image_data))
+        return self.normalize_response(response)
+
+    def normalize_response(self, response: httpx.Response) -> RemoveBgResult:
+        """
+        5.5: Нормализация ответа — парсим headers и body,
+        преобразуем в наш RemoveBgResult (общая для sync и async).
+        """
         # Парсим заголовки (Remove.bg возвращает метаданные в headers)
         credits_remaining = self._parse_int_header(
             response.headers, "X-Credits-Remaining"
@@ -299,8 +437,9 @@ class RemoveBgService:
 
         # Серверные ошибки (5xx) — стоит retry
         if 500 <= response.status_code < 600:
-            raise RemoveBgError(
-                f"Remove.bg server error ({response.status_code}): {error_detail}"
+            raise RemoveBgServerError(
+                f"Remove.bg server error ({response.status_code}): {error_detail}",
+                retry_after=self._parse_int_header(response.headers, "Retry-After"),
             )
 
         # Неизвестный статус
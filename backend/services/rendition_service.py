@@ -0,0 +1,132 @@
+"""
+Генерация производных версий (renditions) для списков медиа.
+
+Дашборд показывает сетку карточек — отдавать туда оригиналы по
+несколько МБ бессмысленно. Пайплайн обработки сохраняет рядом с
+обработанным файлом маленькую миниатюру и превью среднего размера
+(для видео — из кадра-постера).
+
+Renditions всегда строятся из уже обработанного (заблюренного)
+изображения, чтобы превью не раскрывали лица и номера.
+"""
+
+import io
+import os
+import logging
+import tempfile
+from typing import Callable, Optional
+
+from PIL import Image, features
+
+from core.config import settings
+
+try:
+    import cv2
+
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+WEBP_AVAILABLE = features.check("webp")
+
+
+class Renditions:
+    """Готовые байты миниатюры и превью."""
+
+    def __init__(self, thumbnail: bytes, preview: bytes, extension: str, content_type: str):
+        self.thumbnail = thumbnail
+        self.preview = preview
+        self.extension = extension
+        self.content_type = content_type
+
+
+def _output_format() -> tuple[str, str, str]:
+    """(формат PIL, расширение, MIME) — WebP, если Pillow его умеет."""
+    if settings.RENDITION_FORMAT.upper() == "WEBP" and WEBP_AVAILABLE:
+        return "WEBP", ".webp", "image/webp"
+    return "JPEG", ".jpg", "image/jpeg"
+
+
+def _resize(image: Image.Image, max_side: int) -> Image.Image:
+    copy = image.copy()
+    copy.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    return copy
+
+
+def _encode(image: Image.Image, fmt: str, quality: int) -> bytes:
+    if fmt == "JPEG" and image.mode not in ("RGB", "L"):
+        # JPEG не умеет прозрачность (результат Remove.bg) — кладём на белый
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        rgba = image.convert("RGBA")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        image = background
+    buf = io.BytesIO()
+    if fmt == "WEBP":
+        image.save(buf, format=fmt, quality=quality, method=4)
+    else:
+        image.save(buf, format=fmt, quality=quality, optimize=True)
+    return buf.getvalue()
+
+
+def build_image_renditions(data: bytes) -> Renditions:
+    """Построить миниатюру и превью из байтов изображения."""
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    if image.mode not in ("RGB", "RGBA", "L"):
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+    fmt, extension, content_type = _output_format()
+
+    thumbnail = _encode(
+        _resize(image, settings.THUMBNAIL_MAX_SIDE), fmt, settings.RENDITION_QUALITY
+    )
+    preview = _encode(
+        _resize(image, settings.PREVIEW_MAX_SIDE), fmt, settings.RENDITION_QUALITY
+    )
+
+    return Renditions(thumbnail, preview, extension, content_type)
+
+
+def extract_video_poster(
+    data: bytes,
+    filename: str,
+    transform: Optional[Callable] = None,
+) -> Optional[bytes]:
+    """
+    Достать кадр-постер из видео (JPEG-байты) или None.
+
+    transform — функция над RGB numpy-кадром (например, блюр лиц),
+    применяется до кодирования.
+    """
+    if not CV2_AVAILABLE:
+        return None
+
+    suffix = os.path.splitext(filename)[1] or ".mp4"
+    with tempfile.NamedTemporaryFile(suffix=suffix) as tmp:
+        tmp.write(data)
+        tmp.flush()
+
+        capture = cv2.VideoCapture(tmp.name)
+        try:
+            fps = capture.get(cv2.CAP_PROP_FPS) or 0
+            frame_count = capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0
+            target = int(fps * settings.VIDEO_POSTER_SECOND)
+            if 0 < target < frame_count:
+                capture.set(cv2.CAP_PROP_POS_FRAMES, target)
+            ok, frame = capture.read()
+        finally:
+            capture.release()
+
+    if not ok or frame is None:
+        logger.warning(f"[RENDITION] Could not read poster frame from {filename}")
+        return None
+
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    if transform is not None:
+        rgb = transform(rgb)
+
+    buf = io.BytesIO()
+    Image.fromarray(rgb).save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
@@ -1,32 +1,196 @@
 import uuid
 import os
 import io
-from typing import IO
-from datetime import timedelta
+import socket
+import time
+import threading
+from collections import OrderedDict
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 
+import urllib3
+from urllib3.connection import HTTPConnection
 from minio import Minio
+from minio.deleteobjects import DeleteObject
 from core.config import settings
 
+# ══════════════════════════════════════════════════════════════════
+# Process-wide MinIO client
+# ══════════════════════════════════════════════════════════════════
+# WHY: Minio-клиент потокобезопасен и держит внутри urllib3-пул.
+# Создавать его на каждый запрос = новый пул, новые TCP-соединения
+# и лишний HEAD bucket. Поэтому один клиент на процесс, а бакет
+# проверяется один раз при старте приложения (ensure_bucket).
+# ══════════════════════════════════════════════════════════════════
 
-class StorageService:
-    def __init__(self):
-        self.client = Minio(
-            settings.MINIO_ENDPOINT,
-            access_key=settings.MINIO_ACCESS_KEY,
-            secret_key=settings.MINIO_SECRET_KEY,
-            secure=settings.MINIO_SECURE,
+_client: Optional[Minio] = None
+_http_client: Optional[urllib3.PoolManager] = None
+_client_lock = threading.Lock()
+
+
+def _build_http_client() -> urllib3.PoolManager:
+    """urllib3-пул с keep-alive, таймаутами и retry для MinIO."""
+    return urllib3.PoolManager(
+        num_pools=settings.MINIO_POOL_NUM_POOLS,
+        maxsize=settings.MINIO_POOL_MAXSIZE,
+        block=settings.MINIO_POOL_BLOCK,
+        timeout=urllib3.Timeout(
+            connect=settings.MINIO_CONNECT_TIMEOUT_SECONDS,
+            read=settings.MINIO_READ_TIMEOUT_SECONDS,
+        ),
+        retries=urllib3.Retry(
+            total=settings.MINIO_MAX_RETRIES,
+            backoff_factor=0.2,
+            status_forcelist=[500, 502, 503, 504],
+        ),
+        socket_options=HTTPConnection.default_socket_options
+        + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)],
+    )
+
+
+def get_minio_client() -> Minio:
+    """Общий для процесса Minio-клиент (создаётся лениво)."""
+    global _client, _http_client
+
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _http_client = _build_http_client()
+                _client = Minio(
+                    settings.MINIO_ENDPOINT,
+                    access_key=settings.MINIO_ACCESS_KEY,
+                    secret_key=settings.MINIO_SECRET_KEY,
+                    secure=settings.MINIO_SECURE,
+                    http_client=_http_client,
+                )
+    return _client
+
+
+def ensure_bucket() -> None:
+    """Проверить/создать бакет. Вызывается один раз при старте."""
+    client = get_minio_client()
+    if not client.bucket_exists(settings.MINIO_BUCKET):
+        client.make_bucket(settings.MINIO_BUCKET)
+
+
+def close_minio_client() -> None:
+    """Закрыть пул соединений (shutdown приложения)."""
+    global _client, _http_client
+
+    with _client_lock:
+        if _http_client is not None:
+            _http_client.clear()
+        _client = None
+        _http_client = None
+
+
+def get_pool_stats() -> dict:
+    """Метрики использования urllib3-пула MinIO."""
+    if _http_client is None:
+        return {"initialized": False, "pools": []}
+
+    pools = []
+    for key in list(_http_client.pools.keys()):
+        pool = _http_client.pools.get(key)
+        if pool is None:
+            continue
+        idle = sum(1 for conn in list(pool.pool.queue) if conn is not None)
+        pools.append(
+            {
+                "host": f"{pool.host}:{pool.port}",
+                "maxsize": pool.pool.maxsize,
+                "connections_created": pool.num_connections,
+                "requests": pool.num_requests,
+                "idle_connections": idle,
+            }
         )
-        self.bucket = settings.MINIO_BUCKET
 
-        if not self.client.bucket_exists(self.bucket):
-            self.client.make_bucket(self.bucket)
+    return {"initialized": True, "pools": pools}
+
+
+# ══════════════════════════════════════════════════════════════════
+# Кэш presigned URL
+# ══════════════════════════════════════════════════════════════════
+# WHY: подпись SigV4 считается на каждый вызов, а URL каждый раз
+# новый — браузер не может закэшировать превью. Подписываем с
+# request_date, выровненной по окну (PRESIGNED_URL_WINDOW_SECONDS):
+# внутри окна URL стабилен и берётся из кэша, с новым окном —
+# подписывается заново. Ссылка остаётся валидной минимум
+# expires - window секунд.
+# ══════════════════════════════════════════════════════════════════
+
+
+class PresignedUrlCache:
+    """Потокобезопасный LRU-кэш подписанных URL с TTL."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[str, int, int], Tuple[str, float]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, int, int], now: float) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            url, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return url
+
+    def put(self, key: Tuple[str, int, int], url: str, expires_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (url, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+REMOVE_OBJECTS_BATCH_SIZE = 1000
+
+_url_cache = PresignedUrlCache(max_size=settings.PRESIGNED_URL_CACHE_SIZE)
+
+
+def get_url_cache() -> PresignedUrlCache:
+    return _url_cache
+
+
+class StorageService:
+    def __init__(self, client: Optional[Minio] = None):
+        self.client = client or get_minio_client()
+        self.bucket = settings.MINIO_BUCKET
 
     def build_object_name(self, user_id: int, filename: str) -> str:
         clean_name = os.path.basename(filename)
         file_uuid = uuid.uuid4()
         return f"{user_id}/{file_uuid}/{clean_name}"
 
-    def upload_fileobj(self, file_obj: IO, filename: str, user_id: int) -> str:
+    def upload_fileobj(
+        self,
+        file_obj: IO,
+        filename: str,
+        user_id: int,
+        content_type: str = "application/octet-stream",
+    ) -> str:
         object_name = self.build_object_name(user_id, filename)
 
         file_obj.seek(0, 2)
@@ -39,26 +203,71 @@ class StorageService:
             file_obj,
             length=size,
             part_size=10 * 1024 * 1024,
+            content_type=content_type,
         )
 
         return object_name
 
-    def upload_bytes(self, data: bytes, filename: str, user_id: int) -> str:
+    def upload_bytes(
+        self,
+        data: bytes,
+        filename: str,
+        user_id: int,
+        content_type: str = "application/octet-stream",
+    ) -> str:
         """Залить готовые байты как объект."""
         buf = io.BytesIO(data)
-        return self.upload_fileobj(buf, filename, user_id)
+        return self.upload_fileobj(buf, filename, user_id, content_type=content_type)
+
+    def put_bytes(
+        self,
+        object_name: str,
+        data: bytes,
+        content_type: str = "application/octet-stream",
+    ) -> str:
+        """Залить байты под заданным именем (служебные префиксы, не "<user_id>/")."""
+        self.client.put_object(
+            self.bucket,
+            object_name,
+            io.BytesIO(data),
+            length=len(data),
+            content_type=content_type,
+        )
+        return object_name
 
     def get_file_stream(self, object_name: str):
         """Стрим для скачивания через StreamingResponse."""
         return self.client.get_object(self.bucket, object_name)
 
     def get_presigned_url(self, object_name: str, expires: int = 3600) -> str:
-        """Pre-signed URL для безопасного доступа к файлу."""
-        return self.client.presigned_get_object(
-            self.bucket,
-            object_name,
-            expires=timedelta(seconds=expires),
-        )
+        """Pre-signed URL для безопасного доступа к файлу (кэшируется по окну)."""
+        return self.get_presigned_urls([object_name], expires)[object_name]
+
+    def get_presigned_urls(
+        self, object_names: Iterable[str], expires: int = 3600
+    ) -> Dict[str, str]:
+        """Пакетная подпись URL для целой страницы списка."""
+        now = time.time()
+        window = max(1, min(settings.PRESIGNED_URL_WINDOW_SECONDS, expires // 2))
+        window_start = int(now // window) * window
+        request_date = datetime.fromtimestamp(window_start, tz=timezone.utc)
+
+        urls: Dict[str, str] = {}
+        for name in object_names:
+            if name in urls:
+                continue
+            key = (name, expires, window_start)
+            url = _url_cache.get(key, now)
+            if url is None:
+                url = self.client.presigned_get_object(
+                    self.bucket,
+                    name,
+                    expires=timedelta(seconds=expires),
+                    request_date=request_date,
+                )
+                _url_cache.put(key, url, expires_at=window_start + window)
+            urls[name] = url
+        return urls
 
     def download_bytes(self, object_name: str) -> bytes:
         """Скачать объект как bytes (для обработки)."""
@@ -73,3 +282,37 @@ class StorageService:
     def delete_object(self, object_name: str) -> None:
         """Удалить объект из хранилища."""
         self.client.remove_object(self.bucket, object_name)
+
+    def list_prefixes(self) -> Iterator[str]:
+        """Префиксы верхнего уровня ("<user_id>/") — потоково."""
+        for obj in self.client.list_objects(self.bucket, recursive=False):
+            if obj.is_dir:
+                yield obj.object_name
+
+    def iter_objects(self, prefix: str) -> Iterator[Tuple[str, Optional[datetime]]]:
+        """Все объекты под префиксом: (имя, last_modified) — потоково."""
+        for obj in self.client.list_objects(self.bucket, prefix=prefix, recursive=True):
+            if not obj.is_dir:
+                yield obj.object_name, obj.last_modified
+
+    def delete_objects(self, object_names: Iterable[str]) -> List[Tuple[str, str]]:
+        """
+        Пакетное удаление (S3 DeleteObjects, до 1000 ключей за запрос).
+        Возвращает список неудач: (object_name, сообщение).
+        """
+        names = list(dict.fromkeys(object_names))
+        failures: List[Tuple[str, str]] = []
+
+        for i in range(0, len(names), REMOVE_OBJECTS_BATCH_SIZE):
+            batch = names[i:i + REMOVE_OBJECTS_BATCH_SIZE]
+            try:
+                # remove_objects ленивый — ошибки приходят только при итерации
+                errors = self.client.remove_objects(
+                    self.bucket, (DeleteObject(name) for name in batch)
+                )
+                for error in errors:
+                    failures.append((error.name, f"{error.code}: {error.message}"))
+            except Exception as e:
+                failures.extend((name, str(e)) for name in batch)
+
+        return failures
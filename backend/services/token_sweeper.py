@@ -0,0 +1,96 @@
+"""
+Очистка таблицы refresh_tokens.
+
+Каждый логин и refresh добавляет строку, а раньше ничего не удалялось —
+таблица росла без предела, и вместе с ней время refresh. Sweeper
+удаляет пачками (REFRESH_TOKEN_SWEEP_BATCH_SIZE, коммит на пачку):
+- expired    — expires_at в прошлом;
+- revoked    — отозваны ротацией/logout раньше, чем
+               REFRESH_TOKEN_REUSE_WINDOW_HOURS назад (до этого строка
+               нужна, чтобы распознать повторное использование токена);
+- superseded — поколение старше users.token_version (revoke-all).
+
+В приложении работает фоновой задачей раз в
+REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS; несколько воркеров не мешают
+друг другу — удаление идемпотентно.
+
+Запуск вручную:
+    python -m services.token_sweeper
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.database import SessionLocal
+from repositories.token_repository import SWEEP_KINDS, TokenRepository
+
+logger = logging.getLogger(__name__)
+
+
+class TokenSweeper:
+    """Пакетное удаление ненужных refresh-токенов."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        batch_size: Optional[int] = None,
+        reuse_window: Optional[timedelta] = None,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.REFRESH_TOKEN_SWEEP_BATCH_SIZE
+        self.reuse_window = reuse_window or timedelta(hours=settings.REFRESH_TOKEN_REUSE_WINDOW_HOURS)
+
+    def sweep(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        now = now or datetime.utcnow()
+        revoked_before = now - self.reuse_window
+        report = {kind: 0 for kind in SWEEP_KINDS}
+
+        db = self.session_factory()
+        try:
+            repo = TokenRepository(db)
+            for kind in SWEEP_KINDS:
+                while True:
+                    deleted = repo.delete_batch(kind, now, revoked_before, self.batch_size)
+                    report[kind] += deleted
+                    if deleted < self.batch_size:
+                        break
+        finally:
+            db.close()
+
+        if any(report.values()):
+            logger.info(f"[TOKENS] Swept refresh tokens: {report}")
+        return report
+
+
+async def run_token_sweeper(sweeper: TokenSweeper, interval_seconds: float) -> None:
+    """Фоновый цикл: ошибка одного прогона не останавливает следующие."""
+    while True:
+        try:
+            await run_in_threadpool(sweeper.sweep)
+        except Exception as e:
+            logger.warning(f"[TOKENS] Refresh token sweep failed: {e}")
+        await asyncio.sleep(interval_seconds)
+
+
+def start_token_sweeper() -> Optional[asyncio.Task]:
+    if settings.REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS <= 0:
+        return None
+    return asyncio.create_task(
+        run_token_sweeper(TokenSweeper(), settings.REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS)
+    )
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO)
+    print(TokenSweeper().sweep())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
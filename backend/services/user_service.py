@@ -1,8 +1,12 @@
+from typing import List, Optional
+
 from fastapi import HTTPException, status
 
 from models.models import User
 from repositories.user_repository import UserRepository
 from repositories.token_repository import TokenRepository
+from repositories.media_repository import MediaRepository
+from services.principal_cache import invalidate_user
 
 VALID_ROLES = {"user", "admin"}
 
@@ -10,9 +14,15 @@ VALID_ROLES = {"user", "admin"}
 class UserService:
     """Бизнес-логика работы с пользователями."""
 
-    def __init__(self, user_repo: UserRepository, token_repo: TokenRepository):
+    def __init__(
+        self,
+        user_repo: UserRepository,
+        token_repo: TokenRepository,
+        media_repo: Optional[MediaRepository] = None,
+    ):
         self.user_repo = user_repo
         self.token_repo = token_repo
+        self.media_repo = media_repo
 
     def list_all(self) -> list[User]:
         return self.user_repo.get_all()
@@ -43,12 +53,18 @@ class UserService:
 
         self.user_repo.update_role(user, new_role)
 
-        # Отзываем все сессии — пользователь перелогинится с новой ролью
+        # Отзываем все сессии — пользователь перелогинится с новой ролью;
+        # новое поколение гасит и уже выданные access-токены со старой role
         self.token_repo.revoke_all_for_user(user.id)
+        invalidate_user(user.id)
 
         return user
 
-    def delete_user(self, user_id: int, current_user: User) -> None:
+    def delete_user(self, user_id: int, current_user: User) -> List[str]:
+        """
+        Удалить пользователя вместе с его медиа.
+        Возвращает имена объектов хранилища, которые нужно удалить.
+        """
         user = self.get_by_id(user_id)
 
         if user.id == current_user.id:
@@ -57,4 +73,14 @@ class UserService:
                 detail="Cannot delete yourself",
             )
 
-        self.user_repo.delete(user)
+        # Медиа и пользователь — одна транзакция: коммит один, в user_repo.delete
+        object_names: List[str] = []
+        try:
+            if self.media_repo is not None:
+                object_names = self.media_repo.delete_by_user(user.id)
+            self.user_repo.delete(user)
+        except Exception:
+            self.user_repo.db.rollback()
+            raise
+        invalidate_user(user_id)
+        return object_names
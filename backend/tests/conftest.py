@@ -1,6 +1,7 @@
 import io
 import os
 import sys
+from datetime import datetime
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
@@ -10,6 +11,7 @@ os.environ.setdefault("MINIO_ACCESS_KEY", "test")
 os.environ.setdefault("MINIO_SECRET_KEY", "testsecret")
 
 import pytest  # noqa: E402
+from PIL import Image  # noqa: E402
 from fastapi.testclient import TestClient  # noqa: E402
 from sqlalchemy import create_engine, event  # noqa: E402
 from sqlalchemy.orm import sessionmaker  # noqa: E402
@@ -22,6 +24,10 @@ from repositories.media_repository import MediaRepository  # noqa: E402
 from routers.media import get_media_service  # noqa: E402
 from services.auth_service import hash_password  # noqa: E402
 from services.media_service import MediaService  # noqa: E402
+from services.principal_cache import (  # noqa: E402
+    get_principal_cache,
+    get_token_version_cache,
+)
 
 
 engine = create_engine(
@@ -66,17 +72,24 @@ class FakeStorage:
         self.deleted = []
         self.uploaded = []
 
-    def upload_fileobj(self, file_obj, filename, user_id):
+    def upload_fileobj(self, file_obj, filename, user_id, content_type=None):
         self.uploaded.append((filename, user_id))
         return f"{user_id}/original/{filename}"
 
-    def upload_bytes(self, data, filename, user_id):
+    def upload_bytes(self, data, filename, user_id, content_type=None):
         self.uploaded.append((filename, user_id))
         return f"{user_id}/processed/{filename}"
 
+    def put_bytes(self, object_name, data, content_type=None):
+        self.uploaded.append((object_name, None))
+        return object_name
+
     def get_presigned_url(self, object_name, expires=3600):
         return f"http://test.local/{object_name}?expires={expires}"
 
+    def get_presigned_urls(self, object_names, expires=3600):
+        return {name: self.get_presigned_url(name, expires) for name in object_names}
+
     def get_file_stream(self, object_name):
         return FakeFile(b"download-data")
 
@@ -86,6 +99,27 @@ class FakeStorage:
     def delete_object(self, object_name):
         self.deleted.append(object_name)
 
+    def delete_objects(self, object_names):
+        self.deleted.extend(object_names)
+        return []
+
+
+class Clock:
+    """Управляемое время для clock= у сервисов: тест двигает clock.now."""
+
+    def __init__(self):
+        self.now = datetime(2026, 1, 1)
+
+    def __call__(self):
+        return self.now
+
+
+def make_image_bytes(size=(64, 48)):
+    """Небольшой настоящий JPEG — для download_bytes в тестах обработки."""
+    buf = io.BytesIO()
+    Image.new("RGB", size, (10, 20, 30)).save(buf, format="JPEG")
+    return buf.getvalue()
+
 
 @pytest.fixture
 def db_session():
@@ -119,6 +153,9 @@ def fake_storage(monkeypatch):
 def setup_database(fake_storage):
     app.dependency_overrides[get_db] = override_get_db
     Base.metadata.create_all(bind=engine)
+    # id пользователей повторяются между тестами — кэш не должен их помнить
+    get_principal_cache().clear()
+    get_token_version_cache().clear()
     yield
     Base.metadata.drop_all(bind=engine)
     app.dependency_overrides.clear()
@@ -177,6 +214,7 @@ def create_media_in_db(
         content_type=content_type,
         description=description,
         bg_removed=bg_removed,
+        processing_status="done" if processed else "queued",
     )
     db.add(item)
     db.commit()
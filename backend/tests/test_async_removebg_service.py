@@ -0,0 +1,309 @@
+import asyncio
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from services import async_removebg_service
+from services.async_removebg_service import (
+    AsyncRemoveBgService,
+    LoopBoundRemoveBgService,
+    bind_removebg_loop,
+    unbind_removebg_loop,
+)
+from services.rate_limiter import GcraRateLimiter
+from services.removebg_service import (
+    RemoveBgQuotaError,
+    RemoveBgRateLimitError,
+    RemoveBgService,
+)
+
+PNG = b"\x89PNG\r\n\x1a\nstub"
+
+
+class FakeRemoveBg(BaseHTTPRequestHandler):
+    """
+    Заглушка Remove.bg со сценарием: каждый запрос берёт следующий
+    шаг (status, headers, delay); когда сценарий кончился — 200.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        state = self.server.state
+        self.rfile.read(int(self.headers["Content-Length"]))
+        with state["lock"]:
+            step = state["script"].pop(0) if state["script"] else (200, {}, 0)
+            state["requests"] += 1
+            state["active"] += 1
+            state["max_active"] = max(state["max_active"], state["active"])
+        status, headers, delay = step
+        try:
+            time.sleep(delay)
+            payload = PNG if status == 200 else b'{"errors": [{"title": "stub"}]}'
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with state["lock"]:
+                state["active"] -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_api():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeRemoveBg)
+    server.daemon_threads = True
+    server.state = {"lock": threading.Lock(), "script": [], "requests": 0, "active": 0, "max_active": 0}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.state, f"http://127.0.0.1:{server.server_port}/v1.0/removebg"
+    server.shutdown()
+    server.server_close()
+
+
+def make_sync_service(url, max_retries=2):
+    service = RemoveBgService(rate_limiter=GcraRateLimiter(key="fake", rate=100_000), api_url=url)
+    service.api_key = "test-key"
+    service.enabled = True
+    service.max_retries = max_retries
+    service.backoff_base = 0.01
+    service.backoff_max = 0.05
+    return service
+
+
+def run_with_client(url, scenario, read_timeout=5.0, **kwargs):
+    async def _run():
+        timeout = httpx.Timeout(5.0, read=read_timeout)
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            service = AsyncRemoveBgService(service=make_sync_service(url, **kwargs), client=client)
+            return await scenario(service)
+
+    return asyncio.run(_run())
+
+
+@pytest.fixture
+def app_loop():
+    """Event loop «приложения» в отдельном потоке, привязанный для пайплайна."""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    bind_removebg_loop(loop)
+    yield loop
+    unbind_removebg_loop()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def make_loop_bound_service(url, loop, max_concurrency=4, **kwargs):
+    async def _build():
+        client = httpx.AsyncClient(timeout=httpx.Timeout(5.0))
+        return AsyncRemoveBgService(
+            service=make_sync_service(url, **kwargs), client=client, max_concurrency=max_concurrency
+        )
+
+    async_service = asyncio.run_coroutine_threadsafe(_build(), loop).result()
+    return LoopBoundRemoveBgService(async_service.service, async_service)
+
+
+def call_from_threads(func, count):
+    results = [None] * count
+
+    def _worker(i):
+        try:
+            results[i] = func()
+        except BaseException as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=_worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+@pytest.mark.unit
+class TestBackoff:
+    def test_backoff_is_jittered_exponential_and_capped(self):
+        service = make_sync_service("http://unused")
+        service.backoff_base, service.backoff_max = 1.0, 4.0
+        random.seed(0)
+
+        delays = [service.backoff_delay(attempt) for attempt in range(5)]
+
+        assert 0.5 <= delays[0] <= 1.0
+        assert 1.0 <= delays[1] <= 2.0
+        assert all(2.0 <= d <= 4.0 for d in delays[2:])
+        assert len({round(d, 6) for d in delays}) == len(delays)
+
+    def test_retry_after_is_a_lower_bound(self):
+        service = make_sync_service("http://unused")
+
+        assert service.backoff_delay(0, retry_after=7) == 7
+
+
+@pytest.mark.integration
+class TestAsyncRemoveBg:
+    def test_success(self, fake_api):
+        state, url = fake_api
+
+        result = run_with_client(url, lambda s: s.remove_background(b"img"))
+
+        assert result.success and result.image_data == PNG
+        assert state["requests"] == 1
+
+    def test_retries_5xx_then_succeeds(self, fake_api):
+        state, url = fake_api
+        state["script"] = [(503, {}, 0), (502, {}, 0)]
+
+        result = run_with_client(url, lambda s: s.remove_background(b"img"))
+
+        assert result.success
+        assert state["requests"] == 3
+
+    def test_429_honours_retry_after_and_retries(self, fake_api):
+        state, url = fake_api
+        state["script"] = [(429, {"Retry-After": "1"}, 0)]
+
+        started = time.perf_counter()
+        result = run_with_client(url, lambda s: s.remove_background(b"img"))
+
+        assert result.success
+        assert time.perf_counter() - started >= 0.9
+        assert state["requests"] == 2
+
+    def test_429_on_last_attempt_raises(self, fake_api):
+        state, url = fake_api
+        state["script"] = [(429, {"Retry-After": "1"}, 0)]
+
+        with pytest.raises(RemoveBgRateLimitError):
+            run_with_client(url, lambda s: s.remove_background(b"img"), max_retries=0)
+
+    def test_timeouts_are_retried_then_reported(self, fake_api):
+        state, url = fake_api
+        state["script"] = [(200, {}, 0.5)] * 3
+
+        result = run_with_client(url, lambda s: s.remove_background(b"img"), read_timeout=0.1)
+
+        assert not result.success
+        assert "Timeout" in result.error_message
+        assert state["requests"] == 3
+
+    def test_quota_error_is_not_retried(self, fake_api):
+        state, url = fake_api
+        state["script"] = [(402, {}, 0)]
+
+        with pytest.raises(RemoveBgQuotaError):
+            run_with_client(url, lambda s: s.remove_background(b"img"))
+        assert state["requests"] == 1
+
+    def test_concurrency_is_bounded_by_semaphore(self, fake_api):
+        state, url = fake_api
+        state["script"] = [(200, {}, 0.1)] * 8
+
+        async def scenario(service):
+            service._slots = asyncio.Semaphore(2)
+            return await asyncio.gather(*(service.remove_background(b"img") for _ in range(8)))
+
+        results = run_with_client(url, scenario)
+
+        assert all(r.success for r in results)
+        assert state["max_active"] == 2
+
+    def test_cancellation_releases_the_slot(self, fake_api):
+        state, url = fake_api
+        state["script"] = [(200, {}, 2.0)]
+
+        async def scenario(service):
+            task = asyncio.create_task(service.remove_background(b"img"))
+            await asyncio.sleep(0.2)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return service
+
+        service = run_with_client(url, scenario)
+
+        assert service.in_flight == 0
+        assert not service._slots.locked()
+
+
+@pytest.mark.integration
+class TestLoopBoundRemoveBg:
+    def test_pipeline_threads_share_the_async_client_and_semaphore(self, fake_api, app_loop):
+        state, url = fake_api
+        state["script"] = [(200, {}, 0.1)] * 6
+        service = make_loop_bound_service(url, app_loop, max_concurrency=2)
+
+        results = call_from_threads(lambda: service.remove_background(b"img"), 6)
+
+        assert all(r.success and r.image_data == PNG for r in results)
+        assert state["max_active"] == 2
+        assert service._async_service.in_flight == 0
+
+    def test_backoff_waits_on_the_loop_not_with_time_sleep(self, fake_api, app_loop, monkeypatch):
+        state, url = fake_api
+        state["script"] = [(503, {}, 0)]
+        service = make_loop_bound_service(url, app_loop)
+        sleeping_threads = []
+        real_sleep = time.sleep
+
+        def recording_sleep(seconds):
+            sleeping_threads.append(threading.current_thread())
+            real_sleep(seconds)
+
+        monkeypatch.setattr(time, "sleep", recording_sleep)
+
+        result = service.remove_background(b"img")
+
+        assert result.success
+        assert state["requests"] == 2
+        assert threading.current_thread() not in sleeping_threads
+
+    def test_errors_reach_the_calling_thread(self, fake_api, app_loop):
+        state, url = fake_api
+        state["script"] = [(402, {}, 0)]
+        service = make_loop_bound_service(url, app_loop)
+
+        with pytest.raises(RemoveBgQuotaError):
+            service.remove_background(b"img")
+
+    def test_without_app_loop_falls_back_to_sync_client(self, fake_api, monkeypatch):
+        state, url = fake_api
+        monkeypatch.setattr(async_removebg_service, "_app_loop", None)
+        service = LoopBoundRemoveBgService(make_sync_service(url))
+
+        with httpx.Client() as client:
+            service.service._http_client = client
+            result = service.remove_background(b"img")
+
+        assert result.success
+        assert state["requests"] == 1
+
+    def test_unbinding_cancels_calls_in_flight(self, fake_api, app_loop):
+        state, url = fake_api
+        state["script"] = [(200, {}, 2.0)]
+        service = make_loop_bound_service(url, app_loop)
+
+        def unbind_later():
+            time.sleep(0.2)
+            unbind_removebg_loop()
+
+        threading.Thread(target=unbind_later).start()
+        started = time.perf_counter()
+        (outcome,) = call_from_threads(lambda: service.remove_background(b"img"), 1)
+
+        assert isinstance(outcome, asyncio.CancelledError)
+        assert time.perf_counter() - started < 1.5
@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from core.async_database import build_async_engine, to_async_url
+from core.database import Base
+from repositories.media_repository import AsyncMediaRepository
+from repositories.token_repository import AsyncTokenRepository
+from repositories.user_repository import AsyncUserRepository
+
+pytest.importorskip("aiosqlite")
+
+
+@pytest.fixture
+def async_sessions(tmp_path):
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    sync_engine = create_engine(url)
+    Base.metadata.create_all(bind=sync_engine)
+    sync_engine.dispose()
+
+    engine = build_async_engine(url)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+def run(sessions, scenario):
+    async def _run():
+        async with sessions() as db:
+            return await scenario(db)
+
+    return asyncio.run(_run())
+
+
+@pytest.mark.unit
+class TestAsyncUrl:
+    @pytest.mark.parametrize(
+        "url,expected",
+        [
+            ("sqlite:///./app.db", "sqlite+aiosqlite:///./app.db"),
+            ("postgresql://u:p@db/app", "postgresql+asyncpg://u:p@db/app"),
+            ("postgresql+psycopg2://u:p@db/app", "postgresql+asyncpg://u:p@db/app"),
+        ],
+    )
+    def test_sync_url_is_mapped_to_async_driver(self, url, expected):
+        assert to_async_url(url) == expected
+
+    def test_unknown_backend_raises(self):
+        with pytest.raises(ValueError):
+            to_async_url("mysql://u:p@db/app")
+
+
+@pytest.mark.integration
+class TestAsyncRepositories:
+    def test_user_crud(self, async_sessions):
+        async def scenario(db):
+            repo = AsyncUserRepository(db)
+            user = await repo.create("alice", "alice@test.com", "hash")
+            assert (await repo.get_by_email("alice@test.com")).id == user.id
+            assert (await repo.get_by_username("alice")).id == user.id
+
+            await repo.update_role(user, "admin")
+            assert (await repo.get_by_id(user.id)).role == "admin"
+
+            await repo.delete(user)
+            return await repo.get_all()
+
+        assert run(async_sessions, scenario) == []
+
+    def test_refresh_tokens_revoke_all(self, async_sessions):
+        async def scenario(db):
+            user = await AsyncUserRepository(db).create("bob", "bob@test.com", "hash")
+            repo = AsyncTokenRepository(db)
+            await repo.create(user.id, "h1", "ua")
+            await repo.create(user.id, "h2", "ua")
+
+            await repo.revoke_all_for_user(user.id)
+            db.expire_all()
+            return [await repo.is_revoked(await repo.get_by_hash(h)) for h in ("h1", "h2")]
+
+        assert run(async_sessions, scenario) == [True, True]
+
+    def test_media_listing_filters_paginates_and_searches(self, async_sessions):
+        async def scenario(db):
+            user = await AsyncUserRepository(db).create("carol", "c@test.com", "hash")
+            repo = AsyncMediaRepository(db)
+            for i in range(5):
+                await repo.create(user.id, f"{user.id}/original/f{i}.jpg", f"beach_{i}.jpg")
+            await repo.create(user.id, f"{user.id}/original/cat.jpg", "cat.jpg")
+
+            page, total, has_more = await repo.get_filtered(
+                user_id=user.id, search="beach", sort_by="id", sort_order="asc", page_size=2
+            )
+            last = page[-1]
+            rest, _, _ = await repo.get_filtered(
+                user_id=user.id,
+                search="beach",
+                sort_by="id",
+                sort_order="asc",
+                page_size=10,
+                after=(last.id, last.id),
+            )
+            return total, has_more, len(page), len(rest)
+
+        assert run(async_sessions, scenario) == (5, True, 2, 3)
+
+    def test_media_bulk_delete_returns_object_names(self, async_sessions):
+        async def scenario(db):
+            user = await AsyncUserRepository(db).create("dave", "d@test.com", "hash")
+            repo = AsyncMediaRepository(db)
+            items = [
+                await repo.create(user.id, f"{user.id}/original/f{i}.jpg", f"f{i}.jpg")
+                for i in range(3)
+            ]
+            ids = await repo.get_ids_filtered(user_id=user.id)
+            names = await repo.get_object_names(ids[:1])
+            deleted = await repo.delete_by_ids(ids[:1])
+            remaining = await repo.delete_by_user(user.id)
+            return names, deleted, len(remaining), len(items)
+
+        names, deleted, remaining, created = run(async_sessions, scenario)
+        assert deleted == 1
+        assert len(names) == 1
+        assert remaining == created - 1
@@ -0,0 +1,105 @@
+import asyncio
+import io
+import time
+
+import pytest
+
+from repositories.media_repository import MediaRepository
+from services.async_storage_service import AsyncStorageService
+from services.media_service import MediaService
+from tests.conftest import FakeStorage, create_user_in_db
+
+UPLOAD_SECONDS = 0.3
+
+
+class SlowStorage(FakeStorage):
+    """Имитирует блокирующий put_object в MinIO."""
+
+    def upload_fileobj(self, file_obj, filename, user_id, content_type=None):
+        time.sleep(UPLOAD_SECONDS)
+        return super().upload_fileobj(file_obj, filename, user_id, content_type)
+
+
+class TypeRecordingStorage(FakeStorage):
+    def __init__(self):
+        super().__init__()
+        self.content_types = []
+
+    def upload_fileobj(self, file_obj, filename, user_id, content_type=None):
+        self.content_types.append(content_type)
+        return super().upload_fileobj(file_obj, filename, user_id, content_type)
+
+    def upload_bytes(self, data, filename, user_id, content_type=None):
+        self.content_types.append(content_type)
+        return super().upload_bytes(data, filename, user_id, content_type)
+
+
+@pytest.mark.unit
+class TestAsyncStorageService:
+    def test_concurrent_uploads_do_not_serialize_on_event_loop(self):
+        storage = AsyncStorageService(SlowStorage())
+        ticks = []
+
+        async def heartbeat():
+            while True:
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        async def scenario():
+            beat = asyncio.create_task(heartbeat())
+            started = time.perf_counter()
+            names = await asyncio.gather(
+                *(
+                    storage.upload_fileobj(io.BytesIO(b"x"), f"f{i}.jpg", 1)
+                    for i in range(4)
+                )
+            )
+            elapsed = time.perf_counter() - started
+            beat.cancel()
+            return names, elapsed
+
+        names, elapsed = asyncio.run(scenario())
+
+        assert len(names) == 4
+        # 4 последовательные загрузки заняли бы 4 * UPLOAD_SECONDS
+        assert elapsed < UPLOAD_SECONDS * 2
+        # Пока шли загрузки, loop продолжал обслуживать другие корутины
+        assert len(ticks) >= 10
+
+    def test_upload_async_creates_media(self, db_session):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+        storage = FakeStorage()
+        service = MediaService(media_repo=MediaRepository(db_session), storage=storage)
+
+        item, response = asyncio.run(
+            service.upload_async(
+                file_obj=io.BytesIO(b"img"),
+                filename="photo.jpg",
+                content_type="image/jpeg",
+                file_size=3,
+                user_id=user.id,
+            )
+        )
+
+        assert item.id is not None
+        assert response.original_filename == "photo.jpg"
+        assert storage.uploaded == [("photo.jpg", user.id)]
+
+    def test_content_type_is_forwarded(self, db_session):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+        storage = TypeRecordingStorage()
+        service = MediaService(media_repo=MediaRepository(db_session), storage=storage)
+
+        async def scenario():
+            await service.upload_async(
+                file_obj=io.BytesIO(b"img"),
+                filename="photo.png",
+                content_type="image/png",
+                file_size=3,
+                user_id=user.id,
+            )
+            await service.async_storage.upload_bytes(b"x", "frame.webp", user.id, content_type="image/webp")
+
+        asyncio.run(scenario())
+
+        assert storage.content_types == ["image/png", "image/webp"]
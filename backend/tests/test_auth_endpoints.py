@@ -1,6 +1,10 @@
 import pytest
+from jose import jwt
+from sqlalchemy import event
 
-from tests.conftest import create_user_in_db, login_full, login_user, auth_header
+from core.config import settings
+from services.jwt_service import create_access_token
+from tests.conftest import create_user_in_db, engine, login_full, login_user, auth_header
 
 
 @pytest.mark.integration
@@ -96,3 +100,55 @@ class TestAuthEndpoints:
         resp = client.get("/api/users/me", headers=auth_header(rt))
 
         assert resp.status_code == 401
+
+
+@pytest.mark.security
+class TestStatelessAccessClaims:
+    def _claims(self, token):
+        return jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+
+    def test_access_token_carries_role_and_version(self, client, db_session):
+        create_user_in_db(db_session, "admin", "admin@test.com", "password123", role="admin")
+
+        claims = self._claims(login_user(client, "admin@test.com", "password123"))
+
+        assert claims["role"] == "admin"
+        assert claims["ver"] == 0
+
+    def test_role_check_uses_claims_without_user_row(self, client, db_session):
+        create_user_in_db(db_session, "admin", "admin@test.com", "password123", role="admin")
+        token = login_user(client, "admin@test.com", "password123")
+        client.get("/api/media/", headers=auth_header(token))  # прогрев кэша версий
+
+        statements = []
+
+        def _capture(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", _capture)
+        try:
+            resp = client.get("/api/media/", headers=auth_header(token))
+        finally:
+            event.remove(engine, "before_cursor_execute", _capture)
+
+        assert resp.status_code == 200
+        assert not any("FROM users" in s for s in statements)
+
+    def test_token_reuse_detection_revokes_access_tokens(self, client, db_session):
+        create_user_in_db(db_session, "user1", "user1@test.com", "password123")
+        access, refresh = login_full(client, "user1@test.com", "password123")
+        client.post("/api/auth/refresh", json={"refresh_token": refresh})
+
+        reuse = client.post("/api/auth/refresh", json={"refresh_token": refresh})
+
+        assert reuse.status_code == 401
+        assert client.get("/api/users/me", headers=auth_header(access)).status_code == 401
+
+    def test_tokens_without_claims_still_work(self, client, db_session):
+        user = create_user_in_db(db_session, "user1", "user1@test.com", "password123")
+        legacy = create_access_token({"sub": str(user.id)})
+
+        resp = client.get("/api/users/me", headers=auth_header(legacy))
+
+        assert resp.status_code == 200
+        assert resp.json()["username"] == "user1"
@@ -0,0 +1,104 @@
+import io
+
+import pytest
+from PIL import Image
+
+from core.config import settings
+from services import processing_service
+from services.bg_matte import apply_matte, extract_matte, prepare_upload
+from services.removebg_service import RemoveBgResult, RemoveBgService
+
+
+def encode(image: Image.Image, fmt: str = "PNG") -> bytes:
+    buf = io.BytesIO()
+    image.save(buf, format=fmt)
+    return buf.getvalue()
+
+
+def half_matte(size) -> Image.Image:
+    """Левая половина — передний план."""
+    matte = Image.new("L", size, 0)
+    matte.paste(255, (0, 0, size[0] // 2, size[1]))
+    return matte
+
+
+class MatteApi:
+    """Remove.bg с channels=alpha: отвечает маской в размере входа."""
+
+    cacheable = False
+
+    def __init__(self):
+        self.uploads = []
+
+    def is_available(self):
+        return True
+
+    def request_params(self):
+        return {"channels": "alpha"}
+
+    def remove_background(self, image_data):
+        self.uploads.append(image_data)
+        size = Image.open(io.BytesIO(image_data)).size
+        return RemoveBgResult(success=True, image_data=encode(half_matte(size)))
+
+
+@pytest.mark.unit
+class TestBgMatte:
+    def test_large_image_is_downscaled_to_jpeg(self):
+        image = Image.new("RGB", (4000, 2000), (10, 120, 200))
+        original = encode(image)
+
+        upload, downscaled = prepare_upload(image, original, 1000)
+
+        assert downscaled
+        small = Image.open(io.BytesIO(upload))
+        assert small.format == "JPEG"
+        assert small.size == (1000, 500)
+        assert len(upload) < len(original)
+
+    @pytest.mark.parametrize("max_side", [0, 5000])
+    def test_small_image_or_disabled_is_sent_as_is(self, max_side):
+        image = Image.new("RGB", (400, 300))
+        original = encode(image)
+
+        assert prepare_upload(image, original, max_side) == (original, False)
+
+    def test_matte_from_rgba_result_is_alpha_channel(self):
+        rgba = Image.new("RGBA", (4, 4), (1, 2, 3, 77))
+
+        assert extract_matte(encode(rgba)).getpixel((0, 0)) == 77
+
+    def test_matte_is_upscaled_onto_full_resolution_original(self):
+        image = Image.new("RGB", (800, 400), (200, 10, 10))
+
+        output = Image.open(io.BytesIO(apply_matte(image, half_matte((200, 100)))))
+
+        assert output.mode == "RGBA" and output.size == (800, 400)
+        assert output.getpixel((10, 200)) == (200, 10, 10, 255)
+        assert output.getpixel((790, 200))[3] == 0
+
+    def test_jpeg_upload_is_labelled_as_jpeg(self):
+        jpeg = encode(Image.new("RGB", (4, 4)), "JPEG")
+        service = RemoveBgService()
+
+        name, _, content_type = service.build_request_kwargs(jpeg)["files"]["image_file"]
+        assert (name, content_type) == ("image.jpg", "image/jpeg")
+        assert service.request_params()["channels"] == settings.REMOVEBG_CHANNELS
+
+
+@pytest.mark.integration
+class TestDownscaledRemoveBg:
+    def test_api_gets_small_copy_and_output_keeps_full_resolution(self, monkeypatch):
+        api = MatteApi()
+        monkeypatch.setattr(processing_service, "get_removebg_service", lambda: api)
+        monkeypatch.setattr(settings, "REMOVEBG_UPLOAD_MAX_SIDE", 500)
+        original = encode(Image.new("RGB", (2000, 1000), (0, 200, 0)))
+
+        data, ok = processing_service._apply_remove_bg(original)
+
+        assert ok
+        assert Image.open(io.BytesIO(api.uploads[0])).size == (500, 250)
+        output = Image.open(io.BytesIO(data))
+        assert output.size == (2000, 1000)
+        assert output.getpixel((100, 500)) == (0, 200, 0, 255)
+        assert output.getpixel((1900, 500))[3] == 0
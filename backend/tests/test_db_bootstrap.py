@@ -0,0 +1,149 @@
+import threading
+
+import pytest
+from alembic import command
+from alembic.script import ScriptDirectory
+from datetime import datetime
+
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from core.database import Base, build_engine
+from core.db_bootstrap import alembic_config, run_migrations
+from models.models import MediaItem, ProcessingJob, User
+from repositories.job_repository import JobRepository
+from repositories.media_repository import MediaRepository
+
+HEAD = ScriptDirectory.from_config(alembic_config("sqlite://")).get_current_head()
+
+
+def current_revision(engine):
+    with engine.connect() as conn:
+        return conn.exec_driver_sql("SELECT version_num FROM alembic_version").scalar()
+
+
+@pytest.mark.integration
+class TestDatabaseBootstrap:
+    def test_fresh_database_is_migrated_to_head(self, tmp_path):
+        engine = build_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+
+        run_migrations(engine)
+
+        assert {"users", "media_items", "refresh_tokens"} <= set(
+            inspect(engine).get_table_names()
+        )
+        assert current_revision(engine) == HEAD
+        engine.dispose()
+
+    def test_second_run_is_a_noop(self, tmp_path):
+        engine = build_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+
+        run_migrations(engine)
+        run_migrations(engine)
+
+        assert current_revision(engine) == HEAD
+        engine.dispose()
+
+    def test_legacy_create_all_database_is_adopted(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'legacy.db'}"
+        legacy = create_engine(url)
+        Base.metadata.create_all(bind=legacy)
+        legacy.dispose()
+
+        engine = build_engine(url)
+        run_migrations(engine)
+
+        assert current_revision(engine) == HEAD
+        engine.dispose()
+
+    def test_legacy_baseline_database_gets_later_columns(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'legacy.db'}"
+        config = alembic_config(url)
+        command.upgrade(config, "0001")
+        legacy = create_engine(url)
+        with legacy.begin() as conn:
+            conn.exec_driver_sql("DROP TABLE alembic_version")
+        legacy.dispose()
+
+        engine = build_engine(url)
+        run_migrations(engine)
+
+        columns = {c["name"] for c in inspect(engine).get_columns("media_items")}
+        assert "thumbnail_object_name" in columns
+        engine.dispose()
+
+    def test_concurrent_workers_migrate_once(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'race.db'}"
+        errors = []
+
+        def worker():
+            engine = build_engine(url)
+            try:
+                run_migrations(engine)
+            except Exception as e:  # pragma: no cover - fails the test below
+                errors.append(e)
+            finally:
+                engine.dispose()
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+
+    def test_deleting_media_cascades_to_its_job(self, tmp_path):
+        engine = build_engine(f"sqlite:///{tmp_path / 'cascade.db'}")
+        run_migrations(engine)
+        # Свежие соединения — прагма должна ставиться при подключении
+        engine.dispose()
+
+        with sessionmaker(bind=engine)() as db:
+            user = User(email="u1@test.com", username="u1", password_hash="x")
+            db.add(user)
+            db.commit()
+            repo = MediaRepository(db)
+            first = repo.create(user.id, "a.jpg", "a.jpg", remove_bg=False)
+            second = repo.create(user.id, "b.jpg", "b.jpg", remove_bg=True)
+            JobRepository(db).enqueue(first.id, False, datetime(2026, 1, 1))
+
+            repo.delete(first)
+            assert db.query(ProcessingJob.media_id).all() == [(second.id,)]
+
+            repo.delete_by_ids([second.id])
+            assert db.query(ProcessingJob).count() == 0
+            assert db.query(MediaItem).count() == 0
+        engine.dispose()
+
+
+@pytest.mark.unit
+class TestEngineTuning:
+    def test_file_sqlite_uses_wal_and_tuned_pool(self, tmp_path):
+        engine = build_engine(f"sqlite:///{tmp_path / 'tuned.db'}")
+
+        with engine.connect() as conn:
+            journal = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+            synchronous = conn.exec_driver_sql("PRAGMA synchronous").scalar()
+            busy_timeout = conn.exec_driver_sql("PRAGMA busy_timeout").scalar()
+            foreign_keys = conn.exec_driver_sql("PRAGMA foreign_keys").scalar()
+
+        assert journal == "wal"
+        assert synchronous == 1  # NORMAL
+        assert busy_timeout > 0
+        assert foreign_keys == 1
+        assert isinstance(engine.pool, QueuePool)
+        assert engine.pool.size() == 5
+        engine.dispose()
+
+    def test_memory_sqlite_skips_pool_settings(self):
+        engine = build_engine("sqlite://")
+
+        with engine.connect() as conn:
+            journal = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+            foreign_keys = conn.exec_driver_sql("PRAGMA foreign_keys").scalar()
+
+        assert journal == "memory"
+        assert foreign_keys == 1
+        engine.dispose()
@@ -0,0 +1,230 @@
+import logging
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.models import MediaItem, ProcessingJob
+from repositories.job_repository import JobRepository
+from services import processing_service
+from services.job_queue import JobRunner
+from tests.conftest import (
+    Clock,
+    TestingSessionLocal,
+    auth_header,
+    create_media_in_db,
+    create_user_in_db,
+    login_user,
+    make_image_bytes,
+)
+
+
+def make_runner(clock, handler=None, owner="worker-a", **kwargs):
+    return JobRunner(
+        handler=handler or processing_service._run_pipeline,
+        session_factory=TestingSessionLocal,
+        on_failure=processing_service._record_failure,
+        owner=owner,
+        lease_seconds=60,
+        max_attempts=3,
+        backoff_base=10,
+        backoff_max=100,
+        clock=clock,
+        **kwargs,
+    )
+
+
+@pytest.fixture
+def media(db_session, fake_storage, monkeypatch):
+    monkeypatch.setattr(processing_service, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(fake_storage, "download_bytes", lambda name: make_image_bytes())
+    user = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+    return create_media_in_db(db_session, user.id, original_filename="photo.jpg")
+
+
+@pytest.mark.unit
+class TestJobRepository:
+    def test_only_one_worker_claims_a_job(self, db_session, media):
+        now = datetime(2026, 1, 1)
+        repo = JobRepository(db_session)
+        job = repo.enqueue(media.id, False, now)
+
+        first = repo.claim(job.id, "worker-a", now, now + timedelta(minutes=1), 3)
+        second = repo.claim(job.id, "worker-b", now, now + timedelta(minutes=1), 3)
+
+        assert (first, second) == (True, False)
+        assert not repo.finish(job.id, "worker-b", "done", now)
+        assert repo.finish(job.id, "worker-a", "done", now)
+
+    def test_expired_lease_is_claimable_again(self, db_session, media):
+        now = datetime(2026, 1, 1)
+        repo = JobRepository(db_session)
+        job = repo.enqueue(media.id, False, now)
+        repo.claim(job.id, "dead-worker", now, now + timedelta(minutes=1), 3)
+
+        later = now + timedelta(minutes=2)
+        assert repo.due_ids(now, 10, 3) == []
+        assert repo.due_ids(later, 10, 3) == [job.id]
+        assert repo.claim(job.id, "worker-b", later, later + timedelta(minutes=1), 3)
+        assert not repo.extend_lease(job.id, "dead-worker", later + timedelta(minutes=5))
+
+
+@pytest.mark.integration
+class TestJobRunner:
+    def test_failed_attempt_is_retried_after_backoff(self, db_session, media):
+        clock = Clock()
+        calls = []
+
+        def flaky(media_id, remove_bg, heartbeat):
+            calls.append(media_id)
+            if len(calls) == 1:
+                raise RuntimeError("minio timeout")
+            processing_service._run_pipeline(media_id, remove_bg, heartbeat)
+
+        runner = make_runner(clock, handler=flaky)
+
+        assert runner.run_for_media(media.id) == "retry"
+        db_session.expire_all()
+        job = db_session.query(ProcessingJob).one()
+        assert (job.status, job.attempts, job.last_error) == ("pending", 1, "minio timeout")
+        assert job.run_after > clock.now
+        assert db_session.get(MediaItem, media.id).processing_status == "queued"
+
+        assert runner.run_due() == 0
+        clock.now += timedelta(seconds=100)
+        assert runner.run_due() == 1
+
+        db_session.expire_all()
+        assert db_session.query(ProcessingJob).one().status == "done"
+        item = db_session.get(MediaItem, media.id)
+        assert item.processed is True and item.processing_status == "done"
+
+    def test_job_of_crashed_worker_is_recovered(self, db_session, media):
+        clock = Clock()
+        repo = JobRepository(db_session)
+        job = repo.enqueue(media.id, False, clock.now)
+        repo.claim(job.id, "crashed-worker", clock.now, clock.now + timedelta(seconds=60), 3)
+
+        clock.now += timedelta(seconds=61)
+        assert make_runner(clock).run_due() == 1
+
+        db_session.expire_all()
+        assert db_session.get(MediaItem, media.id).processed is True
+        recovered = db_session.query(ProcessingJob).one()
+        assert (recovered.status, recovered.attempts) == ("done", 2)
+
+    def test_job_crashing_every_worker_is_failed_after_max_attempts(self, db_session, media):
+        clock = Clock()
+        repo = JobRepository(db_session)
+        job = repo.enqueue(media.id, False, clock.now)
+
+        claims = []
+        for i in range(5):
+            claims.append(repo.claim(job.id, f"crashed-{i}", clock.now, clock.now + timedelta(seconds=60), 3))
+            clock.now += timedelta(seconds=61)
+
+        assert claims == [True, True, True, False, False]
+        assert repo.due_ids(clock.now, 10, 3) == []
+
+        def crash(media_id, remove_bg, heartbeat):
+            pytest.fail("exhausted job must not run again")
+
+        assert make_runner(clock, handler=crash).run_due() == 0
+
+        db_session.expire_all()
+        failed = db_session.query(ProcessingJob).one()
+        assert (failed.status, failed.attempts, failed.lease_owner) == ("failed", 3, None)
+        assert "interrupted 3 times" in failed.last_error
+        item = db_session.get(MediaItem, media.id)
+        assert (item.processing_status, item.processing_error) == ("failed", failed.last_error)
+
+    def test_processed_item_is_not_processed_again(self, db_session, fake_storage, media, monkeypatch):
+        make_runner(Clock()).run_for_media(media.id)
+        monkeypatch.setattr(fake_storage, "download_bytes", lambda name: pytest.fail("processed twice"))
+
+        JobRepository(db_session).enqueue(media.id, False, datetime(2026, 1, 1))
+        assert make_runner(Clock()).run_for_media(media.id) == "done"
+
+    def test_lost_lease_abandons_attempt_without_failure(self, db_session, media):
+        clock = Clock()
+
+        def taken_over(media_id, remove_bg, heartbeat):
+            with TestingSessionLocal() as other:
+                job = JobRepository(other).get_by_media(media_id)
+                job.lease_owner = "worker-b"
+                other.commit()
+            heartbeat()
+
+        assert make_runner(clock, handler=taken_over).run_for_media(media.id) == "lost"
+        db_session.expire_all()
+        job = db_session.query(ProcessingJob).one()
+        assert (job.status, job.lease_owner, job.last_error) == ("running", "worker-b", None)
+
+    def test_final_attempt_marks_job_and_item_failed(self, db_session, media):
+        clock = Clock()
+
+        def broken(media_id, remove_bg, heartbeat):
+            raise RuntimeError("corrupt file")
+
+        runner = make_runner(clock, handler=broken)
+        outcomes = [runner.run_for_media(media.id)]
+        for _ in range(2):
+            clock.now += timedelta(seconds=200)
+            outcomes.append(runner.run_job(db_session.query(ProcessingJob.id).scalar()))
+
+        assert outcomes == ["retry", "retry", "failed"]
+        db_session.expire_all()
+        assert db_session.query(ProcessingJob).one().status == "failed"
+        item = db_session.get(MediaItem, media.id)
+        assert (item.processing_status, item.processing_error) == ("failed", "corrupt file")
+
+    def test_runner_crash_is_logged_with_traceback(self, monkeypatch, caplog):
+        def broken_runner():
+            raise RuntimeError("db is gone")
+
+        monkeypatch.setattr(processing_service, "get_job_runner", broken_runner)
+
+        with caplog.at_level(logging.ERROR, logger=processing_service.__name__):
+            processing_service.process_media_item(42)
+
+        record = caplog.records[-1]
+        assert "media #42" in record.getMessage()
+        assert record.exc_info[1].args == ("db is gone",)
+
+
+@pytest.mark.integration
+class TestUploadEnqueuesJob:
+    def test_upload_persists_job_before_background_task(self, client, db_session, fake_storage, fake_processing):
+        create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+        token = login_user(client, "u1@test.com", "pass")
+
+        resp = client.post(
+            "/api/media/upload",
+            files={"file": ("photo.jpg", make_image_bytes(), "image/jpeg")},
+            data={"remove_bg": "true"},
+            headers=auth_header(token),
+        )
+
+        assert resp.status_code == 201
+        job = db_session.query(ProcessingJob).one()
+        assert (job.media_id, job.remove_bg, job.status) == (resp.json()["id"], True, "pending")
+        assert fake_processing == [{"media_id": job.media_id, "remove_bg": True}]
+
+    def test_failed_enqueue_leaves_no_media_row(self, client, db_session, fake_storage, fake_processing, monkeypatch):
+        create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+        token = login_user(client, "u1@test.com", "pass")
+
+        def broken_stage(self, media_id, remove_bg, now):
+            raise RuntimeError("processing_jobs is locked")
+
+        monkeypatch.setattr(JobRepository, "stage", broken_stage)
+
+        with pytest.raises(RuntimeError):
+            client.post(
+                "/api/media/upload",
+                files={"file": ("photo.jpg", make_image_bytes(), "image/jpeg")},
+                headers=auth_header(token),
+            )
+
+        assert db_session.query(MediaItem).count() == 0
+        assert db_session.query(ProcessingJob).count() == 0
+        assert fake_processing == []
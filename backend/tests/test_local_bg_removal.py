@@ -0,0 +1,205 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from core.config import settings
+from services import local_bg_removal, processing_service, removebg_cache
+from services.async_removebg_service import LoopBoundRemoveBgService
+from services.local_bg_removal import FallbackBgRemover, LocalBgRemovalService, get_background_remover
+from services.removebg_service import (
+    RemoveBgQuotaError,
+    RemoveBgRateLimitError,
+    RemoveBgResult,
+    get_removebg_service,
+)
+from tests.conftest import TestingSessionLocal, auth_header, create_user_in_db, login_user
+from tests.test_removebg_cache import DictStorage
+
+
+class FakeInput:
+    name = "input.1"
+
+
+class FakeSession:
+    """ONNX-сессия: левая половина — объект, правая — фон."""
+
+    def __init__(self):
+        self.inputs = []
+
+    def get_inputs(self):
+        return [FakeInput()]
+
+    def run(self, output_names, feeds):
+        tensor = feeds["input.1"]
+        self.inputs.append(tensor)
+        size = tensor.shape[-1]
+        mask = np.zeros((1, 1, size, size), dtype=np.float32)
+        mask[..., : size // 2] = 0.9
+        return [mask, mask]
+
+
+class FailingApi:
+    def __init__(self, error):
+        self.error = error
+        self.calls = 0
+
+    def is_available(self):
+        return True
+
+    def request_params(self):
+        return {"size": "auto"}
+
+    def remove_background(self, image_data):
+        self.calls += 1
+        raise self.error
+
+
+def make_jpeg(width=64, height=48) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+@pytest.mark.unit
+class TestLocalBgRemoval:
+    def test_output_is_rgba_png_with_alpha_from_mask(self):
+        session = FakeSession()
+        service = LocalBgRemovalService(input_size=32, session=session)
+
+        result = service.remove_background(make_jpeg(64, 48))
+
+        assert result.success and result.source == "local"
+        assert (result.image_width, result.image_height) == (64, 48)
+        assert session.inputs[0].shape == (1, 3, 32, 32)
+        assert session.inputs[0].dtype == np.float32
+        image = Image.open(io.BytesIO(result.image_data))
+        assert image.format == "PNG" and image.mode == "RGBA"
+        assert image.getpixel((2, 24))[3] == 255
+        assert image.getpixel((61, 24))[3] == 0
+
+    def test_unavailable_without_model(self, tmp_path):
+        service = LocalBgRemovalService(model_path=str(tmp_path / "missing.onnx"))
+
+        assert not service.is_available()
+        result = service.remove_background(make_jpeg())
+        assert not result.success
+
+    def test_broken_input_is_a_failed_result(self):
+        service = LocalBgRemovalService(input_size=32, session=FakeSession())
+
+        result = service.remove_background(b"not an image")
+
+        assert not result.success
+        assert "Local background removal failed" in result.error_message
+
+
+@pytest.mark.unit
+class TestFallbackBgRemover:
+    @pytest.mark.parametrize("error", [RemoveBgQuotaError(), RemoveBgRateLimitError(retry_after=60)])
+    def test_quota_and_rate_limit_fall_back_to_local(self, error):
+        api = FailingApi(error)
+        remover = FallbackBgRemover(api, LocalBgRemovalService(input_size=32, session=FakeSession()))
+
+        result = remover.remove_background(make_jpeg())
+
+        assert api.calls == 1
+        assert result.success and result.source == "local"
+
+    def test_api_result_is_returned_as_is(self):
+        class OkApi(FailingApi):
+            def remove_background(self, image_data):
+                return RemoveBgResult(success=True, image_data=b"api")
+
+        remover = FallbackBgRemover(OkApi(None), LocalBgRemovalService(input_size=32, session=FakeSession()))
+
+        result = remover.remove_background(make_jpeg())
+
+        assert (result.image_data, result.source) == (b"api", "remove.bg")
+
+    def test_backend_selection_from_config(self, monkeypatch, tmp_path):
+        model = tmp_path / "u2net.onnx"
+        model.write_bytes(b"")
+        monkeypatch.setattr(settings, "BG_REMOVAL_LOCAL_MODEL_PATH", str(model))
+        monkeypatch.setattr(local_bg_removal, "ONNX_AVAILABLE", True)
+
+        monkeypatch.setattr(settings, "BG_REMOVAL_BACKEND", "local")
+        assert isinstance(get_background_remover(), LocalBgRemovalService)
+
+        monkeypatch.setattr(settings, "BG_REMOVAL_BACKEND", "api")
+        assert isinstance(get_background_remover(), FallbackBgRemover)
+
+        monkeypatch.setattr(settings, "BG_REMOVAL_LOCAL_FALLBACK", False)
+        assert isinstance(get_background_remover(), LoopBoundRemoveBgService)
+
+
+@pytest.mark.integration
+class TestLocalResultsAreNotCached:
+    def test_fallback_result_not_stored_in_cache(self, db_session, monkeypatch):
+        api = FailingApi(RemoveBgQuotaError())
+        remover = FallbackBgRemover(api, LocalBgRemovalService(input_size=32, session=FakeSession()))
+        storage = DictStorage()
+        monkeypatch.setattr(processing_service, "get_removebg_service", lambda: remover)
+        monkeypatch.setattr(removebg_cache, "SessionLocal", TestingSessionLocal)
+
+        first, ok = processing_service._apply_remove_bg(make_jpeg(), storage)
+        processing_service._apply_remove_bg(make_jpeg(), storage)
+
+        assert ok and first.startswith(b"\x89PNG")
+        assert api.calls == 2
+        assert storage.objects == {}
+
+
+@pytest.fixture
+def local_model(monkeypatch, tmp_path):
+    """Локальная модель «установлена»: onnxruntime есть, файл модели на месте."""
+    model = tmp_path / "u2net.onnx"
+    model.write_bytes(b"")
+    monkeypatch.setattr(settings, "BG_REMOVAL_LOCAL_MODEL_PATH", str(model))
+    monkeypatch.setattr(local_bg_removal, "ONNX_AVAILABLE", True)
+
+
+def get_status(client, db_session):
+    create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+    token = login_user(client, "u1@test.com", "pass")
+    resp = client.get("/api/media/removebg/status", headers=auth_header(token))
+    assert resp.status_code == 200
+    return resp.json()
+
+
+@pytest.mark.integration
+class TestRemoveBgStatusEndpoint:
+    def test_local_backend_is_available_without_api_key(self, client, db_session, local_model, monkeypatch):
+        monkeypatch.setattr(settings, "BG_REMOVAL_BACKEND", "local")
+
+        status = get_status(client, db_session)
+
+        assert (status["available"], status["backend"], status["rate_limit_per_minute"]) == (True, "local", 0)
+        assert "Local" in status["message"]
+
+    def test_local_backend_without_model_is_unavailable(self, client, db_session, monkeypatch):
+        monkeypatch.setattr(settings, "BG_REMOVAL_BACKEND", "local")
+        monkeypatch.setattr(local_bg_removal, "ONNX_AVAILABLE", False)
+
+        status = get_status(client, db_session)
+
+        assert (status["available"], status["backend"]) == (False, "local")
+        assert "onnxruntime" in status["message"]
+
+    def test_api_backend_falls_back_to_local_without_key(self, client, db_session, local_model, monkeypatch):
+        monkeypatch.setattr(settings, "BG_REMOVAL_BACKEND", "api")
+        monkeypatch.setattr(get_removebg_service(), "enabled", False)
+
+        status = get_status(client, db_session)
+
+        assert (status["available"], status["backend"], status["rate_limit_per_minute"]) == (True, "local", 0)
+
+    def test_api_backend_reports_rate_limit(self, client, db_session, monkeypatch):
+        monkeypatch.setattr(settings, "BG_REMOVAL_BACKEND", "api")
+        monkeypatch.setattr(get_removebg_service(), "enabled", True)
+
+        status = get_status(client, db_session)
+
+        assert (status["available"], status["backend"]) == (True, "remove.bg")
+        assert status["rate_limit_per_minute"] == get_removebg_service().max_requests_per_minute
@@ -29,7 +29,7 @@ class TestMediaEndpoints:
         token = login_user(client, "u1@test.com", "pass")
 
         class FakeStorage:
-            def upload_fileobj(self, file_obj, filename, user_id):
+            def upload_fileobj(self, file_obj, filename, user_id, content_type=None):
                 return f"{user_id}/original/{filename}"
 
             def get_presigned_url(self, object_name, expires=3600):
@@ -206,3 +206,46 @@ class TestMediaEndpoints:
 
         assert resp.status_code == 200
         assert resp.headers["content-disposition"].startswith("attachment;")
+
+    def test_bulk_delete_removes_media_and_objects(
+        self, client, db_session, fake_storage
+    ):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+        first = create_media_in_db(db_session, user.id, "a.jpg", processed=True)
+        second = create_media_in_db(db_session, user.id, "b.jpg")
+        token = login_user(client, "u1@test.com", "pass")
+
+        resp = client.post(
+            "/api/media/bulk-delete",
+            headers=auth_header(token),
+            json={"ids": [first.id, second.id], "wait_for_storage": True},
+        )
+
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["deleted"] == 2
+        assert data["failed_objects"] == []
+        assert sorted(fake_storage.deleted) == sorted(
+            [
+                f"{user.id}/original/a.jpg",
+                f"{user.id}/processed/a.jpg",
+                f"{user.id}/original/b.jpg",
+            ]
+        )
+
+    def test_bulk_delete_schedules_storage_cleanup(
+        self, client, db_session, fake_storage
+    ):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+        create_media_in_db(db_session, user.id, "a.jpg", processed=False)
+        token = login_user(client, "u1@test.com", "pass")
+
+        resp = client.post(
+            "/api/media/bulk-delete",
+            headers=auth_header(token),
+            json={"processed": False},
+        )
+
+        assert resp.status_code == 200
+        assert resp.json()["objects_scheduled"] == 1
+        assert fake_storage.deleted == [f"{user.id}/original/a.jpg"]
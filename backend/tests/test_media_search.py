@@ -0,0 +1,138 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from core.search_index import FTS5_TRIGRAM_AVAILABLE
+from models.models import MediaItem
+from repositories.media_repository import MediaRepository
+from repositories.media_search import FtsSearch, LikeSearch, get_search
+from services.media_service import MediaService
+from tests.conftest import FakeStorage, create_user_in_db, create_media_in_db
+
+requires_fts = pytest.mark.skipif(
+    not FTS5_TRIGRAM_AVAILABLE, reason="SQLite built without FTS5 trigram"
+)
+
+
+def search_ids(db_session, term, **kwargs):
+    items, _, _ = MediaRepository(db_session).get_filtered(search=term, **kwargs)
+    return [item.id for item in items]
+
+
+@pytest.mark.unit
+class TestSearchBackendSelection:
+    def test_short_term_falls_back_to_like(self):
+        assert type(get_search("sqlite", "ab")) is LikeSearch
+
+    def test_empty_term_disables_search(self):
+        assert get_search("sqlite", "   ") is None
+
+    @requires_fts
+    def test_sqlite_uses_fts(self):
+        assert isinstance(get_search("sqlite", "beach"), FtsSearch)
+
+
+@requires_fts
+@pytest.mark.integration
+class TestMediaSearchIndex:
+    def test_index_follows_insert_update_and_delete(self, db_session):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+        item = create_media_in_db(db_session, user.id, "holiday.jpg", description="Sunny Beach")
+
+        assert search_ids(db_session, "beach") == [item.id]
+
+        repo = MediaRepository(db_session)
+        repo.update(item, description="mountains")
+        assert search_ids(db_session, "beach") == []
+        assert search_ids(db_session, "MOUNT") == [item.id]
+
+        repo.delete(item)
+        assert search_ids(db_session, "mount") == []
+
+    def test_bulk_delete_without_orm_keeps_index_in_sync(self, db_session):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+        ids = [create_media_in_db(db_session, user.id, f"report_{i}.pdf").id for i in range(3)]
+
+        MediaRepository(db_session).delete_by_ids(ids[:2])
+
+        count = db_session.execute(
+            text("SELECT count(*) FROM media_search WHERE media_search MATCH '\"report\"'")
+        ).scalar()
+        assert count == 1
+        assert search_ids(db_session, "report") == [ids[2]]
+
+    def test_substring_search_matches_filename_and_description(self, db_session):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+        by_name = create_media_in_db(db_session, user.id, "passport_scan.png")
+        by_desc = create_media_in_db(db_session, user.id, "a.jpg", description="old passport")
+        create_media_in_db(db_session, user.id, "cat.jpg")
+
+        assert sorted(search_ids(db_session, "sspor")) == sorted([by_name.id, by_desc.id])
+
+    def test_quotes_in_term_are_not_query_syntax(self, db_session):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+        item = create_media_in_db(db_session, user.id, 'say "hi" there.jpg')
+
+        assert search_ids(db_session, '"hi" th') == [item.id]
+        assert search_ids(db_session, 'OR "') == []
+
+    def test_search_is_scoped_to_owner(self, db_session):
+        owner = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+        other = create_user_in_db(db_session, "u2", "u2@test.com", "pass")
+        mine = create_media_in_db(db_session, owner.id, "invoice.pdf")
+        create_media_in_db(db_session, other.id, "invoice.pdf")
+
+        assert search_ids(db_session, "invoice", user_id=owner.id) == [mine.id]
+
+    def test_relevance_sort_ranks_best_match_first(self, db_session):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+        weak = create_media_in_db(
+            db_session, user.id, "notes.txt", description="a long text that mentions cat once among many words"
+        )
+        strong = create_media_in_db(db_session, user.id, "cat.jpg", description="cat cat")
+
+        ids = search_ids(db_session, "cat", sort_by="relevance", sort_order="desc")
+
+        assert ids == [strong.id, weak.id]
+
+    def test_relevance_sort_with_cursor_raises_400(self, db_session):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+        service = MediaService(media_repo=MediaRepository(db_session), storage=FakeStorage())
+
+        with pytest.raises(HTTPException) as exc:
+            service.list_media_filtered(
+                current_user=user, search="cat", sort_by="relevance", cursor="abc"
+            )
+
+        assert exc.value.status_code == 400
+
+    def test_relevance_listing_has_total_and_no_cursor(self, db_session):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+        for i in range(3):
+            create_media_in_db(db_session, user.id, f"cat_{i}.jpg")
+        service = MediaService(media_repo=MediaRepository(db_session), storage=FakeStorage())
+
+        result = service.list_media_filtered(
+            current_user=user, search="cat", sort_by="relevance", page_size=2
+        )
+
+        assert result.total == 3
+        assert len(result.items) == 2
+        assert result.next_cursor is None
+
+    def test_search_query_uses_fts_index(self, db_session):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+        create_media_in_db(db_session, user.id, "beach.jpg")
+        query = MediaRepository(db_session)._apply_filters(
+            db_session.query(MediaItem), search="beach"
+        )
+        statement = query.statement.compile(
+            dialect=db_session.get_bind().dialect, compile_kwargs={"literal_binds": True}
+        )
+
+        plan = [
+            row[-1]
+            for row in db_session.execute(text(f"EXPLAIN QUERY PLAN {statement}"))
+        ]
+
+        assert any("VIRTUAL TABLE INDEX" in step for step in plan), plan
@@ -12,16 +12,23 @@ class DummyStorage:
         self.deleted = []
         self.uploaded = []
 
-    def upload_fileobj(self, file_obj, filename, user_id):
+    def upload_fileobj(self, file_obj, filename, user_id, content_type=None):
         self.uploaded.append((filename, user_id))
         return f"{user_id}/original/{filename}"
 
     def get_presigned_url(self, object_name, expires=3600):
         return f"http://test.local/{object_name}"
 
+    def get_presigned_urls(self, object_names, expires=3600):
+        return {name: self.get_presigned_url(name, expires) for name in object_names}
+
     def delete_object(self, object_name):
         self.deleted.append(object_name)
 
+    def delete_objects(self, object_names):
+        self.deleted.extend(object_names)
+        return []
+
     def get_file_stream(self, object_name):
         return io.BytesIO(b"downloaded")
 
@@ -257,3 +264,190 @@ class TestMediaService:
 
         assert filename == "a.jpg"
         assert file_obj.read() == b"downloaded"
+
+    def test_bulk_delete_by_ids_skips_foreign_media(self, db_session):
+        owner = create_user_in_db(db_session, "owner", "owner@test.com", "pass")
+        other = create_user_in_db(db_session, "other", "other@test.com", "pass")
+        own_id = create_media_in_db(db_session, owner.id, "a.jpg", processed=True).id
+        foreign_id = create_media_in_db(db_session, other.id, "b.jpg").id
+
+        service = MediaService(
+            media_repo=MediaRepository(db_session),
+            storage=DummyStorage(),
+        )
+
+        report, object_names = service.bulk_delete(
+            owner, ids=[own_id, foreign_id, 9999]
+        )
+
+        assert report.deleted == 1
+        assert report.deleted_ids == [own_id]
+        assert report.skipped_ids == sorted([foreign_id, 9999])
+        assert sorted(object_names) == [
+            f"{owner.id}/original/a.jpg",
+            f"{owner.id}/processed/a.jpg",
+        ]
+        assert report.objects_scheduled == 2
+        repo = MediaRepository(db_session)
+        assert repo.get_by_id(own_id) is None
+        assert repo.get_by_id(foreign_id) is not None
+
+    def test_bulk_delete_by_filter_is_scoped_to_owner(self, db_session):
+        owner = create_user_in_db(db_session, "owner", "owner@test.com", "pass")
+        other = create_user_in_db(db_session, "other", "other@test.com", "pass")
+        create_media_in_db(db_session, owner.id, "a.mp4", file_type="video")
+        keep = create_media_in_db(db_session, owner.id, "b.jpg")
+        foreign = create_media_in_db(db_session, other.id, "c.mp4", file_type="video")
+
+        service = MediaService(
+            media_repo=MediaRepository(db_session),
+            storage=DummyStorage(),
+        )
+
+        report, _ = service.bulk_delete(owner, file_type="video")
+
+        assert report.deleted == 1
+        repo = MediaRepository(db_session)
+        assert repo.get_by_id(keep.id) is not None
+        assert repo.get_by_id(foreign.id) is not None
+
+    def test_bulk_delete_without_ids_or_filter_raises_400(self, db_session):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+
+        service = MediaService(
+            media_repo=MediaRepository(db_session),
+            storage=DummyStorage(),
+        )
+
+        with pytest.raises(HTTPException) as exc:
+            service.bulk_delete(user)
+
+        assert exc.value.status_code == 400
+
+    @pytest.mark.parametrize(
+        "sort_by,sort_order",
+        [
+            ("created_at", "desc"),
+            ("created_at", "asc"),
+            ("original_filename", "asc"),
+            ("file_size", "desc"),
+            ("id", "asc"),
+        ],
+    )
+    def test_cursor_pagination_walks_all_items_once(
+        self, db_session, sort_by, sort_order
+    ):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+        expected = {
+            create_media_in_db(
+                db_session, user.id, f"f{i % 3}.jpg", file_size=100 * (i % 2)
+            ).id
+            for i in range(7)
+        }
+
+        service = MediaService(
+            media_repo=MediaRepository(db_session),
+            storage=DummyStorage(),
+        )
+
+        seen = []
+        cursor = None
+        while True:
+            response = service.list_media_filtered(
+                user,
+                sort_by=sort_by,
+                sort_order=sort_order,
+                page_size=3,
+                cursor=cursor,
+                include_total=False,
+            )
+            seen.extend(item.id for item in response.items)
+            cursor = response.next_cursor
+            if cursor is None:
+                break
+
+        assert len(seen) == len(expected)
+        assert set(seen) == expected
+        assert response.total is None
+
+    @pytest.mark.parametrize("sort_by", ["file_size", "original_filename"])
+    @pytest.mark.parametrize("sort_order", ["asc", "desc"])
+    def test_cursor_pagination_crosses_null_sort_keys(
+        self, db_session, sort_by, sort_order
+    ):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+        expected = set()
+        for i in range(7):
+            item = create_media_in_db(db_session, user.id, f"f{i % 2}.jpg", file_size=100 * (i % 2))
+            if i % 3 == 0:
+                setattr(item, sort_by, None)
+            expected.add(item.id)
+        db_session.commit()
+
+        service = MediaService(
+            media_repo=MediaRepository(db_session),
+            storage=DummyStorage(),
+        )
+
+        seen = []
+        cursor = None
+        while True:
+            response = service.list_media_filtered(
+                user, sort_by=sort_by, sort_order=sort_order, page_size=2, cursor=cursor
+            )
+            seen.extend(item.id for item in response.items)
+            cursor = response.next_cursor
+            if cursor is None:
+                break
+
+        assert sorted(seen) == sorted(expected)
+
+    def test_offset_page_also_returns_next_cursor(self, db_session):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+        for name in ("a.jpg", "b.jpg", "c.jpg"):
+            create_media_in_db(db_session, user.id, original_filename=name)
+
+        service = MediaService(
+            media_repo=MediaRepository(db_session),
+            storage=DummyStorage(),
+        )
+
+        first = service.list_media_filtered(user, page_size=2)
+        second = service.list_media_filtered(
+            user, page_size=2, cursor=first.next_cursor
+        )
+
+        assert first.total == 3
+        assert first.pages == 2
+        assert len(second.items) == 1
+        assert second.next_cursor is None
+
+    @pytest.mark.parametrize("cursor", ["garbage", "e30"])
+    def test_invalid_cursor_raises_400(self, db_session, cursor):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+
+        service = MediaService(
+            media_repo=MediaRepository(db_session),
+            storage=DummyStorage(),
+        )
+
+        with pytest.raises(HTTPException) as exc:
+            service.list_media_filtered(user, cursor=cursor)
+
+        assert exc.value.status_code == 400
+
+    def test_cursor_with_other_sort_raises_400(self, db_session):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+        create_media_in_db(db_session, user.id, original_filename="a.jpg")
+        create_media_in_db(db_session, user.id, original_filename="b.jpg")
+
+        service = MediaService(
+            media_repo=MediaRepository(db_session),
+            storage=DummyStorage(),
+        )
+        cursor = service.list_media_filtered(user, page_size=1).next_cursor
+
+        with pytest.raises(HTTPException) as exc:
+            service.list_media_filtered(user, sort_by="id", cursor=cursor)
+
+        assert exc.value.status_code == 400
@@ -0,0 +1,124 @@
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect
+
+from core.database import Base
+from core.db_bootstrap import alembic_config
+from core.search_index import FTS5_TRIGRAM_AVAILABLE, is_search_object
+
+
+@pytest.mark.integration
+class TestMigrations:
+    def test_upgrade_head_matches_models(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'migrated.db'}"
+
+        command.upgrade(alembic_config(url), "head")
+
+        engine = create_engine(url)
+        with engine.connect() as conn:
+            context = MigrationContext.configure(
+                conn,
+                opts={"include_object": lambda obj, name, *_: not is_search_object(name)},
+            )
+            diff = compare_metadata(context, Base.metadata)
+        engine.dispose()
+
+        assert diff == []
+
+    def test_listing_indexes_are_created(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'migrated.db'}"
+
+        command.upgrade(alembic_config(url), "head")
+
+        engine = create_engine(url)
+        names = {ix["name"] for ix in inspect(engine).get_indexes("media_items")}
+        engine.dispose()
+
+        assert {
+            "ix_media_items_user_created",
+            "ix_media_items_user_processed",
+            "ix_media_items_user_file_type",
+            "ix_media_items_user_filename",
+            "ix_media_items_user_file_size",
+            "ix_media_items_created",
+        } <= names
+
+    def test_refresh_token_indexes_are_created(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'migrated.db'}"
+
+        command.upgrade(alembic_config(url), "head")
+
+        engine = create_engine(url)
+        names = {ix["name"] for ix in inspect(engine).get_indexes("refresh_tokens")}
+        engine.dispose()
+
+        assert {
+            "ix_refresh_tokens_user_id",
+            "ix_refresh_tokens_expires_at",
+            "ix_refresh_tokens_revoked_at",
+        } <= names
+
+    def test_tokens_revoked_before_migration_get_revoked_at(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'migrated.db'}"
+        config = alembic_config(url)
+        command.upgrade(config, "0005")
+
+        engine = create_engine(url)
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                "INSERT INTO users (id, username, email, password_hash, role) "
+                "VALUES (1, 'u1', 'u1@test.com', 'hash', 'user')"
+            )
+            conn.exec_driver_sql(
+                "INSERT INTO refresh_tokens (user_id, token_hash, created_at, expires_at, revoked) VALUES "
+                "(1, 'old', '2025-01-01 00:00:00', '2030-01-01 00:00:00', 1), "
+                "(1, 'live', '2025-01-02 00:00:00', '2030-01-01 00:00:00', 0)"
+            )
+
+        command.upgrade(config, "head")
+
+        with engine.connect() as conn:
+            rows = dict(
+                conn.exec_driver_sql("SELECT token_hash, revoked_at FROM refresh_tokens").fetchall()
+            )
+        engine.dispose()
+
+        assert rows == {"old": "2025-01-01 00:00:00", "live": None}
+
+    def test_downgrade_to_base_drops_everything(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'migrated.db'}"
+        config = alembic_config(url)
+
+        command.upgrade(config, "head")
+        command.downgrade(config, "base")
+
+        engine = create_engine(url)
+        tables = set(inspect(engine).get_table_names()) - {"alembic_version"}
+        engine.dispose()
+
+        assert tables == set()
+
+    @pytest.mark.skipif(not FTS5_TRIGRAM_AVAILABLE, reason="SQLite built without FTS5 trigram")
+    def test_search_index_migration_indexes_existing_rows(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'migrated.db'}"
+        config = alembic_config(url)
+        command.upgrade(config, "0003")
+
+        engine = create_engine(url)
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                "INSERT INTO media_items (id, original_filename, description) "
+                "VALUES (1, 'beach.jpg', 'summer trip')"
+            )
+
+        command.upgrade(config, "head")
+
+        with engine.connect() as conn:
+            hits = conn.exec_driver_sql(
+                "SELECT rowid FROM media_search WHERE media_search MATCH '\"summer\"'"
+            ).fetchall()
+        engine.dispose()
+
+        assert hits == [(1,)]
@@ -0,0 +1,120 @@
+import hashlib
+import hmac
+
+import pytest
+
+from services.password_hash_format import (
+    ARGON2_LEGACY_VERSION,
+    LEGACY_ITERATIONS,
+    b64encode,
+    format_hash,
+    parse_hash,
+)
+from services.password_service import ARGON2_AVAILABLE, PasswordHasher
+from tests.test_password_service import FAST, legacy_hash
+
+if ARGON2_AVAILABLE:
+    from argon2 import PasswordHasher as Argon2Hasher
+    from argon2.low_level import Type as Argon2Type, hash_secret_raw
+
+
+@pytest.mark.unit
+class TestParseHash:
+    def test_argon2id_with_version(self):
+        parsed = parse_hash(f"$argon2id$v=19$m=1024,t=1,p=1${b64encode(b'salt1234')}${b64encode(b'x' * 32)}")
+
+        assert parsed.algorithm == "argon2id"
+        assert parsed.family == "argon2"
+        assert parsed.version == 19
+        assert parsed.params == {"m": 1024, "t": 1, "p": 1}
+        assert parsed.salt == b"salt1234"
+        assert parsed.digest == b"x" * 32
+
+    def test_argon2_without_version_is_v10(self):
+        parsed = parse_hash(f"$argon2i$m=4096,t=3,p=1${b64encode(b'salt1234')}${b64encode(b'x' * 32)}")
+
+        assert parsed.version == ARGON2_LEGACY_VERSION
+
+    def test_scrypt_and_pbkdf2_have_no_version(self):
+        scrypt = parse_hash(f"$scrypt$ln=10,r=8,p=1${b64encode(b's' * 16)}${b64encode(b'd' * 32)}")
+        pbkdf2 = parse_hash(f"$pbkdf2-sha512$i=1000${b64encode(b's' * 16)}${b64encode(b'd' * 64)}")
+
+        assert scrypt.version is None and scrypt.params == {"ln": 10, "r": 8, "p": 1}
+        assert pbkdf2.family == "pbkdf2" and pbkdf2.params == {"i": 1000}
+
+    def test_legacy_salt_hex_format(self):
+        stored = legacy_hash("pw", salt="ab" * 16)
+
+        parsed = parse_hash(stored)
+
+        assert parsed.legacy
+        assert parsed.algorithm == "pbkdf2-sha256"
+        assert parsed.params == {"i": LEGACY_ITERATIONS}
+        # Солью в legacy-формате был сам текст, а не декодированный hex
+        assert parsed.salt == ("ab" * 16).encode()
+        assert parsed.digest == hashlib.pbkdf2_hmac("sha256", b"pw", parsed.salt, LEGACY_ITERATIONS)
+
+    @pytest.mark.parametrize(
+        "stored",
+        [
+            "",
+            "garbage",
+            "salt$not-hex",
+            "$md5$i=1$c2FsdA$ZGln",
+            "$scrypt$broken",
+            "$scrypt$ln=10,r=8$c2FsdA$ZGln",
+            "$pbkdf2-sha256$i=x$c2FsdA$ZGln",
+            "$pbkdf2-sha256$i=1$***$ZGln",
+            "$argon2id$v=19$m=1,t=1,p=1$c2FsdA$",
+        ],
+    )
+    def test_malformed_hash_raises_value_error(self, stored):
+        with pytest.raises(ValueError):
+            parse_hash(stored)
+
+    def test_format_parse_round_trip(self):
+        stored = format_hash("scrypt", {"ln": 10, "r": 8, "p": 1}, b"\x00salt", b"\xffdigest", None)
+
+        parsed = parse_hash(stored)
+
+        assert format_hash(parsed.algorithm, parsed.params, parsed.salt, parsed.digest, parsed.version) == stored
+
+
+@pytest.mark.unit
+class TestConstantTimeVerify:
+    @pytest.mark.parametrize("scheme", ["scrypt", "pbkdf2-sha256", "legacy"])
+    def test_digests_compared_with_compare_digest(self, scheme, monkeypatch):
+        calls = []
+        real = hmac.compare_digest
+
+        def spy(a, b):
+            calls.append((type(a), type(b)))
+            return real(a, b)
+
+        monkeypatch.setattr("services.password_service.hmac.compare_digest", spy)
+        hasher = PasswordHasher(scheme="scrypt", **FAST)
+        stored = legacy_hash("pw") if scheme == "legacy" else PasswordHasher(scheme=scheme, **FAST).hash("pw")
+
+        assert hasher.verify("pw", stored)
+        assert not hasher.verify("nope", stored)
+        # Сравниваются сырые байты, без hex/base64-строк
+        assert calls == [(bytes, bytes), (bytes, bytes)]
+
+    @pytest.mark.skipif(not ARGON2_AVAILABLE, reason="argon2-cffi not installed")
+    def test_hash_from_argon2_cffi_verifies(self):
+        stored = Argon2Hasher(time_cost=1, memory_cost=1024, parallelism=1).hash("pw")
+        hasher = PasswordHasher(scheme="argon2id", **FAST)
+
+        assert hasher.verify("pw", stored)
+        assert not hasher.verify("other", stored)
+        assert not hasher.needs_rehash(stored)
+
+    @pytest.mark.skipif(not ARGON2_AVAILABLE, reason="argon2-cffi not installed")
+    def test_argon2_v10_hash_verifies_and_needs_rehash(self):
+        salt = b"sixteen-byte-slt"
+        digest = hash_secret_raw(b"pw", salt, 1, 1024, 1, 32, Argon2Type.I, version=ARGON2_LEGACY_VERSION)
+        stored = format_hash("argon2i", {"m": 1024, "t": 1, "p": 1}, salt, digest)
+        hasher = PasswordHasher(scheme="argon2id", **FAST)
+
+        assert hasher.verify("pw", stored)
+        assert hasher.needs_rehash(stored)
@@ -0,0 +1,165 @@
+import asyncio
+import hashlib
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from models.models import User
+from repositories.token_repository import TokenRepository
+from repositories.user_repository import UserRepository
+from services.auth_service import AuthService
+from services.password_service import ARGON2_AVAILABLE, PasswordHasher
+from tests.conftest import create_user_in_db
+
+# Дешёвые параметры — проверяем формат, а не стоимость
+FAST = dict(
+    argon2_time_cost=1,
+    argon2_memory_kib=1024,
+    scrypt_log2_n=10,
+    pbkdf2_iterations=1000,
+)
+
+
+def legacy_hash(password: str, salt: str = "a" * 32) -> str:
+    dk = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), 100_000)
+    return f"{salt}${dk.hex()}"
+
+
+@pytest.mark.unit
+class TestPasswordHasher:
+    @pytest.mark.parametrize("scheme", ["argon2id", "scrypt", "pbkdf2-sha256"])
+    def test_round_trip_and_parameters_in_hash(self, scheme):
+        if scheme == "argon2id" and not ARGON2_AVAILABLE:
+            pytest.skip("argon2-cffi not installed")
+        hasher = PasswordHasher(scheme=scheme, **FAST)
+
+        stored = hasher.hash("s3cret")
+
+        assert stored.startswith(f"${scheme}$")
+        assert hasher.verify("s3cret", stored)
+        assert not hasher.verify("wrong", stored)
+        assert not hasher.needs_rehash(stored)
+
+    def test_hashes_are_salted(self):
+        hasher = PasswordHasher(scheme="scrypt", **FAST)
+
+        assert hasher.hash("same") != hasher.hash("same")
+
+    def test_legacy_hash_verifies_and_needs_rehash(self):
+        hasher = PasswordHasher(scheme="scrypt", **FAST)
+        stored = legacy_hash("old-password")
+
+        assert hasher.verify("old-password", stored)
+        assert hasher.needs_rehash(stored)
+
+    def test_changed_cost_requires_rehash(self):
+        old = PasswordHasher(scheme="scrypt", **FAST).hash("pw")
+        stronger = PasswordHasher(scheme="scrypt", **{**FAST, "scrypt_log2_n": 11})
+
+        assert stronger.verify("pw", old)
+        assert stronger.needs_rehash(old)
+
+    def test_other_scheme_hash_still_verifies(self):
+        stored = PasswordHasher(scheme="pbkdf2-sha256", **FAST).hash("pw")
+        hasher = PasswordHasher(scheme="scrypt", **FAST)
+
+        assert hasher.verify("pw", stored)
+        assert hasher.needs_rehash(stored)
+
+    @pytest.mark.parametrize("stored", [None, "", "garbage", "$scrypt$broken", "$pbkdf2-sha256$i=x$a$b"])
+    def test_missing_or_malformed_hash_is_rejected(self, stored):
+        assert not PasswordHasher(scheme="scrypt", **FAST).verify("pw", stored)
+
+    def test_unknown_scheme_raises(self):
+        with pytest.raises(ValueError):
+            PasswordHasher(scheme="md5")
+
+
+@pytest.mark.unit
+class TestHashingExecutor:
+    def test_verify_async_runs_off_the_event_loop(self):
+        hasher = PasswordHasher(scheme="pbkdf2-sha256", pbkdf2_iterations=200_000)
+        stored = hasher.hash("pw")
+        main_thread = threading.get_ident()
+        threads = []
+        original = hasher.verify
+
+        def tracking_verify(password, value):
+            threads.append(threading.get_ident())
+            return original(password, value)
+
+        hasher.verify = tracking_verify
+        ticks = []
+
+        async def heartbeat():
+            while True:
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.005)
+
+        async def scenario():
+            beat = asyncio.create_task(heartbeat())
+            results = await asyncio.gather(*(hasher.verify_async("pw", stored) for _ in range(3)))
+            beat.cancel()
+            return results
+
+        assert asyncio.run(scenario()) == [True, True, True]
+        assert main_thread not in threads
+        assert len(ticks) > 3
+
+    def test_overload_is_rejected_with_503(self, monkeypatch):
+        exhausted = threading.BoundedSemaphore(1)
+        exhausted.acquire()
+        monkeypatch.setattr("services.password_service._pending", exhausted)
+        hasher = PasswordHasher(scheme="scrypt", **FAST)
+
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(hasher.verify_async("pw", None))
+
+        assert exc.value.status_code == 503
+        assert exc.value.headers["Retry-After"] == "1"
+
+
+@pytest.mark.integration
+class TestRehashOnLogin:
+    def _service(self, db_session, hasher):
+        return AuthService(
+            user_repo=UserRepository(db_session),
+            token_repo=TokenRepository(db_session),
+            hasher=hasher,
+        )
+
+    def test_legacy_hash_is_upgraded_on_successful_login(self, db_session):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pw")
+        user.password_hash = legacy_hash("secret123")
+        db_session.commit()
+        hasher = PasswordHasher(scheme="scrypt", **FAST)
+
+        self._service(db_session, hasher).login("u1@test.com", "secret123", "ua")
+
+        stored = db_session.get(User, user.id).password_hash
+        assert stored.startswith("$scrypt$")
+        assert hasher.verify("secret123", stored)
+
+    def test_failed_login_does_not_touch_hash(self, db_session):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pw")
+        user.password_hash = legacy_hash("secret123")
+        db_session.commit()
+        service = self._service(db_session, PasswordHasher(scheme="scrypt", **FAST))
+
+        with pytest.raises(HTTPException):
+            service.login("u1@test.com", "wrong", "ua")
+
+        assert db_session.get(User, user.id).password_hash == legacy_hash("secret123")
+
+    def test_async_login_rehashes_too(self, db_session):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pw")
+        user.password_hash = legacy_hash("secret123")
+        db_session.commit()
+        service = self._service(db_session, PasswordHasher(scheme="pbkdf2-sha256", **FAST))
+
+        tokens = asyncio.run(service.login_async("u1@test.com", "secret123", "ua"))
+
+        assert "access_token" in tokens
+        assert db_session.get(User, user.id).password_hash.startswith("$pbkdf2-sha256$i=1000$")
@@ -0,0 +1,154 @@
+import json
+import time
+
+import pytest
+from sqlalchemy import event
+
+from services.principal_cache import PrincipalCache, RedisPrincipalCache, UserPrincipal
+from tests.conftest import (
+    TestingSessionLocal,
+    auth_header,
+    create_user_in_db,
+    engine,
+    login_user,
+)
+
+
+class CountUserQueries:
+    """Считает SELECT ... FROM users на тестовом движке."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __enter__(self):
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith("SELECT") and "FROM users" in statement:
+            self.count += 1
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+def principal(user_id=1, role="user"):
+    return UserPrincipal(id=user_id, username=f"u{user_id}", email=f"u{user_id}@t.com", role=role)
+
+
+@pytest.mark.unit
+class TestPrincipalCache:
+    def test_lru_evicts_least_recently_used(self):
+        cache = PrincipalCache(max_size=2, ttl_seconds=60)
+        cache.put(principal(1))
+        cache.put(principal(2))
+        cache.get(1)
+        cache.put(principal(3))
+
+        assert cache.get(2) is None
+        assert cache.get(1).id == 1
+
+    def test_entries_expire_after_ttl(self):
+        cache = PrincipalCache(max_size=10, ttl_seconds=0.05)
+        cache.put(principal(1))
+        time.sleep(0.06)
+
+        assert cache.get(1) is None
+
+    def test_zero_ttl_disables_caching(self):
+        cache = PrincipalCache(max_size=10, ttl_seconds=0)
+        cache.put(principal(1))
+
+        assert cache.get(1) is None
+
+    def test_redis_backend_round_trips_and_invalidates(self):
+        client = FakeRedis()
+        cache = RedisPrincipalCache(client, ttl_seconds=30)
+        cache.put(principal(7, role="admin"))
+
+        cached = cache.get(7)
+        assert (cached.id, cached.role) == (7, "admin")
+        assert json.loads(client.data["pg:principal:7"])["email"] == "u7@t.com"
+
+        cache.invalidate(7)
+        assert cache.get(7) is None
+
+
+@pytest.mark.integration
+class TestCurrentUserCaching:
+    def test_user_is_loaded_once_across_requests(self, client):
+        db = TestingSessionLocal()
+        create_user_in_db(db, "alice", "alice@test.com", "secret123")
+        db.close()
+        token = login_user(client, "alice@test.com", "secret123")
+
+        with CountUserQueries() as counter:
+            for _ in range(3):
+                assert client.get("/api/media/", headers=auth_header(token)).status_code == 200
+
+        assert counter.count == 1
+
+    def test_router_and_route_dependencies_share_one_lookup(self, client):
+        db = TestingSessionLocal()
+        create_user_in_db(db, "admin", "admin@test.com", "secret123", role="admin")
+        db.close()
+        token = login_user(client, "admin@test.com", "secret123")
+
+        with CountUserQueries() as counter:
+            # router-level get_current_user + require_role("admin") + list_all
+            resp = client.get("/api/users/", headers=auth_header(token))
+
+        assert resp.status_code == 200
+        assert counter.count == 2
+
+
+@pytest.mark.security
+class TestCurrentUserCacheInvalidation:
+    def _setup(self, client):
+        db = TestingSessionLocal()
+        admin = create_user_in_db(db, "admin", "admin@test.com", "secret123", role="admin")
+        other = create_user_in_db(db, "other", "other@test.com", "secret123", role="admin")
+        admin_id, other_id = admin.id, other.id
+        db.close()
+        return (
+            login_user(client, "admin@test.com", "secret123"),
+            login_user(client, "other@test.com", "secret123"),
+            admin_id,
+            other_id,
+        )
+
+    def test_role_change_revokes_issued_access_tokens(self, client):
+        admin_token, other_token, _, other_id = self._setup(client)
+        assert client.get("/api/users/", headers=auth_header(other_token)).status_code == 200
+
+        resp = client.patch(
+            f"/api/users/{other_id}/role",
+            json={"role": "user"},
+            headers=auth_header(admin_token),
+        )
+        assert resp.status_code == 200
+
+        assert client.get("/api/users/", headers=auth_header(other_token)).status_code == 401
+
+    def test_deleted_user_is_rejected_immediately(self, client):
+        admin_token, other_token, _, other_id = self._setup(client)
+        assert client.get("/api/users/me", headers=auth_header(other_token)).status_code == 200
+
+        resp = client.delete(f"/api/users/{other_id}", headers=auth_header(admin_token))
+        assert resp.status_code == 204
+
+        assert client.get("/api/users/me", headers=auth_header(other_token)).status_code == 401
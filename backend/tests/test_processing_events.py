@@ -0,0 +1,166 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from services import processing_events, processing_service
+from services.processing_events import MemoryEventBroker, RedisEventBroker, format_sse, sse_stream
+from tests.conftest import TestingSessionLocal, create_media_in_db, create_user_in_db, make_image_bytes
+
+
+def disconnect_after(checks: int):
+    """is_disconnected(): клиент «уходит» после N проверок."""
+    state = {"left": checks}
+
+    async def is_disconnected():
+        state["left"] -= 1
+        return state["left"] < 0
+
+    return is_disconnected
+
+
+class SlowPubSub:
+    """PSUBSCRIBE подтверждается с задержкой; сообщений нет, пока не закрыт."""
+
+    def __init__(self):
+        self.subscribed = threading.Event()
+        self.closed = threading.Event()
+
+    def psubscribe(self, pattern):
+        self.closed.wait(0.2)
+        self.subscribed.set()
+
+    def listen(self):
+        self.closed.wait()
+        return iter(())
+
+
+class FakeRedis:
+    def __init__(self):
+        self.pubsub_client = SlowPubSub()
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return self.pubsub_client
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    broker = MemoryEventBroker(queue_size=10)
+    monkeypatch.setattr(processing_events, "_broker", broker)
+    return broker
+
+
+@pytest.mark.unit
+class TestEventBroker:
+    def test_events_from_other_threads_reach_only_that_user(self, broker):
+        async def scenario():
+            mine = broker.subscribe(1)
+            other = broker.subscribe(2)
+            thread = threading.Thread(target=broker.publish, args=(1, {"id": 7, "status": "done"}))
+            thread.start()
+            thread.join()
+            event = await asyncio.wait_for(mine.get(), timeout=1)
+            await asyncio.sleep(0)
+            return event, other.queue.empty()
+
+        event, other_empty = asyncio.run(scenario())
+
+        assert event == {"id": 7, "status": "done"}
+        assert other_empty
+
+    def test_slow_subscriber_drops_oldest_events(self):
+        broker = MemoryEventBroker(queue_size=2)
+
+        async def scenario():
+            subscription = broker.subscribe(1)
+            for i in range(5):
+                broker.publish(1, {"id": i})
+            await asyncio.sleep(0)
+            return [await subscription.get() for _ in range(2)], subscription.dropped
+
+        events, dropped = asyncio.run(scenario())
+
+        assert events == [{"id": 3}, {"id": 4}]
+        assert dropped == 3
+
+    def test_redis_subscription_wait_does_not_block_event_loop(self, monkeypatch):
+        redis_client = FakeRedis()
+        monkeypatch.setattr(processing_events, "_broker", RedisEventBroker(redis_client))
+
+        async def scenario():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            task = asyncio.create_task(ticker())
+            subscription = await processing_events.open_subscription(1)
+            task.cancel()
+            subscription.close()
+            return ticks
+
+        try:
+            ticks = asyncio.run(scenario())
+            assert redis_client.pubsub_client.subscribed.is_set()
+            # psubscribe подтверждается ~0.2 с — loop всё это время работал
+            assert ticks >= 5
+        finally:
+            redis_client.pubsub_client.closed.set()
+
+    def test_stream_sends_events_heartbeats_and_unsubscribes(self, broker):
+        async def scenario():
+            subscription = broker.subscribe(1)
+            broker.publish(1, {"id": 1, "status": "uploading"})
+            chunks = [c async for c in sse_stream(subscription, disconnect_after(2), heartbeat=0.01)]
+            return chunks
+
+        chunks = asyncio.run(scenario())
+
+        assert chunks == [
+            ": connected\n\n",
+            format_sse({"id": 1, "status": "uploading"}),
+            ": ping\n\n",
+        ]
+        assert broker.subscriber_count() == 0
+
+
+@pytest.mark.integration
+class TestProcessingPublishesEvents:
+    def test_stage_transitions_are_pushed(self, db_session, fake_storage, broker, monkeypatch):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+        item = create_media_in_db(db_session, user.id, original_filename="photo.jpg")
+        monkeypatch.setattr(processing_service, "SessionLocal", TestingSessionLocal)
+        monkeypatch.setattr(fake_storage, "download_bytes", lambda name: make_image_bytes())
+
+        async def scenario():
+            subscription = broker.subscribe(user.id)
+            await asyncio.to_thread(processing_service.process_media_item, item.id)
+            await asyncio.sleep(0)
+            events = []
+            while not subscription.queue.empty():
+                events.append(subscription.queue.get_nowait())
+            return events
+
+        events = asyncio.run(scenario())
+
+        assert [e["status"] for e in events] == ["downloading", "uploading", "done"]
+        assert events[-1] == {
+            "id": item.id,
+            "status": "done",
+            "processed": True,
+            "bg_removed": False,
+            "error": None,
+        }
+
+    def test_events_endpoint_requires_auth(self, client):
+        assert client.get("/api/media/events").status_code == 401
+
+    def test_sse_payload_is_compact_json(self):
+        chunk = format_sse({"id": 1, "status": "done"})
+
+        assert chunk.startswith("event: status\ndata: ")
+        assert json.loads(chunk.split("data: ", 1)[1]) == {"id": 1, "status": "done"}
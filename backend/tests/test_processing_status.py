@@ -0,0 +1,104 @@
+import pytest
+
+from core.config import settings
+from models.models import MediaItem
+from services import processing_service
+from tests.conftest import (
+    TestingSessionLocal,
+    auth_header,
+    create_media_in_db,
+    create_user_in_db,
+    login_user,
+    make_image_bytes,
+)
+
+
+@pytest.fixture
+def recorded_stages(monkeypatch):
+    stages = []
+    set_stage = processing_service._set_stage
+
+    def _record(db, item, stage):
+        stages.append(stage)
+        set_stage(db, item, stage)
+
+    monkeypatch.setattr(processing_service, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(processing_service, "_set_stage", _record)
+    return stages
+
+
+@pytest.mark.integration
+class TestProcessingStatus:
+    def test_stages_are_reported_and_job_is_not_padded(
+        self, db_session, fake_storage, recorded_stages, monkeypatch
+    ):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+        item = create_media_in_db(db_session, user.id, original_filename="photo.jpg")
+        monkeypatch.setattr(fake_storage, "download_bytes", lambda name: make_image_bytes())
+        monkeypatch.setattr(processing_service.time, "sleep", lambda s: pytest.fail("processing must not sleep"))
+
+        processing_service.process_media_item(item.id)
+
+        db_session.expire_all()
+        stored = db_session.get(MediaItem, item.id)
+        assert recorded_stages[0] == "downloading"
+        assert recorded_stages[-1] == "uploading"
+        assert stored.processing_status == "done"
+        assert stored.processed is True
+
+    def test_detection_and_blur_stages(self, monkeypatch):
+        stages = []
+        monkeypatch.setattr(processing_service, "CV2_AVAILABLE", True)
+        monkeypatch.setattr(processing_service, "_detect_boxes", lambda image: [(0, 0, 8, 8)])
+        monkeypatch.setattr(processing_service, "_blur_boxes", lambda image, boxes: image)
+
+        processing_service.process_image_bytes(make_image_bytes(), on_stage=stages.append)
+
+        assert stages == ["detecting", "blurring"]
+
+    def test_final_failure_is_recorded(self, db_session, fake_storage, recorded_stages, monkeypatch):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+        item = create_media_in_db(db_session, user.id)
+        monkeypatch.setattr(settings, "PROCESSING_JOB_MAX_ATTEMPTS", 1)
+
+        def broken_download(name):
+            raise RuntimeError("storage is down")
+
+        monkeypatch.setattr(fake_storage, "download_bytes", broken_download)
+
+        processing_service.process_media_item(item.id)
+
+        db_session.expire_all()
+        stored = db_session.get(MediaItem, item.id)
+        assert stored.processing_status == "failed"
+        assert stored.processing_error == "storage is down"
+        assert stored.processed is False
+
+
+@pytest.mark.integration
+class TestMediaStatusEndpoint:
+    def test_owner_gets_status(self, client, db_session):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+        item = create_media_in_db(db_session, user.id)
+        token = login_user(client, "u1@test.com", "pass")
+
+        resp = client.get(f"/api/media/{item.id}/status", headers=auth_header(token))
+
+        assert resp.status_code == 200
+        assert resp.json() == {
+            "id": item.id,
+            "status": "queued",
+            "processed": False,
+            "bg_removed": False,
+            "error": None,
+        }
+
+    def test_other_user_cannot_see_status(self, client, db_session):
+        owner = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+        create_user_in_db(db_session, "u2", "u2@test.com", "pass")
+        item = create_media_in_db(db_session, owner.id, processed=True)
+        token = login_user(client, "u2@test.com", "pass")
+
+        resp = client.get(f"/api/media/{item.id}/status", headers=auth_header(token))
+
+        assert resp.status_code == 403
@@ -0,0 +1,128 @@
+"""
+Регрессия планов запросов списка медиа (SQLite EXPLAIN QUERY PLAN).
+
+Перехватываем реальный SELECT страницы, который строит
+MediaRepository.get_filtered, и проверяем, что он идёт по индексу,
+а для сортировок — ещё и без сортировки во временном B-tree.
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from repositories.media_repository import MediaRepository
+from tests.conftest import engine, create_user_in_db, create_media_in_db
+
+SORTS = [
+    (sort_by, sort_order)
+    for sort_by in ("created_at", "original_filename", "file_size", "id")
+    for sort_order in ("asc", "desc")
+]
+
+FILTERS = [
+    {},
+    {"processed": True},
+    {"processed": False},
+    {"file_type": "video"},
+    {"date_from": datetime(2024, 1, 1)},
+    {"date_from": datetime(2024, 1, 1), "date_to": datetime(2030, 1, 1)},
+]
+
+
+def capture_page_query(db_session, **kwargs):
+    """Выполнить get_filtered и вернуть план SELECT страницы (с LIMIT)."""
+    captured = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith("SELECT") and "LIMIT" in statement:
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        MediaRepository(db_session).get_filtered(include_total=False, **kwargs)
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+
+    statement, parameters = captured[-1]
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {statement}", parameters
+        ).fetchall()
+    return [row[-1] for row in rows]
+
+
+def assert_uses_index(plan):
+    media_steps = [step for step in plan if "media_items" in step]
+    assert media_steps, plan
+    for step in media_steps:
+        assert "USING" in step and "INDEX" in step or "PRIMARY KEY" in step, plan
+
+
+@pytest.fixture
+def seeded(db_session):
+    user = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+    for i in range(5):
+        create_media_in_db(db_session, user.id, f"f{i}.jpg", processed=i % 2 == 0)
+    return user
+
+
+@pytest.mark.integration
+class TestMediaListingQueryPlans:
+    @pytest.mark.parametrize("sort_by,sort_order", SORTS)
+    def test_user_listing_sort_uses_index_without_temp_sort(
+        self, db_session, seeded, sort_by, sort_order
+    ):
+        plan = capture_page_query(
+            db_session, user_id=seeded.id, sort_by=sort_by, sort_order=sort_order
+        )
+
+        assert_uses_index(plan)
+        if sort_by != "id":
+            assert not any("TEMP B-TREE" in step for step in plan), plan
+
+    @pytest.mark.parametrize("filters", FILTERS)
+    def test_user_listing_filters_use_index(self, db_session, seeded, filters):
+        plan = capture_page_query(db_session, user_id=seeded.id, **filters)
+
+        assert_uses_index(plan)
+        assert not any("TEMP B-TREE" in step for step in plan), plan
+
+    @pytest.mark.parametrize("filters", FILTERS[1:4])
+    @pytest.mark.parametrize("sort_by", ["original_filename", "file_size"])
+    def test_user_listing_filter_with_other_sort_uses_index(
+        self, db_session, seeded, filters, sort_by
+    ):
+        plan = capture_page_query(
+            db_session, user_id=seeded.id, sort_by=sort_by, **filters
+        )
+
+        assert_uses_index(plan)
+
+    def test_user_listing_keyset_page_uses_index_range(self, db_session, seeded):
+        plan = capture_page_query(
+            db_session,
+            user_id=seeded.id,
+            after=(datetime(2030, 1, 1), 10),
+        )
+
+        assert_uses_index(plan)
+        assert not any("TEMP B-TREE" in step for step in plan), plan
+
+    @pytest.mark.parametrize("sort_order", ["asc", "desc"])
+    def test_admin_listing_uses_index(self, db_session, seeded, sort_order):
+        plan = capture_page_query(
+            db_session, sort_by="created_at", sort_order=sort_order
+        )
+
+        assert_uses_index(plan)
+        assert not any("TEMP B-TREE" in step for step in plan), plan
+
+    @pytest.mark.parametrize("sort_order", ["asc", "desc"])
+    def test_admin_listing_by_id_walks_rowid_order(
+        self, db_session, seeded, sort_order
+    ):
+        plan = capture_page_query(db_session, sort_by="id", sort_order=sort_order)
+
+        # INTEGER PRIMARY KEY = rowid: обход таблицы уже в нужном порядке
+        assert not any("TEMP B-TREE" in step for step in plan), plan
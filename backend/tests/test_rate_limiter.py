@@ -0,0 +1,186 @@
+import threading
+
+import pytest
+
+from services import processing_service
+from services.rate_limiter import (
+    GcraRateLimiter,
+    MemoryGcraStore,
+    RateLimitExceeded,
+    SqliteGcraStore,
+    gcra_reserve,
+)
+from services.removebg_service import (
+    RemoveBgRateLimitError,
+    RemoveBgResult,
+    RemoveBgService,
+    get_removebg_service,
+)
+
+
+class FakeClock:
+    def __init__(self, now=1_000.0):
+        self.now = now
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def make_limiter(clock, rate=60, burst=1, max_wait=300.0, store=None):
+    return GcraRateLimiter(
+        key="test",
+        rate=rate,
+        period=60.0,
+        burst=burst,
+        max_wait=max_wait,
+        store=store,
+        clock=clock,
+        sleep=clock.sleep,
+    )
+
+
+@pytest.mark.unit
+class TestGcra:
+    def test_requests_are_queued_one_interval_apart(self):
+        limiter = make_limiter(FakeClock())
+
+        assert [limiter.reserve() for _ in range(4)] == [0.0, 1.0, 2.0, 3.0]
+
+    def test_burst_passes_without_waiting(self):
+        limiter = make_limiter(FakeClock(), burst=3)
+
+        assert [limiter.reserve() for _ in range(4)] == [0.0, 0.0, 0.0, 1.0]
+
+    def test_capacity_recovers_over_time(self):
+        clock = FakeClock()
+        limiter = make_limiter(clock)
+        limiter.reserve()
+        limiter.reserve()
+
+        clock.now += 10
+
+        assert limiter.reserve() == 0.0
+
+    def test_wait_longer_than_max_wait_raises_without_reserving(self):
+        limiter = make_limiter(FakeClock(), max_wait=1.5)
+        limiter.reserve()
+        limiter.reserve()
+
+        with pytest.raises(RateLimitExceeded) as exc:
+            limiter.reserve()
+
+        assert exc.value.retry_after == 2.0
+        # Отказ не занял слот: следующий ждёт всё те же 2 секунды
+        assert limiter.reserve(max_wait=10) == 2.0
+
+    def test_acquire_sleeps_for_its_slot(self):
+        clock = FakeClock()
+        limiter = make_limiter(clock)
+
+        for _ in range(3):
+            limiter.acquire()
+
+        assert clock.slept == [1.0, 1.0]
+
+    def test_defer_blocks_everyone_until_retry_after(self):
+        limiter = make_limiter(FakeClock(), burst=5)
+
+        limiter.defer(30)
+
+        assert limiter.reserve() == 30.0
+
+    def test_state_is_one_number(self):
+        new_tat, delay = gcra_reserve(None, now=10.0, interval=2.0, tolerance=0.0, max_wait=5.0)
+
+        assert (new_tat, delay) == (12.0, 0.0)
+
+
+@pytest.mark.integration
+class TestSqliteStore:
+    def test_limit_is_shared_between_stores_on_same_file(self, tmp_path):
+        clock = FakeClock()
+        path = str(tmp_path / "rate.db")
+        worker_a = make_limiter(clock, store=SqliteGcraStore(path))
+        worker_b = make_limiter(clock, store=SqliteGcraStore(path))
+
+        delays = [worker_a.reserve(), worker_b.reserve(), worker_a.reserve(), worker_b.reserve()]
+
+        assert delays == [0.0, 1.0, 2.0, 3.0]
+
+    def test_concurrent_reservations_get_distinct_slots(self, tmp_path):
+        clock = FakeClock()
+        path = str(tmp_path / "rate.db")
+        delays = []
+        lock = threading.Lock()
+
+        def worker():
+            limiter = make_limiter(clock, store=SqliteGcraStore(path))
+            for _ in range(5):
+                delay = limiter.reserve()
+                with lock:
+                    delays.append(delay)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert sorted(delays) == [float(i) for i in range(20)]
+
+
+@pytest.mark.unit
+class TestRemoveBgRateLimiting:
+    def _service(self, clock, monkeypatch, responses):
+        service = RemoveBgService(rate_limiter=make_limiter(clock, store=MemoryGcraStore()))
+        service.enabled = True
+        queue = list(responses)
+
+        def fake_request(image_data):
+            item = queue.pop(0)
+            if isinstance(item, Exception):
+                raise item
+            return item
+
+        monkeypatch.setattr(service, "_do_request", fake_request)
+        return service
+
+    def test_service_is_a_process_wide_singleton(self):
+        assert get_removebg_service() is get_removebg_service()
+        assert processing_service.get_removebg_service().service is get_removebg_service()
+
+    def test_jobs_wait_for_capacity_instead_of_failing(self, monkeypatch):
+        clock = FakeClock()
+        ok = RemoveBgResult(success=True, image_data=b"png")
+        service = self._service(clock, monkeypatch, [ok, ok, ok])
+
+        results = [service.remove_background(b"img") for _ in range(3)]
+
+        assert all(r.success for r in results)
+        assert clock.slept == [1.0, 1.0]
+
+    def test_api_429_defers_limiter_and_retries(self, monkeypatch):
+        clock = FakeClock()
+        ok = RemoveBgResult(success=True, image_data=b"png")
+        service = self._service(clock, monkeypatch, [RemoveBgRateLimitError(retry_after=20), ok])
+
+        result = service.remove_background(b"img")
+
+        assert result.success
+        assert clock.slept == [20.0]
+
+    def test_queue_longer_than_max_wait_raises_rate_limit_error(self, monkeypatch):
+        clock = FakeClock()
+        service = self._service(clock, monkeypatch, [])
+        service.rate_limiter.max_wait = 0
+        service.rate_limiter.reserve()
+
+        with pytest.raises(RemoveBgRateLimitError) as exc:
+            service.remove_background(b"img")
+
+        assert exc.value.retry_after == 1
@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from services.reconciliation_service import BloomFilter, StorageReconciler
+from tests.conftest import create_user_in_db, create_media_in_db
+
+OLD = datetime.now(timezone.utc) - timedelta(days=2)
+FRESH = datetime.now(timezone.utc)
+
+
+class ListingStorage:
+    def __init__(self, objects):
+        self.objects = objects
+        self.deleted = []
+
+    def list_prefixes(self):
+        return sorted({name.split("/", 1)[0] + "/" for name in self.objects})
+
+    def iter_objects(self, prefix):
+        for name, modified in self.objects.items():
+            if name.startswith(prefix):
+                yield name, modified
+
+    def delete_objects(self, object_names):
+        self.deleted.extend(object_names)
+        return []
+
+
+@pytest.mark.unit
+class TestStorageReconciler:
+    def _setup(self, db_session):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+        create_media_in_db(db_session, user.id, "a.jpg", processed=True)
+        storage = ListingStorage(
+            {
+                f"{user.id}/original/a.jpg": OLD,
+                f"{user.id}/processed/a.jpg": OLD,
+                f"{user.id}/orphan/b.jpg": OLD,
+                f"{user.id}/uploading/c.jpg": FRESH,
+                "999/original/gone.jpg": OLD,
+                "removebg-cache/abc.png": OLD,
+            }
+        )
+        return user, storage
+
+    def test_dry_run_reports_orphans_without_deleting(self, db_session):
+        user, storage = self._setup(db_session)
+
+        report = StorageReconciler(db_session, storage, dry_run=True).run()
+
+        assert report.orphans == 2
+        assert sorted(report.sample) == sorted(
+            ["999/original/gone.jpg", f"{user.id}/orphan/b.jpg"]
+        )
+        assert report.skipped_recent == 1
+        assert storage.deleted == []
+
+    def test_delete_mode_removes_orphans_in_batches(self, db_session):
+        user, storage = self._setup(db_session)
+
+        report = StorageReconciler(
+            db_session, storage, dry_run=False, batch_size=1
+        ).run()
+
+        assert report.deleted == 2
+        assert sorted(storage.deleted) == sorted(
+            ["999/original/gone.jpg", f"{user.id}/orphan/b.jpg"]
+        )
+        assert "removebg-cache/abc.png" not in storage.deleted
+
+    def test_bloom_filter_is_used_for_large_prefixes(self, db_session):
+        user, storage = self._setup(db_session)
+
+        report = StorageReconciler(
+            db_session, storage, dry_run=False, set_limit=0
+        ).run()
+
+        assert f"{user.id}/original/a.jpg" not in storage.deleted
+        assert report.deleted == 2
+
+    def test_prefix_is_matched_only_against_its_owner(self, db_session):
+        user, storage = self._setup(db_session)
+        other = create_user_in_db(db_session, "u2", "u2@test.com", "pass")
+        foreign = create_media_in_db(db_session, other.id, "b.jpg")
+        foreign.original_object_name = f"{user.id}/orphan/b.jpg"
+        unowned = create_media_in_db(db_session, user.id, "gone.jpg")
+        unowned.original_object_name = "999/original/gone.jpg"
+        unowned.user_id = None
+        db_session.commit()
+
+        strict = StorageReconciler(db_session, storage, dry_run=True).run()
+        relaxed = StorageReconciler(db_session, storage, dry_run=True, include_unowned=True).run()
+
+        assert sorted(strict.sample) == sorted(["999/original/gone.jpg", f"{user.id}/orphan/b.jpg"])
+        assert relaxed.sample == [f"{user.id}/orphan/b.jpg"]
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(capacity=1000)
+        names = [f"1/{i}/file.jpg" for i in range(1000)]
+        for name in names:
+            bloom.add(name)
+
+        assert all(name in bloom for name in names)
+        false_positives = sum(f"2/{i}/x.jpg" in bloom for i in range(1000))
+        assert false_positives < 20
@@ -0,0 +1,195 @@
+import io
+from datetime import timedelta
+
+import pytest
+from PIL import Image
+
+from models.models import RemoveBgCacheEntry
+from services import processing_service, removebg_cache
+from services.removebg_cache import CACHE_PREFIX, RemoveBgCache, cache_key, get_cache_counters
+from services.removebg_service import RemoveBgResult
+from tests.conftest import Clock, TestingSessionLocal, auth_header, create_user_in_db, login_user
+
+PARAMS = {"size": "auto", "format": "png"}
+
+
+def make_png(color) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (8, 8), color).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+PHOTO = make_png((255, 0, 0))
+OTHER = make_png((0, 0, 255))
+
+
+class DictStorage:
+    """Хранилище-словарь: put_bytes/download_bytes/delete_objects."""
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_bytes(self, object_name, data, content_type=None):
+        self.objects[object_name] = data
+        return object_name
+
+    def download_bytes(self, object_name):
+        return self.objects[object_name]
+
+    def delete_objects(self, object_names):
+        for name in object_names:
+            self.objects.pop(name, None)
+        return []
+
+
+class FakeRemoveBg:
+    def __init__(self):
+        self.calls = 0
+
+    def is_available(self):
+        return True
+
+    def request_params(self):
+        return PARAMS
+
+    def remove_background(self, image_data):
+        """Маска (channels=alpha): весь кадр — передний план."""
+        self.calls += 1
+        size = Image.open(io.BytesIO(image_data)).size
+        buf = io.BytesIO()
+        Image.new("L", size, 255).save(buf, format="PNG")
+        return RemoveBgResult(success=True, image_data=buf.getvalue())
+
+
+@pytest.fixture(autouse=True)
+def reset_counters():
+    get_cache_counters().reset()
+    yield
+    get_cache_counters().reset()
+
+
+def make_cache(storage, clock=None, **kwargs):
+    return RemoveBgCache(storage, session_factory=TestingSessionLocal, clock=clock or Clock(), **kwargs)
+
+
+@pytest.mark.unit
+class TestCacheKey:
+    def test_same_bytes_and_params_give_same_key(self):
+        assert cache_key(b"img", PARAMS) == cache_key(b"img", dict(reversed(PARAMS.items())))
+
+    def test_bytes_or_params_change_the_key(self):
+        base = cache_key(b"img", PARAMS)
+
+        assert cache_key(b"img2", PARAMS) != base
+        assert cache_key(b"img", {**PARAMS, "size": "full"}) != base
+
+
+@pytest.mark.integration
+class TestRemoveBgCache:
+    def test_miss_then_hit(self, db_session):
+        storage = DictStorage()
+        cache = make_cache(storage)
+        key = cache_key(b"img", PARAMS)
+
+        assert cache.get(key) is None
+        cache.put(key, b"result")
+
+        assert cache.get(key) == b"result"
+        assert all(name.startswith(CACHE_PREFIX) for name in storage.objects)
+        assert (get_cache_counters().hits, get_cache_counters().misses) == (1, 1)
+        assert db_session.query(RemoveBgCacheEntry).one().hits == 1
+
+    def test_entry_unused_longer_than_ttl_is_a_miss_and_evicted(self, db_session):
+        storage, clock = DictStorage(), Clock()
+        cache = make_cache(storage, clock, ttl=timedelta(days=1))
+        cache.put("a" * 64, b"old")
+
+        clock.now += timedelta(days=2)
+        assert cache.get("a" * 64) is None
+
+        cache.put("b" * 64, b"new")
+        assert [e.cache_key for e in db_session.query(RemoveBgCacheEntry).all()] == ["b" * 64]
+        assert list(storage.objects) == [removebg_cache.object_name_for("b" * 64)]
+
+    def test_result_stored_after_ttl_miss_is_kept(self, db_session):
+        storage, clock = DictStorage(), Clock()
+        cache = make_cache(storage, clock, ttl=timedelta(days=1))
+        key = "a" * 64
+        cache.put(key, b"old")
+
+        clock.now += timedelta(days=2)
+        assert cache.get(key) is None
+        cache.put(key, b"fresh")
+
+        assert cache.get(key) == b"fresh"
+        entry = db_session.query(RemoveBgCacheEntry).one()
+        assert (entry.last_used_at, entry.size_bytes) == (clock.now, len(b"fresh"))
+
+    def test_size_cap_evicts_least_recently_used(self, db_session):
+        storage, clock = DictStorage(), Clock()
+        cache = make_cache(storage, clock, max_bytes=10)
+        for key in ("a", "b"):
+            cache.put(key * 64, b"1234")
+            clock.now += timedelta(minutes=1)
+        cache.get("a" * 64)
+        clock.now += timedelta(minutes=1)
+
+        cache.put("c" * 64, b"1234")
+
+        keys = sorted(e.cache_key[0] for e in db_session.query(RemoveBgCacheEntry).all())
+        assert keys == ["a", "c"]
+        assert len(storage.objects) == 2
+
+    def test_storage_failure_is_a_miss(self, db_session):
+        storage = DictStorage()
+        cache = make_cache(storage)
+        cache.put("a" * 64, b"x")
+        storage.objects.clear()
+
+        assert cache.get("a" * 64) is None
+
+
+@pytest.mark.integration
+class TestRemoveBgCacheInProcessing:
+    def test_identical_input_calls_api_once(self, db_session, monkeypatch):
+        api = FakeRemoveBg()
+        storage = DictStorage()
+        monkeypatch.setattr(processing_service, "get_removebg_service", lambda: api)
+        monkeypatch.setattr(removebg_cache, "SessionLocal", TestingSessionLocal)
+
+        first = processing_service._apply_remove_bg(PHOTO, storage)
+        second = processing_service._apply_remove_bg(PHOTO, storage)
+        other = processing_service._apply_remove_bg(OTHER, storage)
+
+        assert first == second
+        assert first[1] and other[1]
+        assert Image.open(io.BytesIO(first[0])).getpixel((0, 0)) == (255, 0, 0, 255)
+        assert Image.open(io.BytesIO(other[0])).getpixel((0, 0)) == (0, 0, 255, 255)
+        assert api.calls == 2
+
+    def test_stats_endpoint_reports_hit_rate_and_credits_saved(self, client, db_session, monkeypatch):
+        monkeypatch.setattr(processing_service, "get_removebg_service", FakeRemoveBg)
+        monkeypatch.setattr(removebg_cache, "SessionLocal", TestingSessionLocal)
+        storage = DictStorage()
+        for _ in range(3):
+            processing_service._apply_remove_bg(PHOTO, storage)
+        create_user_in_db(db_session, "admin", "admin@test.com", "pw123", role="admin")
+        create_user_in_db(db_session, "user", "user@test.com", "pw123")
+
+        resp = client.get(
+            "/api/media/removebg/cache/stats",
+            headers=auth_header(login_user(client, "admin@test.com", "pw123")),
+        )
+        forbidden = client.get(
+            "/api/media/removebg/cache/stats",
+            headers=auth_header(login_user(client, "user@test.com", "pw123")),
+        )
+
+        assert resp.status_code == 200
+        stats = resp.json()
+        assert stats["entries"] == 1
+        assert (stats["hits"], stats["misses"]) == (2, 1)
+        assert stats["hit_rate"] == pytest.approx(2 / 3)
+        assert stats["credits_saved"] == 2
+        assert stats["lifetime_hits"] == 2
+        assert forbidden.status_code == 403
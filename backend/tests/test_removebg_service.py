@@ -0,0 +1,117 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services import removebg_service
+from services.rate_limiter import GcraRateLimiter
+from services.removebg_service import (
+    RemoveBgQuotaError,
+    RemoveBgService,
+    close_removebg_http_client,
+    get_removebg_http_client,
+)
+
+PNG = b"\x89PNG\r\n\x1a\nstub"
+
+
+class StubRemoveBg(BaseHTTPRequestHandler):
+    """Локальная заглушка Remove.bg: считает TCP-соединения и запросы."""
+
+    protocol_version = "HTTP/1.1"
+    connections = 0
+    requests = []
+    status = 200
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        type(self).requests.append((self.headers.get("X-Api-Key"), len(body)))
+        payload = PNG if self.status == 200 else b'{"errors": [{"title": "No credits"}]}'
+        self.send_response(self.status)
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("X-Credits-Remaining", "42")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    handler = type("Handler", (StubRemoveBg,), {"connections": 0, "requests": [], "status": 200})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield handler, f"http://127.0.0.1:{server.server_port}/v1.0/removebg"
+    server.shutdown()
+    server.server_close()
+    close_removebg_http_client()
+
+
+def make_service(url):
+    service = RemoveBgService(
+        rate_limiter=GcraRateLimiter(key="stub", rate=10_000),
+        api_url=url,
+    )
+    service.api_key = "test-key"
+    service.enabled = True
+    return service
+
+
+@pytest.mark.integration
+class TestRemoveBgHttpClient:
+    def test_requests_reuse_one_keep_alive_connection(self, stub_server):
+        handler, url = stub_server
+        service = make_service(url)
+
+        results = [service.remove_background(b"image-bytes") for _ in range(5)]
+
+        assert all(r.success and r.image_data == PNG for r in results)
+        assert results[0].credits_remaining == 42
+        assert len(handler.requests) == 5
+        assert handler.requests[0][0] == "test-key"
+        assert handler.connections == 1
+
+    def test_client_is_shared_across_service_instances(self, stub_server):
+        handler, url = stub_server
+
+        make_service(url).remove_background(b"a")
+        make_service(url).remove_background(b"b")
+
+        assert handler.connections == 1
+
+    def test_close_releases_connections_and_rebuilds_lazily(self, stub_server):
+        handler, url = stub_server
+        service = make_service(url)
+        service.remove_background(b"a")
+        first = get_removebg_http_client()
+
+        close_removebg_http_client()
+        service.remove_background(b"b")
+
+        assert first.is_closed
+        assert get_removebg_http_client() is not first
+        assert handler.connections == 2
+
+    def test_quota_error_is_normalized(self, stub_server):
+        handler, url = stub_server
+        handler.status = 402
+
+        with pytest.raises(RemoveBgQuotaError):
+            make_service(url).remove_background(b"a")
+
+    def test_fine_grained_timeouts_and_limits(self, monkeypatch):
+        monkeypatch.setattr(removebg_service.settings, "REMOVEBG_CONNECT_TIMEOUT_SECONDS", 1.5)
+        monkeypatch.setattr(removebg_service.settings, "REMOVEBG_POOL_TIMEOUT_SECONDS", 2.5)
+        client = removebg_service._build_http_client()
+        try:
+            assert client.timeout.connect == 1.5
+            assert client.timeout.pool == 2.5
+            assert client.timeout.read == removebg_service.settings.REMOVEBG_TIMEOUT_SECONDS
+        finally:
+            client.close()
@@ -0,0 +1,86 @@
+import io
+
+import pytest
+from PIL import Image
+
+from models.models import MediaItem
+from repositories.media_repository import MediaRepository
+from services import processing_service
+from services.media_service import MediaService
+from services.rendition_service import build_image_renditions
+from tests.conftest import (
+    TestingSessionLocal,
+    create_user_in_db,
+    create_media_in_db,
+)
+
+
+def make_image_bytes(size=(2000, 1500), mode="RGB", fmt="JPEG"):
+    buf = io.BytesIO()
+    Image.new(mode, size, (200, 100, 50, 255)[: len(mode)]).save(buf, format=fmt)
+    return buf.getvalue()
+
+
+@pytest.mark.unit
+class TestRenditionService:
+    def test_renditions_are_downscaled(self):
+        renditions = build_image_renditions(make_image_bytes())
+
+        thumb = Image.open(io.BytesIO(renditions.thumbnail))
+        preview = Image.open(io.BytesIO(renditions.preview))
+
+        assert max(thumb.size) == 320
+        assert max(preview.size) == 1280
+        assert thumb.size[0] / thumb.size[1] == pytest.approx(2000 / 1500, rel=0.01)
+
+    def test_renditions_are_much_smaller_than_source(self):
+        source = make_image_bytes(size=(3000, 2000), fmt="PNG")
+
+        renditions = build_image_renditions(source)
+
+        assert len(renditions.thumbnail) * 10 < len(source)
+
+    def test_small_image_is_not_upscaled(self):
+        renditions = build_image_renditions(make_image_bytes(size=(100, 80)))
+
+        assert Image.open(io.BytesIO(renditions.thumbnail)).size == (100, 80)
+
+    def test_transparent_image_keeps_alpha_in_webp(self):
+        image = Image.new("RGBA", (800, 600), (0, 0, 0, 0))
+        image.paste((200, 100, 50, 255), (200, 150, 600, 450))
+        buf = io.BytesIO()
+        image.save(buf, format="PNG")
+        source = buf.getvalue()
+
+        renditions = build_image_renditions(source)
+
+        assert renditions.content_type == "image/webp"
+        assert "A" in Image.open(io.BytesIO(renditions.thumbnail)).getbands()
+
+
+@pytest.mark.integration
+class TestProcessingRenditions:
+    def test_processing_stores_thumbnail_and_preview(
+        self, db_session, fake_storage, monkeypatch
+    ):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pass")
+        item = create_media_in_db(db_session, user.id, original_filename="photo.jpg")
+
+        monkeypatch.setattr(processing_service, "SessionLocal", TestingSessionLocal)
+        monkeypatch.setattr(
+            fake_storage, "download_bytes", lambda name: make_image_bytes()
+        )
+
+        processing_service.process_media_item(item.id)
+
+        db_session.expire_all()
+        stored = db_session.get(MediaItem, item.id)
+        assert stored.processed is True
+        assert stored.thumbnail_object_name.endswith("photo_thumb.webp")
+        assert stored.preview_object_name.endswith("photo_preview.webp")
+
+        response = MediaService(
+            media_repo=MediaRepository(db_session), storage=fake_storage
+        ).get_media(item.id, user)
+        assert response.thumbnail_url.endswith("photo_thumb.webp?expires=3600")
+        assert response.preview_url is not None
@@ -0,0 +1,179 @@
+import pytest
+
+from minio.deleteobjects import DeleteError
+
+from services import storage_service
+from services.storage_service import StorageService
+from tests.conftest import auth_header, create_user_in_db, login_user
+
+
+class CountingMinio:
+    def __init__(self):
+        self.bucket_checks = 0
+        self.created = []
+
+    def bucket_exists(self, bucket):
+        self.bucket_checks += 1
+        return False
+
+    def make_bucket(self, bucket):
+        self.created.append(bucket)
+
+
+class SigningMinio:
+    def __init__(self):
+        self.signed = []
+
+    def presigned_get_object(self, bucket, object_name, expires, request_date):
+        self.signed.append(object_name)
+        return f"http://minio.local/{object_name}?date={request_date.isoformat()}"
+
+
+class BatchDeletingMinio:
+    def __init__(self, failing=()):
+        self.batches = []
+        self.failing = set(failing)
+
+    def remove_objects(self, bucket, delete_objects):
+        batch = [obj.name for obj in delete_objects]
+        self.batches.append(batch)
+        return iter(
+            DeleteError("AccessDenied", "denied", name, None)
+            for name in batch
+            if name in self.failing
+        )
+
+
+@pytest.fixture
+def fresh_client():
+    storage_service.close_minio_client()
+    yield
+    storage_service.close_minio_client()
+
+
+@pytest.fixture
+def url_cache():
+    storage_service.get_url_cache().clear()
+    yield storage_service.get_url_cache()
+    storage_service.get_url_cache().clear()
+
+
+@pytest.mark.unit
+class TestStorageService:
+    def test_minio_client_is_shared_between_instances(self, fresh_client):
+        first = StorageService()
+        second = StorageService()
+
+        assert first.client is second.client
+
+    def test_init_does_not_touch_bucket(self, monkeypatch, fresh_client):
+        fake = CountingMinio()
+        monkeypatch.setattr(storage_service, "get_minio_client", lambda: fake)
+
+        StorageService()
+        StorageService()
+
+        assert fake.bucket_checks == 0
+
+    def test_ensure_bucket_creates_missing_bucket(self, monkeypatch, fresh_client):
+        fake = CountingMinio()
+        monkeypatch.setattr(storage_service, "get_minio_client", lambda: fake)
+
+        storage_service.ensure_bucket()
+
+        assert fake.bucket_checks == 1
+        assert fake.created == [storage_service.settings.MINIO_BUCKET]
+
+    def test_pool_stats_report_configured_pool(self, fresh_client):
+        assert storage_service.get_pool_stats() == {
+            "initialized": False,
+            "pools": [],
+        }
+
+        storage_service.get_minio_client()
+        storage_service._http_client.connection_from_url("http://localhost:9000")
+
+        stats = storage_service.get_pool_stats()
+
+        assert stats["initialized"] is True
+        assert stats["pools"][0]["host"] == "localhost:9000"
+        assert stats["pools"][0]["maxsize"] == storage_service.settings.MINIO_POOL_MAXSIZE
+        assert stats["pools"][0]["connections_created"] == 0
+
+    def test_presigned_url_is_stable_within_window(self, monkeypatch, url_cache):
+        client = SigningMinio()
+        service = StorageService(client=client)
+        monkeypatch.setattr(storage_service.time, "time", lambda: 1_000_000.0)
+
+        first = service.get_presigned_url("1/a/photo.jpg")
+        monkeypatch.setattr(storage_service.time, "time", lambda: 1_000_100.0)
+        second = service.get_presigned_url("1/a/photo.jpg")
+
+        assert first == second
+        assert client.signed == ["1/a/photo.jpg"]
+
+    def test_presigned_url_is_resigned_in_next_window(self, monkeypatch, url_cache):
+        client = SigningMinio()
+        service = StorageService(client=client)
+        window = storage_service.settings.PRESIGNED_URL_WINDOW_SECONDS
+        monkeypatch.setattr(storage_service.time, "time", lambda: 1_000_000.0)
+
+        first = service.get_presigned_url("1/a/photo.jpg")
+        monkeypatch.setattr(
+            storage_service.time, "time", lambda: 1_000_000.0 + window
+        )
+        second = service.get_presigned_url("1/a/photo.jpg")
+
+        assert first != second
+        assert len(client.signed) == 2
+
+    def test_batch_signing_signs_each_name_once(self, url_cache):
+        client = SigningMinio()
+        service = StorageService(client=client)
+
+        urls = service.get_presigned_urls(["1/a.jpg", "1/b.jpg", "1/a.jpg"])
+
+        assert set(urls) == {"1/a.jpg", "1/b.jpg"}
+        assert sorted(client.signed) == ["1/a.jpg", "1/b.jpg"]
+
+    def test_url_cache_evicts_least_recently_used(self):
+        cache = storage_service.PresignedUrlCache(max_size=2)
+
+        cache.put(("a", 1, 0), "url-a", expires_at=100)
+        cache.put(("b", 1, 0), "url-b", expires_at=100)
+        cache.get(("a", 1, 0), now=0)
+        cache.put(("c", 1, 0), "url-c", expires_at=100)
+
+        assert cache.get(("b", 1, 0), now=0) is None
+        assert cache.get(("a", 1, 0), now=0) == "url-a"
+        assert cache.get(("a", 1, 0), now=100) is None
+
+    def test_delete_objects_batches_and_reports_failures(self, monkeypatch):
+        monkeypatch.setattr(storage_service, "REMOVE_OBJECTS_BATCH_SIZE", 2)
+        client = BatchDeletingMinio(failing={"1/b"})
+        service = StorageService(client=client)
+
+        failures = service.delete_objects(["1/a", "1/b", "1/c", "1/a"])
+
+        assert client.batches == [["1/a", "1/b"], ["1/c"]]
+        assert failures == [("1/b", "AccessDenied: denied")]
+
+
+@pytest.mark.integration
+class TestStorageHealthEndpoint:
+    def test_pool_stats_are_admin_only(self, client, db_session):
+        create_user_in_db(db_session, "admin", "admin@test.com", "pw123", role="admin")
+        create_user_in_db(db_session, "user", "user@test.com", "pw123")
+
+        anonymous = client.get("/health/storage")
+        forbidden = client.get(
+            "/health/storage", headers=auth_header(login_user(client, "user@test.com", "pw123"))
+        )
+        resp = client.get(
+            "/health/storage", headers=auth_header(login_user(client, "admin@test.com", "pw123"))
+        )
+
+        assert anonymous.status_code == 401
+        assert forbidden.status_code == 403
+        assert resp.status_code == 200
+        assert set(resp.json()) == {"status", "minio_pool", "presigned_url_cache"}
@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from models.models import RefreshToken
+from repositories.token_repository import TokenRepository
+from repositories.user_repository import UserRepository
+from services.auth_service import AuthService
+from services.token_sweeper import TokenSweeper
+from tests.conftest import TestingSessionLocal, create_user_in_db
+
+
+def add_token(db, user, token_hash, expires_in=timedelta(days=1), revoked_ago=None, generation=0):
+    now = datetime.utcnow()
+    token = RefreshToken(
+        user_id=user.id,
+        token_hash=token_hash,
+        expires_at=now + expires_in,
+        revoked=revoked_ago is not None,
+        revoked_at=now - revoked_ago if revoked_ago is not None else None,
+        generation=generation,
+    )
+    db.add(token)
+    db.commit()
+    return token
+
+
+def remaining(db):
+    db.expire_all()
+    return sorted(t.token_hash for t in db.query(RefreshToken).all())
+
+
+@pytest.mark.integration
+class TestGenerationRevocation:
+    def test_revoke_all_is_a_single_generation_bump(self, db_session):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pw")
+        repo = TokenRepository(db_session)
+        tokens = [repo.create(user.id, f"h{i}", "ua") for i in range(3)]
+
+        repo.revoke_all_for_user(user.id)
+
+        db_session.expire_all()
+        assert db_session.get(type(user), user.id).token_version == 1
+        # Строки токенов не переписываются
+        assert all(not t.revoked for t in tokens)
+        assert all(repo.is_revoked(t) for t in tokens)
+
+    def test_tokens_issued_after_revoke_all_are_valid(self, db_session):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pw123")
+        service = AuthService(UserRepository(db_session), TokenRepository(db_session))
+        old = service.login("u1@test.com", "pw123", "ua")["refresh_token"]
+
+        TokenRepository(db_session).revoke_all_for_user(user.id)
+        fresh = service.login("u1@test.com", "pw123", "ua")["refresh_token"]
+
+        assert "access_token" in service.refresh(fresh, "ua")
+        with pytest.raises(HTTPException) as exc:
+            service.refresh(old, "ua")
+        assert exc.value.status_code == 401
+
+
+@pytest.mark.integration
+class TestTokenSweeper:
+    def _sweeper(self, **kwargs):
+        return TokenSweeper(session_factory=TestingSessionLocal, **kwargs)
+
+    def test_deletes_expired_old_revoked_and_superseded(self, db_session):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pw")
+        add_token(db_session, user, "live")
+        add_token(db_session, user, "expired", expires_in=timedelta(seconds=-1))
+        add_token(db_session, user, "revoked-old", revoked_ago=timedelta(hours=25))
+        add_token(db_session, user, "revoked-recent", revoked_ago=timedelta(minutes=5))
+        user.token_version = 1
+        add_token(db_session, user, "current-gen", generation=1)
+        db_session.query(RefreshToken).filter(RefreshToken.token_hash == "live").update({"generation": 1})
+        add_token(db_session, user, "superseded", generation=0)
+        db_session.commit()
+
+        report = self._sweeper(reuse_window=timedelta(hours=24)).sweep()
+
+        assert report == {"expired": 1, "revoked": 1, "superseded": 2}
+        # Недавно отозванный ротацией остаётся — по нему ловим повторное использование
+        assert remaining(db_session) == ["current-gen", "live"]
+
+    def test_deletes_in_batches(self, db_session):
+        user = create_user_in_db(db_session, "u1", "u1@test.com", "pw")
+        for i in range(7):
+            add_token(db_session, user, f"e{i}", expires_in=timedelta(seconds=-1))
+        add_token(db_session, user, "live")
+
+        report = self._sweeper(batch_size=3).sweep()
+
+        assert report["expired"] == 7
+        assert remaining(db_session) == ["live"]
+
+    def test_recently_rotated_token_still_triggers_reuse_detection(self, db_session):
+        create_user_in_db(db_session, "u1", "u1@test.com", "pw123")
+        service = AuthService(UserRepository(db_session), TokenRepository(db_session))
+        old = service.login("u1@test.com", "pw123", "ua")["refresh_token"]
+        service.refresh(old, "ua")
+
+        self._sweeper().sweep()
+
+        with pytest.raises(HTTPException) as exc:
+            service.refresh(old, "ua")
+        assert "reuse" in exc.value.detail.lower()
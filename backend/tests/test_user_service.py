@@ -3,8 +3,9 @@ from fastapi import HTTPException
 
 from repositories.user_repository import UserRepository
 from repositories.token_repository import TokenRepository
+from repositories.media_repository import MediaRepository
 from services.user_service import UserService
-from tests.conftest import create_user_in_db
+from tests.conftest import create_user_in_db, create_media_in_db
 
 
 @pytest.mark.unit
@@ -114,6 +115,51 @@ class TestUserService:
 
         assert UserRepository(db_session).get_by_id(victim.id) is None
 
+    def test_delete_user_removes_media_and_returns_objects(self, db_session):
+        admin = create_user_in_db(
+            db_session, "admin", "admin@test.com", "pass", role="admin"
+        )
+        victim = create_user_in_db(db_session, "victim", "victim@test.com", "pass")
+        item_id = create_media_in_db(db_session, victim.id, "a.jpg", processed=True).id
+
+        service = UserService(
+            user_repo=UserRepository(db_session),
+            token_repo=TokenRepository(db_session),
+            media_repo=MediaRepository(db_session),
+        )
+
+        victim_id = victim.id
+        object_names = service.delete_user(victim_id, admin)
+
+        assert sorted(object_names) == [
+            f"{victim_id}/original/a.jpg",
+            f"{victim_id}/processed/a.jpg",
+        ]
+        assert MediaRepository(db_session).get_by_id(item_id) is None
+
+    def test_failed_user_delete_keeps_media(self, db_session, monkeypatch):
+        admin = create_user_in_db(
+            db_session, "admin", "admin@test.com", "pass", role="admin"
+        )
+        victim = create_user_in_db(db_session, "victim", "victim@test.com", "pass")
+        item_id = create_media_in_db(db_session, victim.id, "a.jpg").id
+        user_repo = UserRepository(db_session)
+
+        def broken_delete(user):
+            raise RuntimeError("db is down")
+
+        monkeypatch.setattr(user_repo, "delete", broken_delete)
+        service = UserService(
+            user_repo=user_repo,
+            token_repo=TokenRepository(db_session),
+            media_repo=MediaRepository(db_session),
+        )
+
+        with pytest.raises(RuntimeError):
+            service.delete_user(victim.id, admin)
+
+        assert MediaRepository(db_session).get_by_id(item_id) is not None
+
     @pytest.mark.security
     def test_delete_self_raises_400(self, db_session):
         admin = create_user_in_db(
@@ -25,12 +25,92 @@ import {
   WifiOff,
   Loader2,
 } from 'lucide-react';
-import { api, MediaResponse, RemoveBgStatus } from '../utils/api';
+import { api, MediaResponse, MediaStatus, ProcessingStage, RemoveBgStatus } from '../utils/api';
 
 interface CensoringPageProps {
   onNavigate: (page: string) => void;
 }
 
+// ── Server-side processing progress (GET /api/media/{id}/status) ──
+
+const STATUS_POLL_INTERVAL_MS = 700;
+const STATUS_POLL_TIMEOUT_MS = 5 * 60 * 1000;
+const STREAM_CONNECT_TIMEOUT_MS = 5000;
+
+const STAGE_PROGRESS: Record<ProcessingStage, number> = {
+  queued: 0,
+  downloading: 0.15,
+  detecting: 0.3,
+  blurring: 0.5,
+  removing_background: 0.65,
+  uploading: 0.85,
+  done: 1,
+  failed: 1,
+};
+
+const isFinished = (status?: MediaStatus) => status?.status === 'done' || status?.status === 'failed';
+
+/**
+ * Статусы из SSE-потока /api/media/events; снимок /status берётся только
+ * после кадра «: connected» (подписка на сервере уже есть) и ловит файлы,
+ * успевшие обработаться раньше. Если поток недоступен — опрос /status
+ * с интервалом.
+ */
+async function waitForProcessing(
+  media: MediaResponse[],
+  onProgress: (done: number) => void,
+): Promise<Map<number, MediaStatus>> {
+  const statuses = new Map<number, MediaStatus>();
+  const ids = new Set(media.map(m => m.id));
+  const allFinished = () => media.every(m => isFinished(statuses.get(m.id)));
+  const report = () => onProgress(
+    media.reduce((sum, m) => sum + STAGE_PROGRESS[statuses.get(m.id)?.status ?? 'queued'], 0),
+  );
+
+  const controller = new AbortController();
+  let finish = () => {};
+  const finished = new Promise<void>(resolve => { finish = resolve; });
+  const accept = (status: MediaStatus) => {
+    if (!ids.has(status.id)) return;
+    statuses.set(status.id, status);
+    report();
+    if (allFinished()) finish();
+  };
+
+  // Поток закрылся или не открылся — дальше опросом
+  let opened = () => {};
+  const connected = new Promise<void>(resolve => { opened = resolve; });
+  const stream = api.streamMediaEvents(accept, controller.signal, opened).then(
+    () => 'closed' as const,
+    () => 'closed' as const,
+  );
+  const timeout = setTimeout(finish, STATUS_POLL_TIMEOUT_MS);
+  try {
+    // Снимок раньше подписки потерял бы «done», пришедший между ними.
+    // Нет «: connected» (прокси буферизует поток) — бросаем поток, дальше опросом
+    const connectTimeout = new Promise<'timeout'>(resolve =>
+      setTimeout(() => resolve('timeout'), STREAM_CONNECT_TIMEOUT_MS));
+    if (await Promise.race([connected, stream, connectTimeout]) === 'timeout') controller.abort();
+    const snapshot = await Promise.all(media.map(m => api.getMediaStatus(m.id)));
+    snapshot.forEach(status => {
+      if (!isFinished(statuses.get(status.id))) accept(status);
+    });
+
+    if (await Promise.race([finished.then(() => 'done' as const), stream]) === 'closed') {
+      const deadline = Date.now() + STATUS_POLL_TIMEOUT_MS;
+      while (!allFinished() && Date.now() < deadline) {
+        await new Promise(resolve => setTimeout(resolve, STATUS_POLL_INTERVAL_MS));
+        const pending = media.filter(m => !isFinished(statuses.get(m.id)));
+        (await Promise.all(pending.map(m => api.getMediaStatus(m.id)))).forEach(accept);
+      }
+    }
+  } finally {
+    clearTimeout(timeout);
+    controller.abort();
+  }
+  return statuses;
+}
+
 interface ProcessedFile {
   id: string;
   name: string;
@@ -63,12 +143,14 @@ export function CensoringPage({ onNavigate }: CensoringPageProps) {
     error: string | null;
     message: string;
     rateLimit: number;
+    backend: RemoveBgStatus['backend'];
   }>({
     loading: true,
     available: false,
     error: null,
     message: '',
     rateLimit: 0,
+    backend: 'remove.bg',
   });
 
   // ── File state ──
@@ -96,6 +178,7 @@ export function CensoringPage({ onNavigate }: CensoringPageProps) {
           error: null,
           message: status.message,
           rateLimit: status.rate_limit_per_minute,
+          backend: status.backend,
         });
       } catch (err: any) {
         // 6.3: Graceful degradation — ошибка проверки не ломает страницу
@@ -105,6 +188,7 @@ export function CensoringPage({ onNavigate }: CensoringPageProps) {
           error: err.message || 'Could not check Remove.bg status',
           message: '',
           rateLimit: 0,
+          backend: 'remove.bg',
         });
       }
     };
@@ -168,8 +252,6 @@ export function CensoringPage({ onNavigate }: CensoringPageProps) {
     setProgress(0);
     setIsUploading(true);
 
-    const startTime = Date.now();
-
     try {
       const uploadedMedia: MediaResponse[] = [];
 
@@ -184,17 +266,18 @@ export function CensoringPage({ onNavigate }: CensoringPageProps) {
             censorOptions.removeBg,
           );
           uploadedMedia.push(media);
-          setProgress(fileProgress);
+          setProgress(fileProgress / 2);
         } catch (err: any) {
           console.error(`Error uploading ${file.name}:`, err);
           throw new Error(`Failed to upload ${file.name}: ${err.message}`);
         }
       }
 
-      const elapsed = Date.now() - startTime;
-      if (elapsed < 1000) {
-        await new Promise(resolve => setTimeout(resolve, 1000 - elapsed));
-      }
+      // Ждём реальной обработки на сервере: первая половина шкалы — загрузка,
+      // вторая — этапы обработки всех файлов
+      const statuses = await waitForProcessing(uploadedMedia, (done) => {
+        setProgress(50 + (done / uploadedMedia.length) * 50);
+      });
 
       const processedFilesData = await Promise.all(
         uploadedMedia.map(async (media) => {
@@ -220,7 +303,7 @@ export function CensoringPage({ onNavigate }: CensoringPageProps) {
             previewUrl,
             size: 'Unknown',
             // 6.1: Показываем статус удаления фона в результатах
-            bgRemoved: media.bg_removed || false,
+            bgRemoved: statuses.get(media.id)?.bg_removed ?? media.bg_removed ?? false,
           };
         })
       );
@@ -423,11 +506,13 @@ export function CensoringPage({ onNavigate }: CensoringPageProps) {
                                 <label htmlFor="removeBg" className="cursor-pointer font-medium">
                                   Remove Background
                                   <Badge variant="secondary" className="ml-2 text-xs bg-purple-100 text-purple-700">
-                                    External API
+                                    {removeBgStatus.backend === 'local' ? 'On-server model' : 'External API'}
                                   </Badge>
                                 </label>
                                 <p className="text-sm text-muted-foreground">
-                                  Remove image background using AI (powered by Remove.bg)
+                                  {removeBgStatus.backend === 'local'
+                                    ? 'Remove image background using AI (local model)'
+                                    : 'Remove image background using AI (powered by Remove.bg)'}
                                 </p>
                                 {removeBgStatus.rateLimit > 0 && (
                                   <p className="text-xs text-muted-foreground mt-1">
@@ -451,7 +536,10 @@ export function CensoringPage({ onNavigate }: CensoringPageProps) {
                                 </Badge>
                               </p>
                               <p className="text-sm text-muted-foreground">
-                                Remove.bg service is not configured. Contact administrator to enable this feature.
+                                {removeBgStatus.backend === 'local'
+                                  ? 'Local background removal model is not installed.'
+                                  : 'Remove.bg service is not configured.'}{' '}
+                                Contact administrator to enable this feature.
                               </p>
                             </div>
                           </div>
@@ -26,7 +26,7 @@ import {
     AlertCircle, Loader2, Search, ArrowUpDown, Pencil,
     ChevronLeft, ChevronRight, CheckCircle, Scissors,
 } from 'lucide-react';
-import {api, MediaResponse, PaginatedMediaResponse, User} from '../utils/api';
+import {api, MediaResponse, MediaStatus, PaginatedMediaResponse, User} from '../utils/api';
 import {SEOHead} from './SEOHead';
 import {previewCache} from '../utils/request-cache';
 import {SkeletonGrid} from './SkeletonCard';
@@ -189,9 +189,41 @@ export function DashboardPage({onNavigate, user}: DashboardPageProps) {
         };
     }, [debouncedSearch, processedFilter, fileTypeFilter, dateFrom, dateTo, sortBy, sortOrder, page]);
 
+    // Push-статусы вместо опроса: поток открыт, пока на странице есть
+    // необработанные файлы; готовый файл перечитывается один (свежие URL)
+    const hasPending = !!data?.items.some(i => !i.processed && i.processing_status !== 'failed');
+    useEffect(() => {
+        if (!hasPending) return;
+        const controller = new AbortController();
+
+        const applyStatus = async (status: MediaStatus) => {
+            let updated: MediaResponse | null = null;
+            if (status.status === 'done') {
+                updated = await api.getMedia(status.id).catch(() => null);
+            }
+            if (controller.signal.aborted) return;
+            setData(prev => prev && {
+                ...prev,
+                items: prev.items.map(item => item.id !== status.id ? item : (updated ?? {
+                    ...item,
+                    processing_status: status.status,
+                    processed: status.processed,
+                    bg_removed: status.bg_removed,
+                })),
+            });
+            const thumbnail = updated?.thumbnail_url;
+            if (thumbnail) setPreviews(prev => ({...prev, [status.id]: thumbnail}));
+        };
+
+        api.streamMediaEvents(applyStatus, controller.signal).catch(() => {
+            // Поток недоступен — статусы обновятся при следующей загрузке списка
+        });
+        return () => controller.abort();
+    }, [hasPending]);
+
     // Load previews with cache
     const loadPreviews = useCallback(async (items: MediaResponse[], signal: AbortSignal) => {
-        const imgs = items.filter(i => i.file_type === 'image');
+        const imgs = items.filter(i => i.file_type === 'image' || i.thumbnail_url);
         if (!imgs.length) {
             setPreviews({});
             return;
@@ -201,6 +233,11 @@ export function DashboardPage({onNavigate, user}: DashboardPageProps) {
         const toLoad: MediaResponse[] = [];
 
         for (const item of imgs) {
+            // Миниатюра с сервера — не нужно качать оригинал целиком
+            if (item.thumbnail_url) {
+                cached[item.id] = item.thumbnail_url;
+                continue;
+            }
             const cacheKey = `preview_${item.id}`;
             const cachedUrl = previewCache.get(cacheKey);
             if (cachedUrl) {
@@ -553,6 +590,7 @@ export function DashboardPage({onNavigate, user}: DashboardPageProps) {
                                                         className={selectItemClass}>Filename</SelectItem>
                                             <SelectItem value="file_size" className={selectItemClass}>Size</SelectItem>
                                             <SelectItem value="id" className={selectItemClass}>ID</SelectItem>
+                                            <SelectItem value="relevance" className={selectItemClass}>Relevance</SelectItem>
                                         </SelectContent>
                                     </Select>
                                 </div>
@@ -616,7 +654,7 @@ export function DashboardPage({onNavigate, user}: DashboardPageProps) {
                                 {data.items.map(item => (
                                     <Card key={item.id} className="overflow-hidden">
                                         <div className="relative h-48 bg-muted">
-                                            {item.file_type === 'image' && previews[item.id] ? (
+                                            {previews[item.id] ? (
                                                 <ImageWithFallback
                                                     src={previews[item.id]}
                                                     alt={`Processed file: ${item.original_filename || `File #${item.id}`}`}
@@ -636,10 +674,10 @@ export function DashboardPage({onNavigate, user}: DashboardPageProps) {
                                             {/* ═══ Бейджи статуса ═══ */}
                                             <div className="absolute top-2 right-2 flex flex-wrap gap-1">
                                                 <Badge
-                                                    variant={item.processed ? 'default' : 'secondary'}
+                                                    variant={item.processed ? 'default' : item.processing_status === 'failed' ? 'destructive' : 'secondary'}
                                                     className="text-xs"
                                                 >
-                                                    {item.processed ? 'Processed' : 'Pending'}
+                                                    {item.processed ? 'Processed' : item.processing_status === 'failed' ? 'Failed' : 'Pending'}
                                                 </Badge>
 
                                                 {/* BG Removed бейдж — используем helper для надёжной проверки */}
@@ -43,6 +43,27 @@ export interface MediaResponse {
   updated_at: string | null;
   // 5.1: Новое поле
   bg_removed: boolean | null;
+  thumbnail_url?: string | null;
+  preview_url?: string | null;
+  processing_status?: ProcessingStage | null;
+}
+
+export type ProcessingStage =
+  | 'queued'
+  | 'downloading'
+  | 'detecting'
+  | 'blurring'
+  | 'removing_background'
+  | 'uploading'
+  | 'done'
+  | 'failed';
+
+export interface MediaStatus {
+  id: number;
+  status: ProcessingStage;
+  processed: boolean;
+  bg_removed: boolean;
+  error: string | null;
 }
 
 export interface PaginatedMediaResponse {
@@ -51,6 +72,7 @@ export interface PaginatedMediaResponse {
   page: number;
   page_size: number;
   pages: number;
+  next_cursor?: string | null;
 }
 
 export interface MediaFilterParams {
@@ -63,6 +85,8 @@ export interface MediaFilterParams {
   sort_order?: string;
   page?: number;
   page_size?: number;
+  cursor?: string;
+  include_total?: boolean;
 }
 
 export interface ChangeRoleRequest {
@@ -72,6 +96,7 @@ export interface ChangeRoleRequest {
 // 5.5: Нормализованный тип для статуса Remove.bg
 export interface RemoveBgStatus {
   available: boolean;
+  backend: 'remove.bg' | 'local';
   credits_remaining: number | null;
   rate_limit_per_minute: number;
   message: string;
@@ -327,6 +352,60 @@ class ApiClient {
     return this.request<MediaResponse>(`/api/media/${mediaId}`);
   }
 
+  async getMediaStatus(mediaId: number): Promise<MediaStatus> {
+    return this.request<MediaStatus>(`/api/media/${mediaId}/status`);
+  }
+
+  /**
+   * SSE-поток статусов обработки (GET /api/media/events).
+   * fetch, а не EventSource — нужен заголовок Authorization.
+   * onOpen — по первому кадру «: connected»: сервер уже подписал поток,
+   * события с этого момента не теряются.
+   * Завершается при abort или обрыве соединения.
+   */
+  async streamMediaEvents(
+    onEvent: (status: MediaStatus) => void,
+    signal: AbortSignal,
+    onOpen?: () => void,
+  ): Promise<void> {
+    const open = () => fetch(`${this.baseURL}/api/media/events`, {
+      headers: {
+        'Authorization': `Bearer ${tokenStorage.getToken()}`,
+        'Accept': 'text/event-stream',
+      },
+      signal,
+    });
+
+    let response = await open();
+    if (response.status === 401) {
+      await this.doRefresh();
+      response = await open();
+    }
+    if (!response.ok || !response.body) {
+      throw new Error(`Event stream failed: ${response.status}`);
+    }
+
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = '';
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) return;
+      buffer += value;
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const frame = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        if (frame.startsWith(': connected')) onOpen?.();
+        const data = frame
+          .split('\n')
+          .filter(line => line.startsWith('data: '))
+          .map(line => line.slice(6))
+          .join('\n');
+        if (data) onEvent(JSON.parse(data));
+      }
+    }
+  }
+
   async updateMedia(mediaId: number, data: { description?: string }): Promise<MediaResponse> {
     return this.request<MediaResponse>(`/api/media/${mediaId}`, {
       method: 'PATCH',